@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""Benchmark Component.add_tabs() against the original regex-based indenter
+
+The RTL in examples/*/srdl2sv_out is stripped of its indentation and
+indented again by both implementations. The script fails if the output of
+both implementations is not byte-identical.
+
+Usage: python benchmarks/bench_add_tabs.py [--repeat N] [--rounds N]
+"""
+
+import argparse
+import pathlib
+import re
+import sys
+import timeit
+
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+# pylint: disable=wrong-import-position
+from srdl2sv.components.component import Component
+
+def legacy_add_tabs(rtl: str, tab_width: int = 4, real_tabs = False) -> str:
+    """Verbatim copy of the original Component.add_tabs()"""
+    indent_lvl = 0
+    indent_lvl_next = 0
+
+    # Define tab style
+    tab = "\t" if real_tabs else " "
+    tab = tab_width * tab
+
+    # Define triggers for which the indentation level will increment or
+    # decrement on the next line
+    trigger_re = re.compile(r"""
+        .*?(?P<keyword>
+            (?:\bbegin\b|\{|\bcase\b|<<INDENT>>)|
+            (?:\bend\b|}|\bendcase\b|<<UNINDENT>>)
+        )(?P<remainder>[^$]*)
+        """, flags=re.VERBOSE)
+
+    rtl_indented = []
+
+    # Go through RTL, line by line
+    for line in rtl.split('\n', -1):
+        line_split = line
+
+        # This is done because the increment of the indent level must
+        # be delayed one cycle
+        indent_lvl = indent_lvl_next
+
+        while 1:
+            # Check if indentation must be decremented
+            if match_obj := trigger_re.match(line_split):
+                if match_obj.group('keyword') in ('begin', '{', 'case', '<<INDENT>>'):
+                    indent_lvl_next += 1
+                else:
+                    indent_lvl = indent_lvl_next - 1
+                    indent_lvl_next -= 1
+
+                line_split = match_obj.group('remainder')
+
+                if not line_split:
+                    break
+            else:
+                break
+
+        # Add tabs
+        if line.strip() not in ("<<INDENT>>", "<<UNINDENT>>", "<<SQUASH_NEWLINE>>"):
+            rtl_indented.append(f"{tab*indent_lvl}{line}")
+
+    return '\n'.join(rtl_indented)
+
+def load_examples() -> str:
+    rtl = []
+
+    for sv_file in sorted(ROOT.glob('examples/*/srdl2sv_out/*.sv')):
+        with open(sv_file, 'r', encoding='UTF-8') as file:
+            rtl.extend(line.lstrip() for line in file.read().split('\n'))
+
+    return '\n'.join(rtl)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n', 1)[0])
+    parser.add_argument('--repeat', type=int, default=10,
+                        help="Number of times the example RTL is concatenated (default: 10)")
+    parser.add_argument('--rounds', type=int, default=5,
+                        help="Number of timed rounds per implementation (default: 5)")
+    args = parser.parse_args()
+
+    rtl = '\n'.join([load_examples()] * args.repeat)
+
+    # Make sure that both implementations generate identical output
+    for tab_width, real_tabs in ((4, False), (2, False), (1, True)):
+        if legacy_add_tabs(rtl, tab_width, real_tabs) != \
+                Component.add_tabs(rtl, tab_width, real_tabs):
+            print(f"Output mismatch (tab_width={tab_width}, real_tabs={real_tabs})")
+            sys.exit(1)
+
+    print(f"Input: {rtl.count(chr(10)) + 1} lines, {len(rtl)} characters")
+
+    for name, func in (('legacy', legacy_add_tabs), ('add_tabs', Component.add_tabs)):
+        time = min(timeit.repeat(lambda func=func: func(rtl, 4, False),
+                                 repeat=args.rounds, number=1))
+        print(f"{name:>10}: {time*1000:9.2f} ms")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,399 @@
+#!/usr/bin/env python3
+"""Benchmark the generation of RTL for synthetic, large address maps
+
+Every scenario writes a synthetic RDL file, runs it through the same
+pipeline as srdl2sv itself (compile, elaborate, AddrMap, RTL, packages),
+and reports the wall time per phase and the peak RSS. Every run of a
+scenario is done in a fresh process, so that the peak RSS of one scenario
+does not depend on the scenarios that ran before it.
+
+With --check, the scenarios are also run with the srdl2sv package of a git
+revision (default: HEAD) as reference. Since timings depend on the machine
+and its load, the reference is timed by the same invocation and its rounds
+alternate with the rounds of the working tree. The check fails if the working
+tree is slower or needs more memory than the reference.
+
+Usage: python benchmarks/bench_generation.py [--scenarios NAME ...] [--scale N]
+                                             [--rounds N] [--check [REV]]
+"""
+
+import argparse
+import io
+import json
+import pathlib
+import resource
+import subprocess
+import sys
+import tarfile
+import tempfile
+import time
+
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+PHASES = ('compile', 'elaborate', 'addrmap', 'rtl', 'packages')
+
+# Differences below these values are considered noise, no matter how large
+# they are relative to the reference
+MIN_DELTA = {'total': 0.05, 'max_rss_kb': 4096}
+
+def flat_rdl(scale: int) -> str:
+    """Addrmap with many registers at the top-level"""
+    regs = []
+
+    for i in range(500 * scale):
+        regs.append(f"""
+    reg {{
+        field {{sw=rw; hw=r;}} f0 [7:0] = 0;
+        field {{sw=r; hw=w;}} f1 [15:8];
+        field {{sw=rw; hw=rw; we;}} f2 [23:16] = 0;
+        field {{sw=rw; hw=r; onwrite=woclr;}} f3 [31:24] = 0;
+    }} reg_{i};""")
+
+    return f"addrmap flat {{{''.join(regs)}\n}};\n"
+
+def deep_rdl(scale: int) -> str:
+    """Deep hierarchy of regfile arrays"""
+    depth = 5 + scale
+
+    rdl = ["reg data_r { field {sw=rw; hw=r;} d [31:0] = 0; };"]
+
+    for level in range(depth):
+        child = f"level_{level-1}_rf child[2];" if level else ''
+
+        rdl.append(f"""
+regfile level_{level}_rf {{
+    data_r a;
+    data_r b;
+    {child}
+}};""")
+
+    rdl.append(f"addrmap deep {{ level_{depth-1}_rf top[2]; }};")
+
+    return '\n'.join(rdl)
+
+def arrays_rdl(scale: int) -> str:
+    """Large register arrays and a regfile array"""
+    return f"""
+addrmap arrays {{
+    reg data_r {{ field {{sw=rw; hw=r;}} d [31:0] = 0; }};
+    reg status_r {{ field {{sw=r; hw=w;}} s [31:0]; }};
+
+    data_r  big[{1024 * scale}];
+    status_r status[{256 * scale}];
+
+    regfile {{
+        data_r  cfg;
+        status_r sts;
+        data_r  ctrl[4];
+    }} rf[{64 * scale}];
+}};
+"""
+
+def aliases_rdl(scale: int) -> str:
+    """Registers that all have an alias"""
+    regs = []
+
+    for i in range(200 * scale):
+        regs.append(f"""
+    some_intr_r event_{i};
+    alias event_{i} some_intr_r event_{i}_for_dv;
+    event_{i}_for_dv.some_event->woset = true;""")
+
+    return f"""
+addrmap aliases {{
+    reg some_intr_r {{
+        field {{
+            level intr;
+            hw=w;
+            sw=rw;
+            woclr;
+        }} some_event;
+    }};
+{''.join(regs)}
+}};
+"""
+
+def counters_rdl(scale: int) -> str:
+    """Many saturating counters with thresholds"""
+    regs = []
+
+    for i in range(200 * scale):
+        regs.append(f"""
+    reg {{
+        field {{
+            sw = rw;
+            onwrite = wclr;
+            counter = true;
+            hwclr = true;
+            incrsaturate = true;
+            decrsaturate = true;
+            overflow = true;
+        }} cnt [31:0] = 0;
+    }} counter_{i};
+
+    reg {{
+        field {{sw = rw; hw = na;}} threshold [31:0] = 32'hffffffff;
+    }} counter_{i}_threshold;
+
+    counter_{i}.cnt->threshold = counter_{i}_threshold.threshold;""")
+
+    return f"""
+addrmap counters {{
+    signal {{activelow; async; field_reset;}} rst_async_n;
+{''.join(regs)}
+}};
+"""
+
+def interrupts_rdl(scale: int) -> str:
+    """Interrupt registers with enables"""
+    regs = []
+
+    for i in range(150 * scale):
+        regs.append(f"""
+    int_r   int_{i};
+    int_en_r int_{i}_en;
+    int_{i}.crc_error->enable = int_{i}_en.crc_error;
+    int_{i}.len_error->enable = int_{i}_en.len_error;""")
+
+    return f"""
+addrmap interrupts {{
+    signal {{activelow; async; field_reset;}} rst_async_n;
+
+    reg int_r {{
+        default hw=w;
+        default sw=rw;
+        default woclr;
+
+        field {{ level intr; }} crc_error = 0x0;
+        field {{ level intr; }} len_error = 0x0;
+        field {{ sticky; }} active_master[7:4] = 0;
+    }};
+
+    reg int_en_r {{
+        default hw=na;
+        default sw=rw;
+
+        field {{}} crc_error = 0x1;
+        field {{}} len_error = 0x1;
+    }};
+{''.join(regs)}
+}};
+"""
+
+def enums_rdl(scale: int) -> str:
+    """Many fields that are encoded with enums"""
+    rdl = []
+
+    for i in range(200 * scale):
+        members = ''.join(f"\n        e{i}_val_{x} = 3'd{x};" for x in range(8))
+
+        # Enum members must be unique in the scope of the addrmap. Hence,
+        # every register gets its own enum.
+        rdl.append(f"""
+    enum enum_{i} {{{members}
+    }};
+
+    reg {{
+        field {{sw=rw; hw=rw;}} f0 [2:0];
+        field {{sw=rw; hw=r;}} f1 [10:8];
+        f0->encode = enum_{i};
+    }} reg_{i};""")
+
+    return f"addrmap enums {{{''.join(rdl)}\n}};\n"
+
+SCENARIOS = {
+    'flat': flat_rdl,
+    'deep': deep_rdl,
+    'arrays': arrays_rdl,
+    'aliases': aliases_rdl,
+    'counters': counters_rdl,
+    'interrupts': interrupts_rdl,
+    'enums': enums_rdl,
+}
+
+def run_scenario(name: str, scale: int) -> dict:
+    """Run a single scenario in the current process and return its results"""
+    # pylint: disable=import-outside-toplevel
+    from systemrdl import RDLCompiler
+
+    from srdl2sv.cli.cli import CliArguments
+    from srdl2sv.components.addrmap import AddrMap
+
+    timings = {}
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        rdl_file = pathlib.Path(tmp_dir) / f"{name}.rdl"
+        rdl_file.write_text(SCENARIOS[name](scale), encoding='UTF-8')
+
+        config = CliArguments().get_config(
+            [str(rdl_file), '--out-dir', tmp_dir, '--stdout-logging', 'NONE'])
+
+        start = time.perf_counter()
+
+        rdlc = RDLCompiler()
+        rdlc.compile_file(str(rdl_file))
+        timings['compile'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        root = rdlc.elaborate()
+        timings['elaborate'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        addrmap = AddrMap(root.top, config)
+        timings['addrmap'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+
+        with open(pathlib.Path(tmp_dir) / f"{addrmap.name}.sv", 'w', encoding='UTF-8') as file:
+            addrmap.write_rtl(file, config['tab_width'], config['real_tabs'])
+
+        timings['rtl'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        addrmap.get_package_rtl(config['tab_width'], config['real_tabs'])
+        timings['packages'] = time.perf_counter() - start
+
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    if sys.platform == 'darwin':
+        max_rss //= 1024
+
+    return {'timings': timings,
+            'total': sum(timings.values()),
+            'max_rss_kb': max_rss}
+
+def run_isolated(name: str, scale: int, tree: pathlib.Path) -> dict:
+    """Run a scenario in a fresh interpreter with the srdl2sv package in 'tree'"""
+    result = subprocess.run(
+        [sys.executable, __file__, '--worker', name, '--scale', str(scale),
+         '--tree', str(tree)],
+        check=False,
+        capture_output=True,
+        text=True)
+
+    # Warnings of the compiler are only shown if the scenario fails
+    if result.returncode:
+        print(result.stderr, file=sys.stderr)
+        sys.exit(f"Scenario '{name}' failed")
+
+    return json.loads(result.stdout)
+
+def export_tree(rev: str, tree: pathlib.Path):
+    """Export the srdl2sv package of a git revision to 'tree'"""
+    archive = subprocess.run(
+        ['git', '-C', str(ROOT), 'archive', '--format=tar', rev, 'srdl2sv'],
+        check=False,
+        capture_output=True)
+
+    if archive.returncode:
+        sys.exit(f"Failed to export revision '{rev}': {archive.stderr.decode().strip()}")
+
+    with tarfile.open(fileobj=io.BytesIO(archive.stdout)) as tar:
+        tar.extractall(tree)
+
+def run_benchmark(scenarios: list, scale: int, rounds: int, trees: list) -> list:
+    """Run the scenarios with the srdl2sv package of every tree and return
+    the results of every tree
+
+    The rounds of the trees alternate, so that a change of the load of the
+    machine affects all trees alike.
+    """
+    results = [{} for _ in trees]
+
+    for name in scenarios:
+        runs = [[] for _ in trees]
+
+        for _ in range(rounds):
+            for tree, tree_runs in zip(trees, runs):
+                tree_runs.append(run_isolated(name, scale, tree))
+
+        # The fastest round is the least disturbed by other processes
+        for tree_results, tree_runs in zip(results, runs):
+            tree_results[name] = {
+                'timings': {x: min(y['timings'][x] for y in tree_runs) for x in PHASES},
+                'total': min(x['total'] for x in tree_runs),
+                'max_rss_kb': max(x['max_rss_kb'] for x in tree_runs),
+            }
+
+    return results
+
+def print_results(results: dict, reference: dict = None):
+    header = ''.join(f"{x:>11}" for x in (*PHASES, 'total'))
+    print(f"{'scenario':<12}{header}{'peak RSS':>12}")
+
+    for name, result in results.items():
+        timings = ''.join(f"{result['timings'][x]*1000:9.1f}ms" for x in PHASES)
+        print(f"{name:<12}{timings}{result['total']*1000:9.1f}ms"\
+              f"{result['max_rss_kb']/1024:9.1f}MiB")
+
+        if reference:
+            ref = reference[name]
+            timings = ''.join(f"{ref['timings'][x]*1000:9.1f}ms" for x in PHASES)
+            print(f"{'  reference':<12}{timings}{ref['total']*1000:9.1f}ms"\
+                  f"{ref['max_rss_kb']/1024:9.1f}MiB")
+
+def check_results(results: dict, reference: dict, tolerance: float) -> list:
+    """Return a list of regressions with respect to the reference"""
+    regressions = []
+
+    for name, result in results.items():
+        for key in ('total', 'max_rss_kb'):
+            if result[key] > reference[name][key] * (1 + tolerance) and \
+                    result[key] - reference[name][key] > MIN_DELTA[key]:
+                regressions.append(
+                    f"{name}: {key} is {result[key]/reference[name][key]-1:+.0%} "\
+                    f"compared to the reference")
+
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n', 1)[0])
+    parser.add_argument('--scenarios', nargs='+', choices=SCENARIOS.keys(),
+                        default=list(SCENARIOS.keys()),
+                        help="Scenarios to run (default: all)")
+    parser.add_argument('--scale', type=int, default=1,
+                        help="Multiplier for the size of the synthetic maps (default: 1)")
+    parser.add_argument('--rounds', type=int, default=3,
+                        help="Number of runs per scenario (default: 3)")
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help="Allowed relative increase of the total time and peak RSS "\
+                             "with respect to the reference (default: 0.25)")
+
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument('--check', nargs='?', const='HEAD', metavar='REV',
+                      help="Also run the scenarios with the srdl2sv package of the git "\
+                           "revision REV (default: HEAD) and fail if the results "\
+                           "regressed with respect to that reference")
+    mode.add_argument('--worker', choices=SCENARIOS.keys(), help=argparse.SUPPRESS)
+    parser.add_argument('--tree', type=pathlib.Path, default=ROOT, help=argparse.SUPPRESS)
+
+    args = parser.parse_args()
+
+    if args.worker:
+        sys.path.insert(0, str(args.tree))
+        print(json.dumps(run_scenario(args.worker, args.scale)))
+        return
+
+    if not args.check:
+        results, = run_benchmark(args.scenarios, args.scale, args.rounds, [ROOT])
+        print_results(results)
+        return
+
+    with tempfile.TemporaryDirectory() as ref_tree:
+        export_tree(args.check, pathlib.Path(ref_tree))
+
+        results, reference = run_benchmark(
+            args.scenarios, args.scale, args.rounds, [ROOT, pathlib.Path(ref_tree)])
+
+    print_results(results, reference)
+
+    if regressions := check_results(results, reference, args.tolerance):
+        print('\n'.join(['', 'Regressions:', *regressions]))
+        sys.exit(1)
+
+    print("\nNo regressions")
+
+if __name__ == '__main__':
+    main()
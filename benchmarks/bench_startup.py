@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""Benchmark the startup time of srdl2sv
+
+Every scenario is run in a fresh interpreter, so that no module or template
+is cached from a previous run. The time of a bare interpreter is reported
+as reference, since it is a lower bound for all other scenarios.
+
+Usage: python benchmarks/bench_startup.py [--rounds N]
+"""
+
+import argparse
+import pathlib
+import subprocess
+import sys
+import time
+
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+
+SCENARIOS = {
+    'python': ['-c', 'pass'],
+    'help': ['-m', 'srdl2sv.srdl2sv', '--help'],
+    'import': ['-c', 'import srdl2sv.components.addrmap'],
+    'templates': ['-c', """
+from srdl2sv.components.addrmap import AddrMap
+from srdl2sv.components.regfile import RegFile
+from srdl2sv.components.register import Register
+from srdl2sv.components.field import Field
+from srdl2sv.components.memory import Memory
+for cls in (AddrMap, RegFile, Register, Field, Memory):
+    for templ in cls.templ_dict.values():
+        pass
+"""],
+}
+
+def run_scenario(args: list, rounds: int) -> float:
+    """Return the fastest wall time of all rounds"""
+    times = []
+
+    for _ in range(rounds):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, *args], cwd=ROOT, check=True,
+                       stdout=subprocess.DEVNULL)
+        times.append(time.perf_counter() - start)
+
+    return min(times)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n', 1)[0])
+    parser.add_argument('--rounds', type=int, default=5,
+                        help="Number of runs per scenario, the fastest run is "\
+                             "reported (default: 5)")
+    args = parser.parse_args()
+
+    for name, scenario_args in SCENARIOS.items():
+        print(f"{name:<12}{run_scenario(scenario_args, args.rounds)*1000:9.1f}ms")
+
+if __name__ == '__main__':
+    main()
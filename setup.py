@@ -21,7 +21,10 @@ setup(
               'srdl2sv.components.templates',
               'srdl2sv.components.widgets',
               'srdl2sv.cli',
-              'srdl2sv.log'],
+              'srdl2sv.log',
+              'srdl2sv.parallel',
+              'srdl2sv.cache',
+              'srdl2sv.profile'],
     include_package_data=True,
     entry_points = {
         'console_scripts': ['srdl2sv=srdl2sv.srdl2sv:main', ]
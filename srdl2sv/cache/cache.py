@@ -0,0 +1,405 @@
+import contextlib
+import enum
+import filecmp
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import sys
+import tempfile
+from typing import Optional, Tuple
+
+import systemrdl
+from systemrdl import node, rdltypes
+
+# Local modules
+import srdl2sv
+
+# Configuration entries that influence the generated RTL. Other entries
+# (e.g., log levels or the number of jobs) do not require a module to be
+# regenerated.
+CONFIG_KEYS = (
+    'input_file',
+    'search_paths',
+    'list_args',
+    'real_tabs',
+    'tab_width',
+    'enums',
+    'illegal_addresses',
+    'address_decoder',
+    'read_mux',
+    'read_mux_stages',
+    'pipeline_stages',
+    'clock_gating',
+    'read_mux_arrays',
+    'regfiles',
+    'unpacked_arrays',
+    'bus',
+    'axi_outstanding',
+    'axi_skid_buffers',
+    'addrwidth',
+    'bus_width',
+    'no_byte_enable',
+    'descriptions',
+    'version',
+    'reproducible',
+    'source_date_epoch',
+)
+
+MANIFEST = 'manifest.json'
+
+# Subdirectory of the cache directory that holds the elaborated designs
+ELABORATION_DIR = 'elaboration'
+
+class OutputCache():
+    """Content-addressed cache of the files that are generated per addrmap
+
+    Every addrmap that results in a module gets a key, which is a hash of
+    the elaborated node subtree of the addrmap (not including hierarchical
+    addrmaps, since those result in seperate modules), the configuration
+    entries that influence the RTL, and the source of srdl2sv itself
+    (including all templates). The files of an addrmap are saved in a
+    directory with the name of the key.
+    """
+
+    def __init__(self, cache_dir: str, config: dict):
+        self.cache_dir = cache_dir
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+        # The hash of the configuration and the source is the same for
+        # all addrmaps. Thus, it is only calculated once.
+        self.base_hash = hashlib.sha256()
+        self.base_hash.update(systemrdl.__version__.encode())
+
+        for key in CONFIG_KEYS:
+            self.base_hash.update(f"{key}={config[key]!r}\n".encode())
+
+        OutputCache.__hash_source(self.base_hash)
+
+    def get_key(self, obj: node.AddrmapNode) -> str:
+        key_hash = self.base_hash.copy()
+
+        for line in _serialize_node(obj):
+            key_hash.update(line.encode())
+            key_hash.update(b'\n')
+
+        return key_hash.hexdigest()
+
+    def contains(self, key: str) -> bool:
+        """Check if the cache holds a complete entry for a key"""
+        file_names = self.__read_manifest(key)
+
+        return file_names is not None and all(
+            os.path.isfile(os.path.join(self.cache_dir, key, x)) for x in file_names)
+
+    def restore(self, key: str, output_dir: str) -> list:
+        """Copy the files of a previous run into the output directory
+
+        Files in the output directory that are already identical to the
+        files in the cache are not touched. Returns the list of restored files.
+        """
+        restored_files = []
+
+        for file_name in self.__read_manifest(key):
+            out_file = os.path.join(output_dir, file_name)
+
+            copy_if_changed(os.path.join(self.cache_dir, key, file_name), out_file)
+            restored_files.append(out_file)
+
+        return restored_files
+
+    def store(self, key: str, files: list):
+        """Save generated files in the cache"""
+        entry_dir = os.path.join(self.cache_dir, key)
+
+        os.makedirs(entry_dir, exist_ok=True)
+
+        for file_name in files:
+            copy_if_changed(file_name, os.path.join(entry_dir, os.path.basename(file_name)))
+
+        # The manifest is written last, so that an entry is only used if
+        # all files were stored succesfully
+        with open_if_changed(os.path.join(entry_dir, MANIFEST)) as file:
+            json.dump([os.path.basename(x) for x in files], file)
+
+    def __read_manifest(self, key: str) -> Optional[list]:
+        try:
+            with open(os.path.join(self.cache_dir, key, MANIFEST), 'r', encoding='UTF-8') as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return None
+
+    @staticmethod
+    def __hash_source(source_hash):
+        package_dir = os.path.dirname(srdl2sv.__file__)
+
+        for root, dirs, files in os.walk(package_dir):
+            dirs[:] = sorted(x for x in dirs if x != '__pycache__')
+
+            for file_name in sorted(files):
+                if not file_name.endswith(('.py', '.yaml', '.sv')):
+                    continue
+
+                source_hash.update(os.path.relpath(os.path.join(root, file_name), package_dir)\
+                        .encode())
+
+                with open(os.path.join(root, file_name), 'rb') as file:
+                    source_hash.update(file.read())
+
+class ElaborationCache():
+    """Cache of the elaborated root node of a set of RDL files
+
+    An entry is selected by the input files, the search paths, and the
+    versions of Python and systemrdl. It holds the content hashes of all
+    files that were read to compile the design (i.e., the input files and
+    all their includes) and the pickled root node. The root node is only
+    restored if none of these files changed since it was stored.
+
+    Designs with Perl tags (<% ... %>) are never stored, since the result
+    of the Perl preprocessor can depend on more than the files themselves.
+    """
+
+    def __init__(self, cache_dir: str, config: dict):
+        self.cache_dir = os.path.join(cache_dir, ELABORATION_DIR)
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+        key_hash = hashlib.sha256()
+        key_hash.update(f"{sys.version} {systemrdl.__version__}\n".encode())
+
+        for search_path in config['search_paths'] or []:
+            key_hash.update(f"search_path={os.path.abspath(search_path)}\n".encode())
+
+        for input_file in config['input_file']:
+            key_hash.update(f"input_file={os.path.abspath(input_file)}\n".encode())
+
+        self.entry_file = os.path.join(self.cache_dir, f"{key_hash.hexdigest()}.pickle")
+
+    def load(self) -> Optional[Tuple[node.RootNode, list]]:
+        """Return the root node of a previous run if no file changed since
+
+        The root node is returned together with the list of files it depends on.
+        """
+        try:
+            with open(self.entry_file, 'rb') as file:
+                # The hashes are pickled seperately from the root node, so
+                # that an outdated root node is never unpickled
+                dependencies = pickle.load(file)
+
+                if any(_hash_file(x) != y for (x, y) in dependencies.items()):
+                    return None
+
+                return (pickle.load(file), list(dependencies))
+        except Exception: # pylint: disable=broad-except
+            # A missing, incomplete, or incompatible entry is simply a miss
+            return None
+
+    def store(self, root: node.RootNode, file_names: list) -> bool:
+        """Save the root node together with the hashes of the files it depends on
+
+        Returns False if the root node could not be stored.
+        """
+        dependencies = {}
+
+        for file_name in file_names:
+            file_name = os.path.abspath(file_name)
+
+            try:
+                with open(file_name, 'rb') as file:
+                    content = file.read()
+            except OSError:
+                return False
+
+            if b'<%' in content:
+                return False
+
+            dependencies[file_name] = hashlib.sha256(content).hexdigest()
+
+        fd, tmp_file_name = tempfile.mkstemp(
+            dir=self.cache_dir,
+            prefix=f".{os.path.basename(self.entry_file)}.",
+            suffix='.tmp')
+
+        try:
+            with os.fdopen(fd, 'wb') as file:
+                pickle.dump(dependencies, file, protocol=pickle.HIGHEST_PROTOCOL)
+                _RootPickler(file, protocol=pickle.HIGHEST_PROTOCOL).dump(root)
+
+            os.replace(tmp_file_name, self.entry_file)
+        except (pickle.PicklingError, RecursionError, TypeError, AttributeError):
+            return False
+        finally:
+            if os.path.exists(tmp_file_name):
+                os.remove(tmp_file_name)
+
+        return True
+
+class _RootPickler(pickle.Pickler):
+    """Pickler that is able to save the types that are defined in RDL
+
+    Enums and structs are classes that are created by systemrdl while
+    compiling, which cannot be looked up by their name when unpickling.
+    Hence, they are pickled by the arguments to create them again. Their
+    scope is restored after they were created, since the scope itself might
+    refer to the type. Enum members are looked up by their name, since
+    systemrdl does not map their values to the members.
+    """
+
+    def reducer_override(self, obj):
+        if isinstance(obj, rdltypes.UserEnum):
+            return (getattr, (type(obj), obj.name))
+
+        if not isinstance(obj, type):
+            return NotImplemented
+
+        if issubclass(obj, rdltypes.UserEnum) and obj is not rdltypes.UserEnum:
+            args = (obj.__name__, {x.name: (x.value, x.rdl_name, x.rdl_desc) for x in obj})
+            return (rdltypes.UserEnum, args, (None, _own_scope(obj)))
+
+        if issubclass(obj, rdltypes.UserStruct) and obj is not rdltypes.UserStruct:
+            namespace = {'_members': obj._members, '_is_abstract': obj._is_abstract}
+            return (type, (obj.__name__, obj.__bases__, namespace), (None, _own_scope(obj)))
+
+        return NotImplemented
+
+def _own_scope(obj: type) -> dict:
+    if '_parent_scope' in obj.__dict__:
+        return {'_parent_scope': obj.__dict__['_parent_scope']}
+
+    return {}
+
+def _hash_file(file_name: str) -> Optional[str]:
+    try:
+        with open(file_name, 'rb') as file:
+            return hashlib.sha256(file.read()).hexdigest()
+    except OSError:
+        return None
+
+@contextlib.contextmanager
+def open_if_changed(file_name: str):
+    """Open a file for writing, but only replace the file if its content changed
+
+    The content is first written to a temporary file in the same directory.
+    If the new content is identical to the existing file, the existing file
+    is not touched, so that its timestamp does not change.
+    """
+    fd, tmp_file_name = tempfile.mkstemp(
+        dir=os.path.dirname(file_name) or '.',
+        prefix=f".{os.path.basename(file_name)}.",
+        suffix='.tmp')
+
+    try:
+        with os.fdopen(fd, 'w', encoding='UTF-8') as file:
+            yield file
+
+        _replace_if_changed(tmp_file_name, file_name)
+    finally:
+        if os.path.exists(tmp_file_name):
+            os.remove(tmp_file_name)
+
+def copy_if_changed(src: str, dst: str):
+    """Copy a file, but leave the destination untouched if it is identical"""
+    if os.path.isfile(dst) and filecmp.cmp(src, dst, shallow=False):
+        return
+
+    fd, tmp_file_name = tempfile.mkstemp(
+        dir=os.path.dirname(dst) or '.',
+        prefix=f".{os.path.basename(dst)}.",
+        suffix='.tmp')
+    os.close(fd)
+
+    try:
+        shutil.copyfile(src, tmp_file_name)
+        _replace_if_changed(tmp_file_name, dst)
+    finally:
+        if os.path.exists(tmp_file_name):
+            os.remove(tmp_file_name)
+
+def _replace_if_changed(tmp_file_name: str, file_name: str):
+    if os.path.isfile(file_name) and filecmp.cmp(tmp_file_name, file_name, shallow=False):
+        return
+
+    # mkstemp() creates files that are only accessible by the user. Give the
+    # file the same permissions as a file that is created with open().
+    umask = os.umask(0)
+    os.umask(umask)
+    os.chmod(tmp_file_name, 0o666 & ~umask)
+
+    os.replace(tmp_file_name, file_name)
+
+def _serialize_node(obj: node.Node, scope_root: bool = True):
+    """Generator that yields lines that describe a node and its children
+
+    Hierarchical addrmaps are only described by their path since they
+    result in a seperate module.
+    """
+    yield f"{type(obj).__name__} {obj.get_path()} {obj.type_name}"
+
+    if isinstance(obj, node.AddrmapNode) and not scope_root:
+        return
+
+    yield from _serialize_attributes(obj, 0)
+
+    for child in obj.children():
+        yield from _serialize_node(child, False)
+
+def _serialize_attributes(obj: node.Node, depth: int):
+    yield f"inst_name={obj.inst_name}"
+
+    if isinstance(obj, node.AddressableNode):
+        yield f"address={obj.raw_absolute_address} size={obj.size} total_size={obj.total_size}"
+        yield f"array={obj.is_array} {obj.array_dimensions} {obj.array_stride}"
+
+    if isinstance(obj, node.FieldNode):
+        yield f"bits={obj.msb}:{obj.lsb}"
+
+    if isinstance(obj, node.RegNode) and obj.inst.is_alias:
+        yield f"alias_of={obj.inst.alias_primary_inst.inst_name}"
+
+    if isinstance(obj, node.SignalNode):
+        yield f"width={obj.width}"
+
+    for prop in obj.list_properties(list_all=True):
+        yield f"{prop}={_serialize_value(obj.get_property(prop), depth)}"
+
+def _serialize_value(value, depth: int) -> str:
+    if isinstance(value, (list, tuple)):
+        return f"[{', '.join(_serialize_value(x, depth) for x in value)}]"
+
+    if isinstance(value, node.Node):
+        # Referenced nodes can be located outside of the addrmap. Their
+        # properties are taken into account, but references of those
+        # nodes are not followed any further.
+        if depth > 0:
+            return f"node:{value.get_path()}"
+
+        return f"node:{value.get_path()}({'; '.join(_serialize_attributes(value, 1))})"
+
+    if isinstance(value, rdltypes.UserStruct):
+        # The representation of a struct holds its address
+        members = ', '.join(
+            f"{x}: {_serialize_value(getattr(value, x), depth)}" for x in type(value)._members)
+
+        return f"struct:{type(value).get_scope_path()}::{type(value).__name__}({members})"
+
+    if isinstance(value, rdltypes.PropertyReference):
+        return f"ref:{_serialize_value(value.node, depth)}->{value.name}"
+
+    if isinstance(value, type) and issubclass(value, enum.Enum):
+        # E.g., a UserEnum that is used to encode a field
+        try:
+            scope = value.get_scope_path()
+        except AttributeError:
+            scope = ''
+
+        members = [(x.name, x.value, getattr(x, 'rdl_name', None), getattr(x, 'rdl_desc', None))
+                   for x in value]
+
+        return f"enum:{scope}::{value.__name__}{members!r}"
+
+    if isinstance(value, enum.Enum):
+        return f"{type(value).__name__}.{value.name}"
+
+    return repr(value)
@@ -1,5 +1,8 @@
 import argparse
+import functools
 import os
+import shlex
+import sys
 import time
 import logging
 from itertools import chain
@@ -14,8 +17,6 @@ logging_map = {
 }
 
 class CliArguments():
-    # TODO: Add option to remove timestamp (for SCM)
-
     def __init__(self):
         self.parser = argparse.ArgumentParser(
             description="A SystemRDL 2.0 to (synthesizable) SystemVerilog compiler",
@@ -33,13 +34,39 @@ class CliArguments():
         self.parser.add_argument(
             "-b",
             "--bus",
-            choices=['simple', 'amba3ahblite'],
+            choices=['simple', 'amba3ahblite', 'amba3ahblite_pipelined', 'axi4lite'],
             default='amba3ahblite',
             help="Set the bus protocol that shall be used by software to \
                   communicate with the registers. If just a simple interface \
                   to the registers is needed, use the 'simple' protocol. \
+                  'amba3ahblite_pipelined' overlaps the address and data \
+                  phases of back-to-back transfers. (default: %(default)s)")
+
+        self.parser.add_argument(
+            "--bus-width",
+            type=int,
+            help="Set the data width of the bus protocol in bits. If the bus is\
+                  wider than the registers, a single access reads or writes\
+                  all adjacent registers in the lanes with enabled bytes. The\
+                  lanes are accessed one after another. (default: width of the\
+                  widest register)")
+
+        self.parser.add_argument(
+            "--axi-outstanding",
+            type=int,
+            default=2,
+            help="Number of read and write responses, respectively, that the\
+                  'axi4lite' widget can buffer while RREADY or BREADY is low.\
                   (default: %(default)s)")
 
+        self.parser.add_argument(
+            "--no-axi-skid-buffers",
+            action="store_true",
+            help="Disable the skid buffers on the request channels of the\
+                  'axi4lite' widget. This removes one cycle of latency, but\
+                  ARREADY, AWREADY, and WREADY will depend combinationally on\
+                  the registers.")
+
         self.parser.add_argument(
             "-d",
             "--descriptions",
@@ -69,6 +96,76 @@ class CliArguments():
             help="Disable an error response when illegal addresses are \
                   accessed.")
 
+        self.parser.add_argument(
+            "--address-decoder",
+            choices=['flat', 'hierarchical'],
+            default='flat',
+            help="Set the structure of the address decoder. With 'flat', every\
+                  register compares the complete address. With 'hierarchical',\
+                  aligned regfiles decode the upper address bits once and\
+                  their registers only compare the remaining lower bits.\
+                  (default: %(default)s)")
+
+        self.parser.add_argument(
+            "--read-mux",
+            choices=['flat', 'tree'],
+            default='flat',
+            help="Set the structure of the read multiplexer. With 'flat', one\
+                  case statement selects the active register. With 'tree',\
+                  a balanced OR-reduction tree is used, which can be pipelined\
+                  with --read-mux-stages. (default: %(default)s)")
+
+        self.parser.add_argument(
+            "--read-mux-stages",
+            type=int,
+            default=0,
+            help="Number of pipeline stages in the tree-structured read\
+                  multiplexer. Every stage adds one cycle of latency to all\
+                  accesses. Requires '--read-mux tree'. (default: %(default)s)")
+
+        self.parser.add_argument(
+            "--pipeline-stages",
+            type=int,
+            default=0,
+            help="Number of register slices between the bus widget and the\
+                  registers. Every stage registers the request and the\
+                  response and adds two cycles of latency to all accesses.\
+                  This works with every bus protocol. (default: %(default)s)")
+
+        self.parser.add_argument(
+            "--clock-gating",
+            choices=['none', 'infer', 'icg'],
+            default='none',
+            help="Add a clock enable to every register, which is only set if\
+                  one of its flops might change. With 'infer', the enable is\
+                  the outermost condition of the flops, so that synthesis can\
+                  infer clock gates. With 'icg', the enable drives an\
+                  instance of srdl2sv_clock_gate, which clocks the flops and\
+                  shall be replaced by a clock gating cell of the target\
+                  library. (default: %(default)s)")
+
+        self.parser.add_argument(
+            "--read-mux-arrays",
+            choices=['unrolled', 'indexed'],
+            default='unrolled',
+            help="Set how register arrays are connected to the read multiplexer.\
+                  With 'unrolled', every element of an array is a seperate\
+                  input. With 'indexed', every array is a single input. If all\
+                  strides of an array are powers of 2, the index of the\
+                  active element is taken from the address. Otherwise, a\
+                  loop over the array indices selects the active element.\
+                  (default: %(default)s)")
+
+        self.parser.add_argument(
+            "--regfiles",
+            choices=['inline', 'modules'],
+            default='inline',
+            help="Set how regfiles are implemented. With 'inline', the registers\
+                  of all regfiles are part of the module of the addrmap. With\
+                  'modules', every regfile type is implemented once as a\
+                  seperate module, which is instantiated for every instance of\
+                  the regfile. (default: %(default)s)")
+
         self.parser.add_argument(
             "--no-unpacked",
             action="store_true",
@@ -123,14 +220,150 @@ class CliArguments():
             help="Define how many tabs or spaces will be contained\
                   in one level of indentation. (default: %(default)s)")
 
+        self.parser.add_argument(
+            "--reproducible",
+            action="store_true",
+            help="Omit the user, hostname, and working directory from the\
+                  header of generated files, so that the output does not\
+                  differ between runs. The timestamp is taken from the\
+                  environment variable SOURCE_DATE_EPOCH or omitted if that\
+                  variable is not set.")
+
+        self.parser.add_argument(
+            "--profile",
+            action="store_true",
+            help="Record the time and number of calls of every phase of the\
+                  compiler and of every component class. The results are\
+                  saved in the output directory as JSON and as Chrome trace\
+                  event file.")
+
+        self.parser.add_argument(
+            "-j",
+            "--jobs",
+            type=int,
+            default=1,
+            help="Number of processes that are used to elaborate hierarchical\
+                  addrmaps in parallel. If set to 0, the number of available\
+                  CPUs is used. (default: %(default)s)")
+
+        self.parser.add_argument(
+            "--cache-dir",
+            type=str,
+            help="Directory to cache the elaborated design and generated\
+                  files in. RDL files that did not change since a previous\
+                  run with the same cache directory are not compiled again\
+                  and addrmaps that did not change are not regenerated.\
+                  Instead, the results of the previous run are restored.")
+
+        self.parser.add_argument(
+            "--watch",
+            action="store_true",
+            help="Keep running and compile the RDL file(s) again every time\
+                  they or one of the files they include change. Only\
+                  addrmaps that changed are generated again and only\
+                  files whose content changed are rewritten. If no\
+                  --cache-dir is set, a temporary cache directory is used.")
+
+        self.parser.add_argument(
+            "--batch",
+            type=str,
+            metavar="MANIFEST",
+            help="Compile all entries of a manifest file in a single process.\
+                  Every line of the manifest holds the RDL file(s) and options\
+                  of one run of srdl2sv, as they would be passed on the command\
+                  line. Options that are passed on the command line together\
+                  with --batch apply to all entries. If --jobs is passed on the\
+                  command line, entries are compiled by a pool of processes.")
+
         self.parser.add_argument(
             "RDL",
             type=str,
-            nargs="+",
+            nargs="*",
             help="Location of RDL file(s) with root addrmap.")
 
-    def get_config(self) -> dict():
-        args = self.parser.parse_args()
+    def get_batch_config(self, argv: list = None) -> dict():
+        """Return the configuration of batch mode
+
+        If --batch is not set, None is returned. Otherwise, the 'entries'
+        of the returned dictionary hold the configurations of all entries
+        of the manifest, in the same order as in the manifest.
+        """
+        if argv is None:
+            argv = sys.argv[1:]
+
+        args = self.parser.parse_args(argv)
+
+        if not args.batch:
+            return None
+
+        if args.RDL:
+            self.parser.error("RDL file(s) cannot be combined with --batch")
+
+        if args.watch:
+            self.parser.error("--watch cannot be combined with --batch")
+
+        # All other options are passed to every entry of the manifest
+        common_argv = []
+        skip = False
+
+        for arg in argv:
+            if skip:
+                skip = False
+            elif arg == '--batch':
+                skip = True
+            elif not arg.startswith('--batch='):
+                common_argv.append(arg)
+
+        batch_config = dict()
+        batch_config['manifest'] = args.batch
+        batch_config['jobs'] = args.jobs if args.jobs > 0 else os.cpu_count()
+        batch_config['stdout_log_level'] = logging_map[args.stdout_logging]
+        batch_config['file_log_level'] = logging_map[args.file_logging]
+
+        # The batch logs to its own file in the output directory, since
+        # the entries might log to the same directory at the same time
+        if batch_config['file_log_level'] > 0:
+            os.makedirs(args.out_dir, exist_ok=True)
+
+        ts = time.strftime('%Y%m%d_%H%M%S', time.localtime())
+        batch_config['file_log_location'] = "/".join([args.out_dir, f"srdl2sv_batch_{ts}.log"])
+        batch_config['entries'] = []
+
+        try:
+            with open(args.batch, encoding='UTF-8') as manifest:
+                lines = manifest.readlines()
+        except OSError as err:
+            self.parser.error(f"cannot read manifest '{args.batch}': {err.strerror}")
+
+        for line_nr, line in enumerate(lines, start=1):
+            try:
+                entry_argv = shlex.split(line, comments=True)
+            except ValueError as err:
+                self.parser.error(f"{args.batch}:{line_nr}: {err}")
+
+            if not entry_argv:
+                continue
+
+            if '--batch' in entry_argv or any(x.startswith('--batch=') for x in entry_argv):
+                self.parser.error(f"{args.batch}:{line_nr}: entries cannot use --batch")
+
+            if '--watch' in entry_argv:
+                self.parser.error(f"{args.batch}:{line_nr}: entries cannot use --watch")
+
+            try:
+                batch_config['entries'].append(self.get_config([*common_argv, *entry_argv]))
+            except SystemExit:
+                print(f"Invalid entry in line {line_nr} of '{args.batch}'", file=sys.stderr)
+                raise
+
+        return batch_config
+
+    def get_config(self, argv: list = None) -> dict():
+        # If no arguments are passed, they are taken from sys.argv
+        args = self.parser.parse_args(argv)
+
+        if not args.RDL:
+            self.parser.error("the following arguments are required: RDL")
 
         # Create dictionary to save config in
         config = dict()
@@ -156,7 +389,7 @@ class CliArguments():
         # Determine paths to be passed to systemrdl-compiler to search
         # for include files.
         if args.recursive_search:
-            config['search_paths'] = [x[0] for y in args.search_paths for x in os.walk(y)]
+            config['search_paths'] = [x for y in args.search_paths for x in _walk(y)]
         else:
             config['search_paths'] = args.search_paths
 
@@ -177,6 +410,31 @@ class CliArguments():
         config['list_args'].append(f"Use Real Tabs    : {config['real_tabs']}")
         config['list_args'].append(f"Tab Width        : {config['tab_width']}")
 
+        # Reproducible output. This is not added to list_args, since the header
+        # itself shows whether information was omitted.
+        config['reproducible'] = args.reproducible
+        config['source_date_epoch'] = None
+
+        if args.reproducible and os.environ.get('SOURCE_DATE_EPOCH'):
+            try:
+                config['source_date_epoch'] = int(os.environ['SOURCE_DATE_EPOCH'])
+            except ValueError:
+                self.parser.error("SOURCE_DATE_EPOCH must be an integer")
+
+        # Number of processes to elaborate addrmaps. This does not influence
+        # the generated RTL and is thus not added to list_args.
+        config['jobs'] = args.jobs if args.jobs > 0 else os.cpu_count()
+
+        # Cache for generated files. Like the number of jobs, this does not
+        # influence the generated RTL.
+        config['cache_dir'] = args.cache_dir
+
+        # Profiling of the compiler itself
+        config['profile'] = args.profile
+
+        # Keep running and compile again if an RDL file changes
+        config['watch'] = args.watch
+
         # Set enums
         config['enums'] = not args.no_enums
         config['list_args'].append(f"Enums Enabled    : {config['enums']}")
@@ -185,6 +443,37 @@ class CliArguments():
         config['illegal_addresses'] = not args.no_address_errors
         config['list_args'].append(f"Address Errors   : {config['illegal_addresses']}")
 
+        # Set structure of address decoder
+        config['address_decoder'] = args.address_decoder
+
+        if config['address_decoder'] != 'flat':
+            config['list_args'].append(f"Address Decoder  : {config['address_decoder']}")
+
+        # Set structure of read multiplexer
+        if args.read_mux_stages < 0:
+            self.parser.error("--read-mux-stages must be a non-negative number")
+
+        if args.read_mux_stages and args.read_mux != 'tree':
+            self.parser.error("--read-mux-stages requires '--read-mux tree'")
+
+        config['read_mux'] = args.read_mux
+        config['read_mux_stages'] = args.read_mux_stages
+
+        if config['read_mux'] == 'tree':
+            config['list_args'].append(
+                f"Read Multiplexer : tree, {config['read_mux_stages']} pipeline stage(s)")
+
+        config['read_mux_arrays'] = args.read_mux_arrays
+
+        if config['read_mux_arrays'] != 'unrolled':
+            config['list_args'].append(f"Read Mux Arrays  : {config['read_mux_arrays']}")
+
+        # Set implementation of regfiles
+        config['regfiles'] = args.regfiles
+
+        if config['regfiles'] != 'inline':
+            config['list_args'].append(f"Regfiles         : {config['regfiles']}")
+
         # Set unpacked arrays
         config['unpacked_arrays'] = not args.no_unpacked
         config['list_args'].append(f"Unpacked I/Os    : {config['enums']}")
@@ -193,8 +482,19 @@ class CliArguments():
         config['bus'] = args.bus
         config['list_args'].append(f"Register Bus Type: {config['bus']}")
 
+        if args.axi_outstanding < 1:
+            self.parser.error("--axi-outstanding must be a positive number")
+
+        config['axi_outstanding'] = args.axi_outstanding
+        config['axi_skid_buffers'] = not args.no_axi_skid_buffers
+
+        if config['bus'] == 'axi4lite':
+            config['list_args'].append(
+                f"AXI Widget       : {config['axi_outstanding']} outstanding, "\
+                f"skid buffers: {config['axi_skid_buffers']}")
+
         # Address width
-        if args.bus == 'amba3ahblite':
+        if args.bus in ('amba3ahblite', 'amba3ahblite_pipelined'):
             config['addrwidth'] = 32
             config['addrwidth_bus_spec'] = True
         else:
@@ -207,6 +507,33 @@ class CliArguments():
         config['no_byte_enable'] = args.no_byte_enable
         config['list_args'].append(f"Byte enables     : {not config['no_byte_enable']}")
 
+        # Data width of the bus. By default, it is the width of the widest
+        # register, which is only known once the addrmap is elaborated.
+        if args.bus_width is not None and \
+                (args.bus_width < 8 or args.bus_width & (args.bus_width - 1)):
+            self.parser.error("--bus-width must be a power of 2 of at least 8")
+
+        config['bus_width'] = args.bus_width
+
+        if config['bus_width']:
+            config['list_args'].append(f"Bus width        : {config['bus_width']}")
+
+        # Register slices between the bus widget and the registers
+        if args.pipeline_stages < 0:
+            self.parser.error("--pipeline-stages must be a non-negative number")
+
+        config['pipeline_stages'] = args.pipeline_stages
+
+        if config['pipeline_stages']:
+            config['list_args'].append(
+                f"Widget Pipeline  : {config['pipeline_stages']} stage(s)")
+
+        # Clock gating of the flops of the registers
+        config['clock_gating'] = args.clock_gating
+
+        if config['clock_gating'] != 'none':
+            config['list_args'].append(f"Clock Gating     : {config['clock_gating']}")
+
         # Set location where descirptions shall be set
         # Comparison to 1 to get a Python bool
         config['descriptions'] = {}
@@ -221,3 +548,12 @@ class CliArguments():
         config['version'] = '0.01'
 
         return config
+
+@functools.lru_cache(maxsize=None)
+def _walk(path: str) -> tuple:
+    """Return a directory and all its subdirectories
+
+    The result is cached, so that entries of a batch that share search
+    paths only walk through the file system once.
+    """
+    return tuple(x[0] for x in os.walk(path))
@@ -1,29 +1,34 @@
-import importlib.resources as pkg_resources
 import sys
+import math
+from typing import Optional
 import getpass
 import socket
 import time
 import os
-import yaml
 
 from systemrdl import node
 
 # Local packages
-from srdl2sv.components.component import Component
+from srdl2sv.components.component import Component, SWMuxEntry, SWMuxEntryDimensioned
 from srdl2sv.components.regfile import RegFile
+from srdl2sv.components.regfile_module import RegFileModule, RegFileInstance
 from srdl2sv.components.register import Register
 from srdl2sv.components.memory import Memory
+from srdl2sv.components.compiled_template import load_templates
 from srdl2sv.components import templates
+from srdl2sv.profile import profile
 from srdl2sv.components import widgets
 
 
 class AddrMap(Component):
     # Save YAML template as class variable
-    templ_dict = yaml.load(
-        pkg_resources.read_text(templates, 'addrmap.yaml'),
-        Loader=yaml.FullLoader)
+    templ_dict = load_templates(templates, 'addrmap.yaml')
 
-    def __init__(self, obj: node.RootNode, config: dict):
+    # Maximum number of inputs of a node in the tree-structured read multiplexer
+    MUX_TREE_RADIX = 4
+
+    @profile.timed('AddrMap.__init__', 'AddrMap')
+    def __init__(self, obj: node.RootNode, config: dict, elaborate_children: bool = True):
         super().__init__(
                     obj=obj,
                     config=config,
@@ -33,12 +38,24 @@ class AddrMap(Component):
         # Name of addrmap should always be the object's name and not the name of the instance
         self.name = obj.type_name
 
+        # Registers, regfiles, and memories of this addrmap must know whether
+        # reads are served by a seperate port. Child addrmaps decide this
+        # themselves.
+        self.config = {**config, 'read_port': self.__has_read_port()}
+
         # Check if global resets are defined
         glbl_settings = {}
 
         # Use global settings to define whether a component is already in a generate block
         glbl_settings['generate_active'] = False
 
+        # Regfiles can decode the upper bits of an address once for all their
+        # registers. Registers at the top-level always compare the whole address.
+        glbl_settings['decode_region'] = None
+
+        # Fields with identical properties are only rendered once per addrmap
+        glbl_settings['field_cache'] = {}
+
         # Save whether 0, 1, or x must be set for reserved bits
         if self.obj.get_property('rsvdset'):
             glbl_settings['rsvd_val'] = "1"
@@ -54,6 +71,8 @@ class AddrMap(Component):
         self.addrmaps = []
         self.registers = {}
         self.regfiles = {}
+        self.regfile_modules = {}
+        self.regfile_module_ids = {}
         self.mems = {}
         self.regwidth = 0
 
@@ -66,41 +85,32 @@ class AddrMap(Component):
                 # a field_reset does not propagate through to this scope.
                 #
                 # We only need to create files for objects, not for instantiations.
-                # For that reason, scan if we already created an instance of this
-                # object. 
-                if child.type_name not in self.addrmap_ids:
-                    self.logger.info("Found hierarchical addrmap of type '%s' " \
-                                     ". Entering it...", child.type_name)
-
-                    # Save unique ID of object to dictionary
-                    self.addrmap_ids[child.type_name] = id(child.inst.original_def)
-
-                    # Create addrmap object
+                # When elaborate_children is not set, the caller takes care of
+                # checking and creating the child addrmaps (e.g., in a seperate
+                # process).
+                if elaborate_children and \
+                        AddrMap.is_new_addrmap(child, self.addrmap_ids, self.logger):
                     self.addrmaps.append(AddrMap(obj=child, config=config))
-                elif id(child.inst.original_def) == self.addrmap_ids[child.type_name]:
-                    self.logger.info("Found another instance of addrmap '%s'. " \
-                                     "Not rebuilding it...", child.type_name)
-                else:
-                    self.logger.fatal("Found a redeclaration of addrmap '%s'. " \
-                                      "This is not supported by srdl2sv because " \
-                                      "the compiler will create a seperate SystemVerilog " \
-                                      "module for every addrmap object.", child.type_name)
-
-                    sys.exit(1)
             elif isinstance(child, node.RegfileNode):
-                new_child = RegFile(
-                                obj=child,
-                                parents_dimensions=None,
-                                parents_strides=None,
-                                config=config,
-                                glbl_settings=glbl_settings)
+                if module := self.__get_regfile_module(child, glbl_settings):
+                    new_child = RegFileInstance(
+                                    obj=child,
+                                    config=self.config,
+                                    module=module)
+                else:
+                    new_child = RegFile(
+                                    obj=child,
+                                    parents_dimensions=None,
+                                    parents_strides=None,
+                                    config=self.config,
+                                    glbl_settings=glbl_settings)
                 self.regfiles[child.inst_name] = new_child
             elif isinstance(child, node.MemNode):
                 new_child = Memory(
                                 obj=child,
                                 parents_dimensions=None,
                                 parents_strides=None,
-                                config=config)
+                                config=self.config)
                 new_child.sanity_checks()
                 self.mems[child.inst_name] = new_child
             elif isinstance(child, node.RegNode):
@@ -115,7 +125,7 @@ class AddrMap(Component):
                                     obj=child,
                                     parents_dimensions=None,
                                     parents_strides=None,
-                                    config=config,
+                                    config=self.config,
                                     glbl_settings=glbl_settings)
                     self.registers[child.inst_name] = new_child
 
@@ -140,68 +150,30 @@ class AddrMap(Component):
         for register in self.registers.values():
             register.create_rtl()
 
+        # Report how many of the flops are clock gated
+        if self.config['clock_gating'] != 'none':
+            gated, total = self.get_flop_count()
+
+            self.logger.info(
+                "Clock gated %i out of %i flops (%.1f%%)",
+                gated, total, 100 * gated / total if total else 0)
+
         # Add bus widget ports
         widget_rtl = self.__get_widget_ports_rtl()
 
         # Start assembling addrmap module
         self.logger.info("Starting to assemble input & output ports")
 
+        # Ports and resets of all children are collected at once
+        collection = self.collect()
+
         # Reset ports
         reset_ports_rtl = [
-            AddrMap.templ_dict['reset_port']['rtl'].format(
-                name = name)
-            for name in self.get_resets()
+            AddrMap.templ_dict['reset_port'].render({'name': name})
+            for name in collection.resets
             ]
 
-        ports_rtl = []
-
-        # Prefetch dictionaries in local array
-        port_dict_list = self.get_ports().items()
-
-        for group, ports in port_dict_list:
-            ports_rtl.append(f"// Ports for '{group}'")
-
-            # Determine widths for this group
-            signal_width = max(
-                max([len(value.datatype) for (_, value) in ports.items()]), 12)
-
-            name_width  = max([len(key) for (key, _) in ports.items()])
-
-            # Generate RTL
-            for (key, port_type) in ports.items():
-                # TODO: Think about a better way to handle datatypes. Simply replacing them
-                #       is not the most efficient way of handling it.
-                signal_type = port_type.datatype.replace('logic', '').strip()
-
-                if config['unpacked_arrays'] and port_type.dim:
-                    unpacked_dim = f"[{']['.join([str(y) for y in port_type.dim])}]"
-                elif port_type.dim:
-                    unpacked_dim = ''
-                    signal_type = ''.join([
-                        f"[{':0]['.join([str(y-1) for y in port_type.dim])}:0]",
-                        signal_type
-                        ])
-                else:
-                    unpacked_dim = ''
-
-                ports_rtl.append(
-                    AddrMap.templ_dict['port']['rtl'].format(
-                        name = key,
-                        direction = port_type.direction,
-                        signal_type = signal_type,
-                        signal_width = signal_width,
-                        name_width = name_width,
-                        unpacked_dim = unpacked_dim,
-                    )
-                )
-
-            # Append a new line after every port
-            ports_rtl.append('')
-
-        # Remove last newline
-        # Remove comma from last port entry
-        ports_rtl.pop()
-        ports_rtl[-1] = ports_rtl[-1].rstrip(',')
+        ports_rtl = self._get_ports_rtl(AddrMap.templ_dict['port'], collection.ports)
 
         # Define packages to be included. Always include the
         # b2w and w2b defines.
@@ -210,7 +182,7 @@ class AddrMap(Component):
         try:
             for pkg_name in self.__get_package_names():
                 import_package_list.append(
-                    AddrMap.templ_dict['import_package']['rtl'].format(name = pkg_name)
+                    AddrMap.templ_dict['import_package'].render({'name': pkg_name})
                 )
 
                 import_package_list.append('\n')
@@ -225,24 +197,20 @@ class AddrMap(Component):
             pass
 
         self.rtl_header.append(
-            AddrMap.templ_dict['header'].format(
-                user = getpass.getuser(),
-                time = time.strftime('%B %d %Y %H:%M:%S', config['ts']),
-                year = time.strftime('%Y', config['ts']),
-                version = config['version'],
-                path = os.getcwd(),
-                rdl_file = config['input_file'],
-                incdirs = '\n *  - '.join(config['search_paths']),
-                config = '\n *  - '.join(config['list_args']),
-                addrmap = self.name.upper(),
-                host = socket.gethostname()))
+            AddrMap.templ_dict['header'].render(
+                {**self.__get_generation_info(),
+                 'version': config['version'],
+                 'rdl_file': config['input_file'],
+                 'incdirs': '\n *  - '.join(config['search_paths']),
+                 'config': '\n *  - '.join(config['list_args']),
+                 'addrmap': self.name.upper()}))
 
         self.rtl_header.append(
-            AddrMap.templ_dict['module_declaration']['rtl'].format(
-                name = self.name,
-                import_package_list = ''.join(import_package_list),
-                resets = '\n'.join(reset_ports_rtl),
-                ports = '\n'.join(ports_rtl)))
+            AddrMap.templ_dict['module_declaration'].render(
+                {'name': self.name,
+                 'import_package_list': ''.join(import_package_list),
+                 'resets': '\n'.join(reset_ports_rtl),
+                 'ports': '\n'.join(ports_rtl)}))
 
         # Add description, if applicable
         self.rtl_header.append(self.get_description())
@@ -262,36 +230,538 @@ class AddrMap(Component):
         # Add endmodule keyword
         self.rtl_footer.append('endmodule')
 
+    def __has_read_port(self) -> bool:
+        """Return whether reads are served by a seperate port of the registers
+
+        Only the AXI4-Lite widget has seperate channels for reads and writes.
+        Adapters between the widget and the registers, memories, and regfile
+        modules only have a single port. If any of them is present, reads
+        and writes are arbitrated by the widget instead.
+        """
+        if self.config['bus'] != 'axi4lite':
+            return False
+
+        reasons = []
+
+        if self.config['pipeline_stages']:
+            reasons.append("pipeline stages between the widget and the registers")
+
+        if self.config['read_mux_stages']:
+            reasons.append("a pipelined read multiplexer")
+
+        nodes = list(AddrMap.__get_non_addrmap_descendants(self.obj))
+
+        if any(isinstance(x, node.MemNode) for x in nodes):
+            reasons.append("memories")
+
+        if self.config['regfiles'] == 'modules' and \
+                any(isinstance(x, node.RegfileNode) for x in self.obj.children()):
+            reasons.append("regfile modules")
+
+        reg_widths = [x.get_property('regwidth') for x in nodes if isinstance(x, node.RegNode)]
+
+        if self.config['bus_width'] and self.config['bus_width'] != max(reg_widths, default=0):
+            reasons.append("a bus that is wider than the registers")
+
+        if reasons:
+            self.logger.info(
+                "Reads and writes are not served concurrently because of %s",
+                ', '.join(reasons))
+
+            return False
+
+        return True
+
+    @staticmethod
+    def __get_non_addrmap_descendants(obj: node.Node):
+        for child in obj.children():
+            if isinstance(child, node.AddrmapNode):
+                continue
+
+            yield child
+
+            yield from AddrMap.__get_non_addrmap_descendants(child)
+
+    def __get_generation_info(self) -> dict:
+        if not self.config['reproducible']:
+            return {'user': getpass.getuser(),
+                    'time': time.strftime('%B %d %Y %H:%M:%S', self.config['ts']),
+                    'year': time.strftime('%Y', self.config['ts']),
+                    'path': os.getcwd(),
+                    'host': socket.gethostname()}
+
+        # Omit all information that differs between runs or machines. The
+        # time is only added if it was explicitly passed.
+        if self.config['source_date_epoch'] is None:
+            gen_time = '<omitted>'
+            year = time.strftime('%Y', self.config['ts'])
+        else:
+            ts = time.gmtime(self.config['source_date_epoch'])
+            gen_time = time.strftime('%B %d %Y %H:%M:%S UTC', ts)
+            year = time.strftime('%Y', ts)
+
+        return {'user': '<omitted>',
+                'time': gen_time,
+                'year': year,
+                'path': '<omitted>',
+                'host': '<omitted>'}
+
+    @staticmethod
+    def is_new_addrmap(child: node.AddrmapNode, addrmap_ids: dict, logger) -> bool:
+        """Check if a hierarchical addrmap must result in a new module
+
+        addrmap_ids holds the IDs of the addrmap types that were already
+        found in the scope of the parent and is updated by this method.
+        """
+        if child.type_name not in addrmap_ids:
+            logger.info("Found hierarchical addrmap of type '%s' " \
+                        ". Entering it...", child.type_name)
+
+            # Save unique ID of object to dictionary
+            addrmap_ids[child.type_name] = id(child.inst.original_def)
+
+            return True
+
+        if id(child.inst.original_def) == addrmap_ids[child.type_name]:
+            logger.info("Found another instance of addrmap '%s'. " \
+                        "Not rebuilding it...", child.type_name)
+
+            return False
+
+        logger.fatal("Found a redeclaration of addrmap '%s'. " \
+                     "This is not supported by srdl2sv because " \
+                     "the compiler will create a seperate SystemVerilog " \
+                     "module for every addrmap object.", child.type_name)
+
+        sys.exit(1)
+
+    def __get_regfile_module(self, obj: node.RegfileNode, glbl_settings: dict):
+        """Return the module that implements a regfile
+
+        If regfiles are not implemented as seperate modules or if the
+        regfile cannot be implemented as a seperate module, None is
+        returned. In that case, the regfile is inlined.
+        """
+        if self.config['regfiles'] != 'modules':
+            return None
+
+        if obj.type_name in self.regfile_module_ids:
+            if id(obj.inst.original_def) == self.regfile_module_ids[obj.type_name]:
+                self.logger.info("Found another instance of regfile '%s'. " \
+                                 "Reusing its module...", obj.type_name)
+
+                return self.regfile_modules[obj.type_name]
+
+            self.logger.info("Found a redeclaration of regfile '%s'. Regfile '%s' "\
+                             "will be inlined.", obj.type_name, obj.inst_name)
+
+            return None
+
+        if not RegFileModule.is_self_contained(obj):
+            self.logger.info("Regfile '%s' references nodes outside of the regfile "\
+                             "and will be inlined.", obj.inst_name)
+
+            return None
+
+        self.logger.info("Found regfile of type '%s'. Creating a module for it...",
+                         obj.type_name)
+
+        self.regfile_module_ids[obj.type_name] = id(obj.inst.original_def)
+        self.regfile_modules[obj.type_name] = RegFileModule(
+                                                obj=obj,
+                                                name=f"{self.name}__{obj.type_name}",
+                                                config=self.config,
+                                                glbl_settings=glbl_settings)
+
+        return self.regfile_modules[obj.type_name]
+
+    def iter_rtl(self):
+        yield from super().iter_rtl()
+
+        # Modules of regfiles are placed in the same file as the addrmap
+        for module in self.regfile_modules.values():
+            yield from module.iter_rtl()
+
+    @staticmethod
+    def get_addrmap_nodes(obj: node.AddrmapNode, logger) -> list:
+        """Return a list of all addrmaps that result in a module
+
+        The order of the list is the same as the order of get_addrmaps()
+        if all addrmaps are elaborated by the constructor of the top-level
+        addrmap.
+        """
+        addrmap_nodes = [obj]
+        addrmap_ids = {}
+
+        for child in obj.children():
+            if isinstance(child, node.AddrmapNode) and \
+                    AddrMap.is_new_addrmap(child, addrmap_ids, logger):
+                addrmap_nodes.extend(AddrMap.get_addrmap_nodes(child, logger))
+
+        return addrmap_nodes
+
     def __create_mux_string(self):
+        # With a read port, the responses to writes are multiplexed seperately
+        write_rsp_muxes = (False, True) if self.config['read_port'] else (False,)
+
+        for write_rsp in write_rsp_muxes:
+            if self.config['read_mux'] == 'tree':
+                self.__create_mux_tree(write_rsp)
+            else:
+                self.__create_flat_mux(write_rsp)
+
+        # Without a read port, reads are answered on the shared port
+        if not self.config['read_port']:
+            self.rtl_footer.append(
+                AddrMap.templ_dict['read_port_tie_off'].render(
+                    {'widget_if': 'widget_mux_if' if self.config['read_mux_stages'] \
+                        else 'widget_if'})
+                )
+
+    def __create_flat_mux(self, write_rsp: bool):
+        if write_rsp:
+            case_template = 'list_of_write_rsp_mux_cases'
+            default_template = 'default_write_rsp_mux_case'
+            mux_template = 'write_rsp_mux'
+        elif self.config['read_port']:
+            case_template = 'list_of_read_port_mux_cases'
+            default_template = 'default_read_port_mux_case'
+            mux_template = 'read_mux'
+        else:
+            case_template = 'list_of_mux_cases'
+            default_template = 'default_mux_case'
+            mux_template = 'read_mux'
+
         list_of_cases = []
 
         # Add an entry for each version of a register
-        for child in self.children.values():
-            for mux_entry_dim in child.create_mux_string():
-                # Data structure of mux_entry:
-                widget_if_r_data = ''.join([mux_entry_dim.mux_entry.data_wire, mux_entry_dim.dim])
-                widget_if_rdy = ''.join([mux_entry_dim.mux_entry.rdy_wire, mux_entry_dim.dim])
-                widget_if_err = ''.join([mux_entry_dim.mux_entry.err_wire, mux_entry_dim.dim])
-                active_wire = ''.join([mux_entry_dim.mux_entry.active_wire, mux_entry_dim.dim])
-
-                list_of_cases.append(
-                    AddrMap.templ_dict['list_of_mux_cases']['rtl'].format(
-                        active_wire = active_wire,
-                        widget_if_r_data = widget_if_r_data,
-                        widget_if_rdy = widget_if_rdy,
-                        widget_if_err = widget_if_err)
-                    )
+        for mux_entry_dim in self.__get_mux_entries(write_rsp):
+            # Data structure of mux_entry:
+            widget_if_r_data = ''.join([mux_entry_dim.mux_entry.data_wire or '', mux_entry_dim.dim])
+            widget_if_rdy = ''.join([mux_entry_dim.mux_entry.rdy_wire, mux_entry_dim.dim])
+            widget_if_err = ''.join([mux_entry_dim.mux_entry.err_wire, mux_entry_dim.dim])
+            active_wire = ''.join([mux_entry_dim.mux_entry.active_wire, mux_entry_dim.dim])
+
+            list_of_cases.append(
+                AddrMap.templ_dict[case_template].render(
+                    {'active_wire': active_wire,
+                     'widget_if_r_data': widget_if_r_data,
+                     'widget_if_rdy': widget_if_rdy,
+                     'widget_if_err': widget_if_err})
+                )
 
         # Define default case
-        list_of_cases.append(AddrMap.templ_dict['default_mux_case']['rtl'])
+        list_of_cases.append(AddrMap.templ_dict[default_template].render({}))
 
         self.rtl_footer.append(
             self._process_yaml(
-                AddrMap.templ_dict['read_mux'],
+                AddrMap.templ_dict[mux_template],
                 {'list_of_cases': '\n'.join(list_of_cases)}
             )
         )
 
+    def __get_mux_entries(self, write_rsp: bool = False) -> list:
+        """Return the inputs of the read multiplexer
+
+        If write_rsp is set, the inputs of the write response multiplexer are
+        returned instead. Entries that represent a whole array are replaced
+        by a single input that selects the active element of that array.
+        """
+        mux_entries = []
+
+        # Reads decode the address of the read port, if there is one
+        addr = 'widget_if.r_addr' if self.config['read_port'] and not write_rsp \
+            else 'widget_if.addr'
+
+        for child in self.children.values():
+            if write_rsp:
+                child_mux_entries = child.create_write_rsp_mux_string()
+            else:
+                child_mux_entries = child.create_mux_string()
+
+            for mux_entry_dim in child_mux_entries:
+                if mux_entry_dim.array_dimensions:
+                    mux_entry_dim = self.__create_array_mux(mux_entry_dim, addr)
+
+                mux_entries.append(mux_entry_dim)
+
+        return mux_entries
+
+    def __create_array_mux(self,
+                           mux_entry_dim: SWMuxEntryDimensioned,
+                           addr_wire: str) -> SWMuxEntryDimensioned:
+        """Create logic that selects the active element of a register array
+
+        Rather than adding an input to the read multiplexer for every
+        element of the array, the element is selected by its index. If all
+        strides are powers of 2, the index is taken from the address bits.
+        Otherwise, the elements are traversed by a loop in the RTL.
+        Entries of the write response multiplexer do not have data.
+        """
+        mux_entry = mux_entry_dim.mux_entry
+        dimensions = mux_entry_dim.array_dimensions
+        iterators = [chr(97+i) for i in range(len(dimensions))]
+
+        if mux_entry.data_wire is None:
+            indexed_template = 'write_rsp_mux_array_indexed'
+            loop_template = 'write_rsp_mux_array'
+        else:
+            indexed_template = 'read_mux_array_indexed'
+            loop_template = 'read_mux_array'
+
+        array_mux_entry = SWMuxEntry(
+            data_wire = f"{mux_entry.data_wire}_arr" if mux_entry.data_wire else None,
+            rdy_wire = f"{mux_entry.rdy_wire}_arr",
+            err_wire = f"{mux_entry.err_wire}_arr",
+            active_wire = f"{mux_entry.active_wire}_arr")
+
+        values = {
+            'data_w': self.get_regwidth() - 1,
+            'data_wire': mux_entry.data_wire,
+            'rdy_wire': mux_entry.rdy_wire,
+            'err_wire': mux_entry.err_wire,
+            'active_wire': mux_entry.active_wire,
+        }
+
+        index_bits = self.__get_array_index_bits(mux_entry_dim)
+
+        if index_bits is None:
+            self.rtl_footer.append(
+                AddrMap.templ_dict[loop_template].render(
+                    {**values,
+                     'idx': ''.join([f"[i_{x}]" for x in iterators]),
+                     'for_loops': '\n'.join(
+                         [AddrMap.templ_dict['read_mux_array_for'].render(
+                             {'iterator': f"i_{iterator}",
+                              'limit': limit})
+                          for iterator, limit in zip(iterators, dimensions)])
+                    }
+                )
+            )
+        else:
+            # The index bits are only taken from the address directly if adding
+            # the address of the first element does not carry into them.
+            # Otherwise, that address is subtracted first. If its bits below the
+            # index bits are 0, only the index bits must be subtracted.
+            addr = mux_entry_dim.array_address
+            msb = max(lsb + width for lsb, width in index_bits) - 1
+            shift = min((lsb for lsb, width in index_bits if width), default=0)
+
+            list_of_indices = []
+
+            if not addr % (1 << (msb + 1)):
+                offset = addr_wire
+                shift = 0
+            else:
+                offset = f"{mux_entry.active_wire}_offset"
+
+                if addr % (1 << shift):
+                    shift = 0
+
+                list_of_indices.append(
+                    AddrMap.templ_dict['read_mux_array_offset'].render(
+                        {'active_wire': mux_entry.active_wire,
+                         'offset_w': msb - shift,
+                         'addr': f"{addr_wire}[{msb}:{shift}]",
+                         'first_addr': f"{msb - shift + 1}'d"\
+                                       f"{(addr % (1 << (msb + 1))) >> shift}"}))
+
+            idx = []
+            idx_in_range = []
+
+            for iterator, limit, (lsb, width) in zip(iterators, dimensions, index_bits):
+                # An array with a single element is always accessed at index 0
+                if not width:
+                    idx.append('[0]')
+                    continue
+
+                list_of_indices.append(
+                    AddrMap.templ_dict['read_mux_array_index'].render(
+                        {'active_wire': mux_entry.active_wire,
+                         'iterator': iterator,
+                         'index_w': width - 1,
+                         'offset': offset,
+                         'msb': lsb + width - 1 - shift,
+                         'lsb': lsb - shift}))
+
+                idx.append(f"[{mux_entry.active_wire}_idx_{iterator}]")
+
+                # Indices beyond the array do not select any element
+                if limit != 1 << width:
+                    idx_in_range.append(f"{mux_entry.active_wire}_idx_{iterator} < {limit} && ")
+
+            self.rtl_footer.append(
+                AddrMap.templ_dict[indexed_template].render(
+                    {**values,
+                     'list_of_indices': '\n'.join(list_of_indices),
+                     'idx': ''.join(idx),
+                     'idx_in_range': ''.join(idx_in_range)
+                    }
+                )
+            )
+
+        return SWMuxEntryDimensioned(
+            mux_entry = array_mux_entry,
+            dim = '')
+
+    def __get_array_index_bits(self, mux_entry_dim: SWMuxEntryDimensioned) -> Optional[list]:
+        """Return the LSB and width of the index of every array dimension
+
+        The index of a dimension is a range of address bits if its stride is
+        a power of 2 and its range does not overlap with the index of any
+        other dimension. Otherwise, None is returned.
+        """
+        index_bits = []
+
+        for limit, stride in zip(mux_entry_dim.array_dimensions, mux_entry_dim.array_strides):
+            if stride & (stride - 1):
+                return None
+
+            index_bits.append((stride.bit_length() - 1, (limit - 1).bit_length()))
+
+        prev_msb = -1
+
+        for lsb, width in sorted(index_bits):
+            if lsb <= prev_msb:
+                return None
+
+            prev_msb = max(prev_msb, lsb + width - 1)
+
+        if prev_msb >= self.config['addrwidth']:
+            return None
+
+        return index_bits
+
+    def __create_mux_tree(self, write_rsp: bool):
+        """Create a read multiplexer that is a balanced OR-reduction tree
+
+        Every register contributes its data, rdy, and err signals, masked
+        with its active wire. Every level of the tree combines up to
+        MUX_TREE_RADIX inputs. If pipeline stages are requested, they are
+        spread evenly over the levels of the tree. If write_rsp is set, the
+        tree of the write response multiplexer is created, which has no data.
+        """
+        if write_rsp:
+            prefix = 'write_rsp_mux_tree'
+            mux = 'wr_mux'
+            signals = ('rdy', 'err', 'active')
+        else:
+            prefix = 'read_mux_tree'
+            mux = 'rd_mux'
+            signals = ('data', 'rdy', 'err', 'active')
+
+        leaves = []
+
+        for mux_entry_dim in self.__get_mux_entries(write_rsp):
+            leaves.append(
+                AddrMap.templ_dict[f"{prefix}_leaf"].render(
+                    {'idx': len(leaves),
+                     'active_wire': ''.join(
+                         [mux_entry_dim.mux_entry.active_wire, mux_entry_dim.dim]),
+                     'widget_if_r_data': ''.join(
+                         [mux_entry_dim.mux_entry.data_wire or '', mux_entry_dim.dim]),
+                     'widget_if_rdy': ''.join(
+                         [mux_entry_dim.mux_entry.rdy_wire, mux_entry_dim.dim]),
+                     'widget_if_err': ''.join(
+                         [mux_entry_dim.mux_entry.err_wire, mux_entry_dim.dim])})
+                )
+
+        stages = self.config['read_mux_stages']
+        data_w = self.get_regwidth() - 1
+
+        # A tree needs at least one input. If the addrmap does not contain
+        # any registers, a single input that is never active is used.
+        if not leaves:
+            leaves.append(
+                AddrMap.templ_dict[f"{prefix}_leaf"].render(
+                    {'idx': 0,
+                     'active_wire': "1'b0",
+                     'widget_if_r_data': "'0",
+                     'widget_if_rdy': "1'b0",
+                     'widget_if_err': "1'b0"})
+                )
+
+        self.rtl_footer.append(
+            AddrMap.templ_dict[f"{prefix}_leaves"].render(
+                {'data_w': data_w,
+                 'size': len(leaves),
+                 'list_of_leaves': '\n'.join(leaves)})
+            )
+
+        # Determine the number of levels. If more pipeline stages are
+        # requested than the tree has levels, levels with a single node are
+        # appended, so that the latency is always the requested number of stages.
+        depth = 0
+        size = len(leaves)
+
+        while size > 1:
+            size = math.ceil(size / AddrMap.MUX_TREE_RADIX)
+            depth += 1
+
+        levels = max(depth, stages)
+        pipelined_levels = {math.ceil(x * levels / stages) for x in range(1, stages + 1)}
+
+        size = len(leaves)
+
+        for level in range(1, levels + 1):
+            prev_size, size = size, math.ceil(size / AddrMap.MUX_TREE_RADIX)
+
+            if level in pipelined_levels:
+                node_template = 'read_mux_tree_node_ff'
+                level_template = 'read_mux_tree_level_ff'
+            else:
+                node_template = 'read_mux_tree_node_comb'
+                level_template = f"{prefix}_level_comb"
+
+            list_of_nodes = []
+
+            for idx in range(size):
+                inputs = range(
+                    idx * AddrMap.MUX_TREE_RADIX,
+                    min((idx + 1) * AddrMap.MUX_TREE_RADIX, prev_size))
+
+                for signal in signals:
+                    list_of_nodes.append(
+                        AddrMap.templ_dict[node_template].render(
+                            {'mux': mux,
+                             'level': level,
+                             'signal': signal,
+                             'idx': idx,
+                             'inputs': ' | '.join(
+                                 [f"{mux}_l{level-1}_{signal}[{x}]" for x in inputs])})
+                        )
+
+            self.rtl_footer.append(
+                AddrMap.templ_dict[level_template].render(
+                    {'level': level,
+                     'data_w': data_w,
+                     'size': size,
+                     'list_of_nodes': '\n'.join(list_of_nodes)})
+                )
+
+        if stages:
+            self.rtl_footer.append(
+                AddrMap.templ_dict['read_mux_tree_request_rdy'].render(
+                    {'list_of_rdys': ' || '.join(
+                        [f"rd_mux_l0_rdy[{x}]" for x in range(len(leaves))])})
+                )
+
+            self.rtl_footer.append(
+                AddrMap.templ_dict['read_mux_tree_output_pipelined'].render(
+                    {'level': levels,
+                     'stages': stages,
+                     'cnt_w': stages.bit_length() - 1})
+                )
+        elif write_rsp:
+            self.rtl_footer.append(
+                AddrMap.templ_dict['write_rsp_mux_tree_output'].render({'level': levels}))
+        elif self.config['read_port']:
+            self.rtl_footer.append(
+                AddrMap.templ_dict['read_port_mux_tree_output'].render({'level': levels}))
+        else:
+            self.rtl_footer.append(
+                AddrMap.templ_dict['read_mux_tree_output'].render({'level': levels}))
+
     def __add_signal_instantiation(self):
         dict_list = list(self.get_signals(True).items())
         signal_width = max(max([len(value.datatype) for (_, value) in dict_list]), 12)
@@ -301,32 +771,82 @@ class AddrMap(Component):
             *self.rtl_header,
             '',
             '// Internal signals',
-            *[AddrMap.templ_dict['signal_declaration'].format(
-                name = key,
-                type = value.datatype,
-                signal_width = signal_width,
-                name_width = name_width,
-                unpacked_dim = '[{}]'.format(
-                    ']['.join(
-                        [str(y) for y in value.dim]))
-                    if value.dim else '')
+            *[AddrMap.templ_dict['signal_declaration'].render(
+                {'name': key,
+                 'type': value.datatype,
+                 'signal_width': signal_width,
+                 'name_width': name_width,
+                 'unpacked_dim': '[{}]'.format(
+                     ']['.join(
+                         [str(y) for y in value.dim]))
+                     if value.dim else ''})
                 for (key, value) in dict_list],
             ''
             ]
 
     def __get_widget_ports_rtl(self):
-        self.widget_templ_dict = yaml.load(
-            pkg_resources.read_text(widgets, f"srdl2sv_{self.config['bus']}.yaml"),
-            Loader=yaml.FullLoader)
-
-        return self._process_yaml(
-            self.widget_templ_dict['module_instantiation'],
-            {'bus_width': self.get_regwidth(),
-             'no_byte_enable': 1 if self.config['no_byte_enable'] else 0,
-             'addr_width': self.config['addrwidth'],
-             'bus_width_byte': int(self.get_regwidth() / 8),
-            }
-        )
+        self.widget_templ_dict = load_templates(widgets, f"srdl2sv_{self.config['bus']}.yaml")
+
+        reg_width = self.get_regwidth()
+        bus_width = self.config['bus_width'] or reg_width
+        stages = self.config['pipeline_stages']
+
+        if bus_width < reg_width:
+            self.logger.fatal(
+                "The bus width of %i bit must not be smaller than the widest "\
+                "register of %i bit.", bus_width, reg_width)
+
+            sys.exit(1)
+
+        upsizer = bus_width != reg_width
+
+        # With a pipelined read multiplexer, the chain ends in an interface
+        # that only passes on an access until the registers are ready
+        read_mux_stages = self.config['read_mux_stages']
+        regs_if = 'widget_mux_if' if read_mux_stages else 'widget_if'
+
+        # Chain of interfaces from the widget to the registers. Every
+        # adapter declares the interface on the side of the registers.
+        values = {
+            'bus_width': bus_width,
+            'reg_width': reg_width,
+            'no_byte_enable': 1 if self.config['no_byte_enable'] else 0,
+            'addr_width': self.config['addrwidth'],
+            'bus_width_byte': int(bus_width / 8),
+            'axi_outstanding': self.config['axi_outstanding'],
+            'axi_skid_buffers': 1 if self.config['axi_skid_buffers'] else 0,
+            'widget_if': 'widget_bus_if' if upsizer or stages else regs_if,
+            'upsizer_widget_if': 'widget_lane_if' if stages else regs_if,
+            'pipeline_bus_if': 'widget_lane_if' if upsizer else 'widget_bus_if',
+            'regs_if': regs_if,
+            'stages': stages,
+            'read_mux_stages': read_mux_stages,
+            'read_port': 1 if self.config['read_port'] else 0,
+        }
+
+        widget_rtl = [
+            self._process_yaml(
+                self.widget_templ_dict['module_instantiation'],
+                values
+            )
+        ]
+
+        # Split accesses of a wide bus into accesses to the registers
+        if upsizer:
+            widget_rtl.append(
+                self._process_yaml(AddrMap.templ_dict['widget_if_upsizer'], values))
+
+        # Register slices between the widget and the registers
+        if stages:
+            widget_rtl.append(
+                self._process_yaml(AddrMap.templ_dict['widget_if_pipeline'], values))
+
+        # Hide accesses from the registers while they are in the read multiplexer
+        if read_mux_stages:
+            widget_rtl.append(
+                self._process_yaml(AddrMap.templ_dict['widget_if_mux_request'], values))
+
+        return '\n'.join(widget_rtl)
 
 
     def __append_genvars(self):
@@ -354,6 +874,7 @@ class AddrMap(Component):
 
         return names
 
+    @profile.timed('AddrMap.get_package_rtl', 'AddrMap')
     def get_package_rtl(self, tab_width: int = 4, real_tabs = False) -> dict():
         if not self.config['enums']:
             return {}
@@ -397,21 +918,21 @@ class AddrMap(Component):
                         sys.exit(1)
 
                     variable_list.append(
-                        AddrMap.templ_dict['enum_var_list_item']['rtl'].format(
-                            value = var[1],
-                            width = value.width,
-                            max_name_width = max_name_width,
-                            name = var[0]))
+                        AddrMap.templ_dict['enum_var_list_item'].render(
+                            {'value': var[1],
+                             'width': value.width,
+                             'max_name_width': max_name_width,
+                             'name': var[0]}))
 
                 enum_rtl[self.name].append(
-                    AddrMap.templ_dict['enum_declaration']['rtl'].format(
-                        width=value.width-1,
-                        name = key,
-                        enum_var_list = ',\n'.join(variable_list)))
+                    AddrMap.templ_dict['enum_declaration'].render(
+                        {'width': value.width-1,
+                         'name': key,
+                         'enum_var_list': ',\n'.join(variable_list)}))
 
 
-        # Invoke get_package_rtl method from regfiles
-        for regfile in self.regfiles.values():
+        # Invoke get_package_rtl method from regfiles and the modules of regfiles
+        for regfile in [*self.regfiles.values(), *self.regfile_modules.values()]:
             for key, value in regfile.get_package_rtl().items():
                 if key in enum_rtl:
                     enum_rtl[key] = [*enum_rtl[key], *value]
@@ -425,9 +946,9 @@ class AddrMap(Component):
                 continue
 
             package_rtl =\
-                AddrMap.templ_dict['package_declaration']['rtl'].format(
-                    name = key,
-                    pkg_content = '\n\n'.join(value))
+                AddrMap.templ_dict['package_declaration'].render(
+                    {'name': key,
+                     'pkg_content': '\n\n'.join(value)})
 
 
             rtl_return[key] = AddrMap.add_tabs(
@@ -0,0 +1,183 @@
+import importlib.resources as pkg_resources
+import functools
+import string
+from collections.abc import Mapping
+from typing import Callable, NamedTuple, Optional
+import yaml
+
+# The C implementation of the loader is much faster, but it is only
+# available if PyYAML was built against libyaml
+YamlLoader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+# Signature of a precompiled format string: it takes the dictionary of
+# values that would otherwise be passed to str.format(**values)
+RenderFunction = Callable[[dict], str]
+
+class SignalTemplate(NamedTuple):
+    name: RenderFunction
+    signal_type: RenderFunction
+    no_unpacked: bool
+
+class PortTemplate(NamedTuple):
+    name: RenderFunction
+    signal_type: RenderFunction
+    group: Optional[RenderFunction]
+    no_unpacked: bool
+
+class UnsupportedFormat(Exception):
+    pass
+
+class CompiledTemplate():
+    """Precompiled version of a single entry in a YAML template
+
+    The 'rtl' text of the entry is turned into a Python function and all
+    'signals', 'input_ports', and 'output_ports' are pre-split, so that
+    rendering an entry does not require any dictionary lookups in the
+    YAML object anymore.
+    """
+
+    def __init__(self, name: str, yaml_obj):
+        self.name = name
+
+        # Some entries are defined as plain strings, rather than as a
+        # dictionary with an 'rtl' key.
+        if not isinstance(yaml_obj, dict):
+            yaml_obj = {'rtl': yaml_obj}
+
+        self.render = compile_format(yaml_obj.get('rtl') or '', name)
+
+        self.signals = tuple(
+            SignalTemplate(
+                name = compile_format(signal['name'], name),
+                signal_type = compile_format(signal['signal_type'], name),
+                no_unpacked = bool(signal.get('no_unpacked', False)))
+            for signal in yaml_obj.get('signals') or [])
+
+        self.input_ports = CompiledTemplate.__compile_ports(
+            yaml_obj.get('input_ports'), name)
+        self.output_ports = CompiledTemplate.__compile_ports(
+            yaml_obj.get('output_ports'), name)
+
+    @staticmethod
+    def __compile_ports(ports, name: str) -> tuple:
+        return tuple(
+            PortTemplate(
+                name = compile_format(port['name'], name),
+                signal_type = compile_format(port['signal_type'], name),
+                group = compile_format(port['group'], name) if 'group' in port else None,
+                no_unpacked = bool(port.get('no_unpacked', False)))
+            for port in ports or [])
+
+def compile_format(fmt: str, name: str = 'template') -> RenderFunction:
+    """Turn a str.format()-style string into a function that takes a
+    dictionary with values and returns the formatted string.
+
+    The function is generated as a chain of (f-)string literals, so that
+    rendering does not have to parse the format string again. Format strings
+    that use features beyond simple, named replacement fields fall back to
+    str.format().
+    """
+    try:
+        expression = _format_expression(fmt)
+    except UnsupportedFormat:
+        return lambda values: fmt.format(**values)
+
+    namespace = {}
+
+    exec(compile(
+            f"def render(values):\n    return {expression}\n",
+            f"<template '{name}'>",
+            'exec'),
+         namespace)
+
+    return namespace['render']
+
+def _format_expression(fmt: str) -> str:
+    parts = []
+
+    for literal, field_name, format_spec, conversion in string.Formatter().parse(fmt):
+        if literal:
+            parts.append(repr(literal))
+
+        if field_name is not None:
+            parts.append(''.join([
+                'f"{',
+                _value_expression(field_name),
+                f"!{conversion}" if conversion else '',
+                f":{_spec_expression(format_spec)}" if format_spec else '',
+                '}"']))
+
+    if not parts:
+        return "''"
+
+    return f"({' '.join(parts)})"
+
+def _value_expression(field_name: str) -> str:
+    # Only support named fields, not positional fields, attributes, or indices
+    if not field_name.isidentifier():
+        raise UnsupportedFormat
+
+    return f"values[{field_name!r}]"
+
+def _spec_expression(format_spec: str) -> str:
+    spec = []
+
+    for literal, field_name, nested_spec, conversion in string.Formatter().parse(format_spec):
+        if any(char in literal for char in '{}\'"\\\n'):
+            raise UnsupportedFormat
+
+        spec.append(literal)
+
+        if field_name is not None:
+            if nested_spec or conversion:
+                raise UnsupportedFormat
+
+            spec.append(f"{{{_value_expression(field_name)}}}")
+
+    return ''.join(spec)
+
+class TemplateDict(Mapping):
+    """Read-only dictionary with the precompiled entries of a YAML template
+
+    The YAML file is only parsed when the first entry is accessed and every
+    entry is only compiled when it is accessed for the first time. Hence,
+    templates do not add to the startup time and entries that are never
+    used are never compiled.
+    """
+
+    def __init__(self, package, file_name: str):
+        self.package = package
+        self.file_name = file_name
+
+        self.__yaml_dict = None
+        self.__compiled = {}
+
+    def __getitem__(self, name: str) -> CompiledTemplate:
+        try:
+            return self.__compiled[name]
+        except KeyError:
+            pass
+
+        compiled = CompiledTemplate(name, self.__get_yaml_dict()[name])
+        self.__compiled[name] = compiled
+
+        return compiled
+
+    def __iter__(self):
+        return iter(self.__get_yaml_dict())
+
+    def __len__(self) -> int:
+        return len(self.__get_yaml_dict())
+
+    def __get_yaml_dict(self) -> dict:
+        if self.__yaml_dict is None:
+            self.__yaml_dict = yaml.load(
+                pkg_resources.read_text(self.package, self.file_name),
+                Loader=YamlLoader)
+
+        return self.__yaml_dict
+
+@functools.lru_cache(maxsize=None)
+def load_templates(package, file_name: str) -> TemplateDict:
+    """Return the (lazily loaded) precompiled entries of a YAML template file"""
+    return TemplateDict(package, file_name)
@@ -1,5 +1,6 @@
 import re
 import math
+import logging
 import sys
 from typing import NamedTuple, Optional
 from dataclasses import dataclass
@@ -8,7 +9,9 @@ from enum import Enum
 from systemrdl import node
 
 # Local modules
-from srdl2sv.log.log import create_logger
+from srdl2sv.log.log import create_logger, get_effective_log_level
+from srdl2sv.components.compiled_template import CompiledTemplate
+from srdl2sv.profile import profile
 
 # Define NamedTuple
 class TypeDef(NamedTuple):
@@ -18,7 +21,8 @@ class TypeDef(NamedTuple):
 
 @dataclass
 class SWMuxEntry:
-    data_wire: str
+    # Entries of the write response multiplexer do not have a data wire
+    data_wire: Optional[str]
     rdy_wire: str
     err_wire: str
     active_wire: str
@@ -27,6 +31,11 @@ class SWMuxEntry:
 class SWMuxEntryDimensioned():
     mux_entry: SWMuxEntry
     dim: str
+    # Set if the entry represents all elements of an array at once. The
+    # strides and the address of the first element locate the elements.
+    array_dimensions: Optional[list] = None
+    array_strides: Optional[list] = None
+    array_address: Optional[int] = None
 
 class SignalType(NamedTuple):
     datatype: str
@@ -37,7 +46,31 @@ class PortType(NamedTuple):
     dim: list
     direction: str # String "input" or "output"
 
+class Collection(NamedTuple):
+    ports: dict    # Dictionary with a dictionary of PortTypes per group
+    signals: dict  # Dictionary of SignalTypes
+    typedefs: dict # Dictionary of TypeDefs
+    resets: set    # Names of the reset signals
+
+class DecodeRegion(NamedTuple):
+    sel: str       # Select wire of the region, including genvars
+    addr_bits: int # Number of address LSBs that are decoded within the region
+    r_sel: Optional[str] = None # Select wire of the region for the read port
+
 class Component():
+    # Fields are by far the most numerous components. Hence, all attributes
+    # that are set by this class are slots, so that fields, which declare
+    # slots as well, do not need an instance dictionary. Other components
+    # do not declare slots and thus still have one.
+    __slots__ = (
+        'rtl_header', 'rtl_footer', 'children', 'typedefs', 'ports', 'resets',
+        'signals', 'field_type', 'obj', 'name', 'config', 'owning_addrmap',
+        'full_path', 'path', 'path_underscored', 'path_underscored_wo_field',
+        'sel_arr', 'total_array_dimensions', 'own_array_dimensions',
+        'parents_depths', 'own_depth', 'own_dimensions', 'total_dimensions',
+        'total_stride', 'properties', 'genvars_str', '_logger', 'log_level',
+    )
+
     def __init__(
             self,
             obj,
@@ -60,12 +93,14 @@ class Component():
         # Save name
         self.name = obj.inst_name
 
+        # Save config. The configuration is shared by all components and
+        # must thus not be changed. Components that need a different
+        # configuration (e.g., registers) create their own copy.
+        self.config = config
+
         # Create path
         self.create_underscored_path()
 
-        # Save config
-        self.config = config.copy()
-
         # Generate all variables that have anything to do with dimensions or strides
         self.__init_dimensions(parents_dimensions)
         self.__init_strides(parents_strides)
@@ -73,9 +108,16 @@ class Component():
         # Save and/or process important variables
         self.__init_variables()
 
-        # Create logger object
-        self.__create_logger(self.full_path, config)
-        self.logger.info("Starting to process %s '%s'", self.__class__.__name__, obj.inst_name)
+        # The logger object is only created when it is used for the first
+        # time. Save the minimum level of messages that will be logged, so
+        # that it can be checked without creating a logger.
+        self._logger = None
+        self.log_level = get_effective_log_level(
+            config['stdout_log_level'], config['file_log_level'])
+
+        if self.is_log_enabled_for(logging.INFO):
+            self.logger.info("Starting to process %s '%s'",
+                             self.__class__.__name__, obj.inst_name)
 
     def __init_variables(self):
         # By default, registers and fields are not interrupt registers
@@ -93,26 +135,35 @@ class Component():
         self.genvars_str = ''
 
 
-    def __create_logger(self, name: str, config: dict):
-        self.logger = create_logger(
-            name,
-            stdout_log_level=config['stdout_log_level'],
-            file_log_level=config['file_log_level'],
-            file_name=config['file_log_location'])
-        self.logger.propagate = False
+    @property
+    def logger(self):
+        if self._logger is None:
+            self._logger = create_logger(
+                self.full_path,
+                stdout_log_level=self.config['stdout_log_level'],
+                file_log_level=self.config['file_log_level'],
+                file_name=self.config['file_log_location'])
+            self._logger.propagate = False
+
+        return self._logger
+
+    def is_log_enabled_for(self, level: int) -> bool:
+        """Equivalent of logging.Logger.isEnabledFor() that does not
+        require the logger to be created"""
+        return level >= self.log_level
 
     def __init_dimensions(self, parents_dimensions):
         # Determine dimensions of register
         self.sel_arr = 'single'
-        self.total_array_dimensions = parents_dimensions if parents_dimensions else []
-        self.own_array_dimensions = []
+        self.total_array_dimensions = tuple(parents_dimensions) if parents_dimensions else ()
+        self.own_array_dimensions = ()
 
         try:
             if self.obj.is_array:
                 self.sel_arr = 'array'
-                self.total_array_dimensions = [*self.total_array_dimensions,
-                                               *self.obj.array_dimensions]
-                self.own_array_dimensions = self.obj.array_dimensions
+                self.total_array_dimensions = (*self.total_array_dimensions,
+                                               *self.obj.array_dimensions)
+                self.own_array_dimensions = tuple(self.obj.array_dimensions)
         except AttributeError:
             pass
 
@@ -125,18 +176,18 @@ class Component():
         self.total_dimensions = len(self.total_array_dimensions)
 
     def __init_strides(self, parents_strides):
-        self.total_stride = parents_strides if parents_strides else []
+        self.total_stride = tuple(parents_strides) if parents_strides else ()
 
         try:
             if self.obj.is_array:
                 # Merge parent's stride with stride of this regfile. Before doing so, the
                 # respective stride of the different dimensions shall be calculated
-                self.total_stride = [
+                self.total_stride = (
                     *self.total_stride,
                     *[math.prod(self.own_array_dimensions[i+1:])
                         *self.obj.array_stride
                             for i, _ in enumerate(self.own_array_dimensions)]
-                    ]
+                    )
         except AttributeError:
             # Not all Nodes can be an array. In that case, just take the parent's stride
             pass
@@ -146,78 +197,195 @@ class Component():
         genvars = [f"[gv_{chr(97+i)}]" for i in range(self.total_dimensions)]
         self.genvars_str = ''.join(genvars)
 
-    def get_resets(self):
-        self.logger.debug("Return reset list")
+    def collect(self) -> Collection:
+        """Collect the ports, signals, typedefs, and resets of the component tree
 
-        for child in self.children.values():
-            self.resets |= child.get_resets()
+        The tree is walked once, in the same order as the RTL is generated
+        (i.e., a component before its children), and every entry is added
+        to a single dictionary or set. If an entry is found multiple times,
+        it keeps its first position and gets the last value.
+        """
+        if self.is_log_enabled_for(logging.DEBUG):
+            self.logger.debug("Collect ports, signals, typedefs, and resets")
 
-        return self.resets
+        collection = Collection(ports={}, signals={}, typedefs={}, resets=set())
+        stack = [self]
 
-    def get_ports(self):
-        self.logger.debug("Return port list")
+        while stack:
+            component = stack.pop()
 
-        for child in self.children.values():
-            for key, value in child.get_ports().items():
-                if key in self.ports:
-                    self.logger.debug("Group '%s' already present in port list")
-                    self.ports[key] |= value
-                else:
-                    self.logger.debug("Adding group '%s' to port list")
-                    self.ports |= {key: value}
+            for group, ports in component.ports.items():
+                collection.ports.setdefault(group, {}).update(ports)
+
+            collection.signals.update(component.signals)
+            collection.typedefs.update(component.typedefs)
+            collection.resets.update(component.resets)
+
+            stack.extend(reversed(component.children.values()))
+
+        return collection
 
-        return self.ports
+    def get_resets(self) -> set:
+        return self.collect().resets
+
+    def get_ports(self) -> dict:
+        return self.collect().ports
 
     def get_max_dim_depth(self) -> int:
-        self.logger.debug("Return depth '%s' for dimensions (including parents) '%s'.",
-                          self.total_dimensions,
-                          self.total_array_dimensions)
+        if self.is_log_enabled_for(logging.DEBUG):
+            self.logger.debug("Return depth '%s' for dimensions (including parents) '%s'.",
+                              self.total_dimensions,
+                              self.total_array_dimensions)
 
         return max([
             self.total_dimensions,
             *[x.get_max_dim_depth() for x in self.children.values()]
             ])
 
-    def get_signals(self, no_children = False):
-        self.logger.debug("Return signal list")
+    def get_flop_count(self) -> tuple:
+        """Return the number of clock gated flops and the total number
+        of flops of all fields below the component"""
+        counts = [x.get_flop_count() for x in self.children.values()]
 
-        if not no_children:
-            for child in self.children.values():
-                self.signals |= child.get_signals()
+        return (sum(x[0] for x in counts), sum(x[1] for x in counts))
 
-        return self.signals
+    def get_signals(self, no_children = False) -> dict:
+        if no_children:
+            return self.signals
 
-    def get_typedefs(self):
-        self.logger.debug("Return typedef list")
+        return self.collect().signals
 
-        for child in self.children.values():
-            self.typedefs |= child.get_typedefs()
+    def get_typedefs(self) -> dict:
+        return self.collect().typedefs
 
-        return self.typedefs
+    def _get_ports_rtl(self, port_templ: CompiledTemplate, ports: Optional[dict] = None) -> list:
+        """Return the declarations of all ports of this component
 
-    def get_rtl(self, tab_width: int = 0, real_tabs: bool = False) -> str:
-        self.logger.debug("Return RTL")
+        The ports are grouped and every group is preceded by a comment. The
+        comma of the last port is removed. If no ports are passed, the ports
+        of this component and all its children are declared.
+        """
+        ports_rtl = []
 
-        # Loop through children and append RTL
-        rtl_children = []
+        # Prefetch dictionaries in local array
+        port_dict_list = (ports if ports is not None else self.get_ports()).items()
 
-        for child in self.children.values():
-            rtl_children.append(child.get_rtl())
+        for group, ports in port_dict_list:
+            ports_rtl.append(f"// Ports for '{group}'")
 
-        # Concatenate header, main, and footer
-        rtl = [*self.rtl_header, *rtl_children, *self.rtl_footer]
+            # Determine widths for this group
+            signal_width = max(
+                max([len(value.datatype) for (_, value) in ports.items()]), 12)
 
+            name_width  = max([len(key) for (key, _) in ports.items()])
+
+            # Generate RTL
+            for (key, port_type) in ports.items():
+                # TODO: Think about a better way to handle datatypes. Simply replacing them
+                #       is not the most efficient way of handling it.
+                signal_type = port_type.datatype.replace('logic', '').strip()
+
+                if self.config['unpacked_arrays'] and port_type.dim:
+                    unpacked_dim = f"[{']['.join([str(y) for y in port_type.dim])}]"
+                elif port_type.dim:
+                    unpacked_dim = ''
+                    signal_type = ''.join([
+                        f"[{':0]['.join([str(y-1) for y in port_type.dim])}:0]",
+                        signal_type
+                        ])
+                else:
+                    unpacked_dim = ''
+
+                ports_rtl.append(
+                    port_templ.render(
+                        {'name': key,
+                         'direction': port_type.direction,
+                         'signal_type': signal_type,
+                         'signal_width': signal_width,
+                         'name_width': name_width,
+                         'unpacked_dim': unpacked_dim,
+                        }
+                    )
+                )
+
+            # Append a new line after every port
+            ports_rtl.append('')
+
+        # Remove last newline
+        # Remove comma from last port entry
+        ports_rtl.pop()
+        ports_rtl[-1] = ports_rtl[-1].rstrip(',')
+
+        return ports_rtl
+
+    def get_rtl(self, tab_width: int = 0, real_tabs: bool = False) -> str:
         # Join lists and return string
         if tab_width > 0:
-            return Component.add_tabs(
-                        '\n'.join(rtl),
-                        tab_width,
-                        real_tabs)
+            return '\n'.join(
+                Component.indent_lines(self.iter_rtl(), tab_width, real_tabs))
+
+        return '\n'.join(self.iter_rtl())
+
+    def write_rtl(self, fileobj, tab_width: int = 0, real_tabs: bool = False):
+        """Write the RTL of this component and all its children to a file
+
+        Contrary to get_rtl(), the RTL is never joined into a single string.
+        Every chunk of RTL is indented and written to the file as soon as it
+        is generated.
+        """
+        rtl = profile.timed_iter(self.iter_rtl(), 'iter_rtl')
+
+        if tab_width > 0:
+            rtl = profile.timed_iter(
+                Component.indent_lines(rtl, tab_width, real_tabs), 'indent_lines')
+
+        fileobj.writelines(f"{line}\n" for line in rtl)
+
+    def iter_rtl(self):
+        """Generator that yields the (non-indented) RTL of this component
+
+        Every yielded chunk corresponds to one line in the original
+        header-children-footer list, so that joining all chunks with
+        newlines results in the complete RTL of the component.
+        """
+        if self.is_log_enabled_for(logging.DEBUG):
+            self.logger.debug("Return RTL")
 
-        return '\n'.join(rtl)
+        if not (self.rtl_header or self.children or self.rtl_footer):
+            # An empty component still results in an empty line
+            yield ''
+            return
+
+        yield from self.rtl_header
+
+        # Loop through children and yield their RTL
+        for child in self.children.values():
+            yield from child.iter_rtl()
+
+        yield from self.rtl_footer
+
+    # Keywords that increment or decrement the indentation level. The
+    # lookahead lets the regex engine skip quickly over characters that
+    # cannot start a keyword.
+    indent_trigger_re = re.compile(r"""
+        (?=[bce{}<])(?:
+            (?P<open>\bbegin\b|\{|\bcase\b|<<INDENT>>)|
+            (?P<close>\bend(?:case)?\b|}|<<UNINDENT>>)
+        )""", flags=re.VERBOSE)
 
     @staticmethod
     def add_tabs(rtl: str, tab_width: int = 4, real_tabs = False) -> str:
+        return '\n'.join(Component.indent_lines((rtl,), tab_width, real_tabs))
+
+    @staticmethod
+    def indent_lines(rtl_chunks, tab_width: int = 4, real_tabs = False):
+        """Generator that indents RTL line by line
+
+        rtl_chunks is an iterable of strings that may each contain multiple
+        lines. The generator yields every line, without newline, prefixed
+        with the correct indentation. Lines that only contain an indentation
+        marker (<<INDENT>>, <<UNINDENT>>, or <<SQUASH_NEWLINE>>) are dropped.
+        """
         indent_lvl = 0
         indent_lvl_next = 0
 
@@ -225,46 +393,38 @@ class Component():
         tab = "\t" if real_tabs else " "
         tab = tab_width * tab
 
-        # Define triggers for which the indentation level will increment or
-        # decrement on the next line
-        trigger_re = re.compile(r"""
-            .*?(?P<keyword>
-                (?:\bbegin\b|\{|\bcase\b|<<INDENT>>)|
-                (?:\bend\b|}|\bendcase\b|<<UNINDENT>>)
-            )(?P<remainder>[^$]*)
-            """, flags=re.VERBOSE)
-
-        rtl_indented = []
-
-        # Go through RTL, line by line
-        for line in rtl.split('\n', -1):
-            line_split = line
-
-            # This is done because the increment of the indent level must
-            # be delayed one cycle
-            indent_lvl = indent_lvl_next
-
-            while 1:
-                # Check if indentation must be decremented
-                if match_obj := trigger_re.match(line_split):
-                    if match_obj.group('keyword') in ('begin', '{', 'case', '<<INDENT>>'):
-                        indent_lvl_next += 1
-                    else:
-                        indent_lvl = indent_lvl_next - 1
-                        indent_lvl_next -= 1
-
-                    line_split = match_obj.group('remainder')
-
-                    if not line_split:
-                        break
-                else:
-                    break
+        search = Component.indent_trigger_re.search
+        markers = ("<<INDENT>>", "<<UNINDENT>>", "<<SQUASH_NEWLINE>>")
+
+        for chunk in rtl_chunks:
+            for line in chunk.split('\n'):
+                # This is done because the increment of the indent level must
+                # be delayed one line
+                indent_lvl = indent_lvl_next
 
-            # Add tabs
-            if line.strip() not in ("<<INDENT>>", "<<UNINDENT>>", "<<SQUASH_NEWLINE>>"):
-                rtl_indented.append(f"{tab*indent_lvl}{line}")
+                if match_obj := search(line):
+                    # Only the part of the line up to the first '$' after
+                    # the first keyword is considered for further keywords.
+                    # This mimics the behavior of the original indenter.
+                    if (endpos := line.find('$', match_obj.end())) < 0:
+                        endpos = len(line)
 
-        return '\n'.join(rtl_indented)
+                    while match_obj:
+                        if match_obj.lastgroup == 'open':
+                            indent_lvl_next += 1
+                        else:
+                            indent_lvl_next -= 1
+                            indent_lvl = indent_lvl_next
+
+                        match_obj = search(line, match_obj.end(), endpos)
+
+                    if line.strip() in markers:
+                        continue
+                elif line.strip() == "<<SQUASH_NEWLINE>>":
+                    continue
+
+                # Add tabs
+                yield f"{tab*indent_lvl}{line}" if indent_lvl > 0 else line
 
     @staticmethod
     def __get_underscored_path(path: str, owning_addrmap: str):
@@ -279,6 +439,28 @@ class Component():
         new_path = re_dimensions.sub('', path)
         return (new_path, ''.join(re_dimensions.findall(path)))
 
+    @staticmethod
+    def get_signal_path(obj, scope: Optional[str] = None) -> tuple:
+        """Return the underscored path of a node and its dimensions
+
+        If a scope is passed (i.e., the path of the regfile a module is
+        generated for), the path of nodes within that scope is relative
+        to the scope.
+        """
+        if scope:
+            segments = obj.get_path_segments()
+            depth = scope.count('.') + 1
+
+            if '.'.join(Component.__split_dimensions(x)[0] for x in segments[:depth]) == scope:
+                return Component.__split_dimensions(
+                    '__'.join(segments[depth:]).replace('[]', ''))
+
+        return Component.__split_dimensions(
+            Component.__get_underscored_path(
+                obj.get_path(),
+                obj.owning_addrmap.inst_name)
+            )
+
     def get_signal_name(self, obj):
         name = []
 
@@ -287,11 +469,7 @@ class Component():
         except AttributeError:
             child_obj = obj
 
-        split_name = self.__split_dimensions(
-            self.__get_underscored_path(
-                child_obj.get_path(),
-                child_obj.owning_addrmap.inst_name)
-            )
+        split_name = Component.get_signal_path(child_obj, self.config.get('scope'))
 
         name.append(split_name[0])
 
@@ -326,119 +504,63 @@ class Component():
         return ''.join(name)
 
     def _process_yaml(self,
-                     yaml_obj,
-                     values: dict = {},
+                     templ: CompiledTemplate,
+                     values: Optional[dict] = None,
                      skip_signals: bool = False,
                      skip_inputs: bool = False,
                      skip_outputs: bool = False):
-        try:
-            if skip_signals:
-                raise KeyError
-
-            for signal in yaml_obj['signals']:
-                try:
-                    array_dimensions = [] if signal['no_unpacked'] \
-                                                else self.total_array_dimensions
-                except KeyError:
-                    array_dimensions = self.total_array_dimensions
+        if values is None:
+            values = {}
 
-                self.signals[signal['name'].format(**values)] =\
+        if not skip_signals:
+            for signal in templ.signals:
+                self.signals[signal.name(values)] =\
                         SignalType (
-                            datatype = signal['signal_type'].format(**values),
-                            dim = array_dimensions,
+                            datatype = signal.signal_type(values),
+                            dim = () if signal.no_unpacked else self.total_array_dimensions,
                         )
-        except (TypeError, KeyError):
-            pass
 
-        try:
-            if skip_inputs:
-                raise KeyError
-
-            for input_p in yaml_obj['input_ports']:
-                try:
-                    array_dimensions = [] if input_p['no_unpacked'] \
-                                                else self.total_array_dimensions
-                except KeyError:
-                    array_dimensions = self.total_array_dimensions
-
-                try:
-                    group = input_p['group'].format(**values)
-                except KeyError:
-                    group = self.path_underscored_wo_field
-
-                name = input_p['name'].format(**values)
-
-                if group not in self.ports:
-                    self.ports[group] = {
-                        name:
-                        PortType (
-                            datatype = input_p['signal_type'].format(**values),
-                            dim = array_dimensions,
-                            direction = "input",
-                        )
-                    }
-                elif name not in self.ports[group]:
-                    self.ports[group][name] =\
-                        PortType (
-                            datatype = input_p['signal_type'].format(**values),
-                            dim = array_dimensions,
-                            direction = "input",
-                        )
-        except (TypeError, KeyError):
-            pass
+        if not skip_inputs:
+            self.__add_ports(templ.input_ports, values, "input")
 
-        try:
-            if skip_outputs:
-                raise KeyError
-
-            for output_p in yaml_obj['output_ports']:
-                try:
-                    array_dimensions = [] if output_p['no_unpacked'] \
-                                                else self.total_array_dimensions
-                except KeyError:
-                    array_dimensions = self.total_array_dimensions
-
-                try:
-                    group = output_p['group'].format(**values)
-                except KeyError:
-                    group = self.path_underscored_wo_field
-
-                name = output_p['name'].format(**values)
-
-                if group not in self.ports:
-                    self.ports[group] = {
-                        name:
-                        PortType (
-                            datatype = output_p['signal_type'].format(**values),
-                            dim = array_dimensions,
-                            direction = "output",
-                        )
-                    }
-                elif name not in self.ports[group]:
-                    self.ports[group][name] =\
-                        PortType (
-                            datatype = output_p['signal_type'].format(**values),
-                            dim = array_dimensions,
-                            direction = "output",
-                        )
-        except (TypeError, KeyError):
-            pass
+        if not skip_outputs:
+            self.__add_ports(templ.output_ports, values, "output")
 
         # Return RTL with values
-        return yaml_obj['rtl'].format(**values)
+        return templ.render(values)
+
+    def __add_ports(self, ports: tuple, values: dict, direction: str):
+        for port in ports:
+            group = port.group(values) if port.group else self.path_underscored_wo_field
+            name = port.name(values)
+
+            group_ports = self.ports.setdefault(group, {})
+
+            if name not in group_ports:
+                group_ports[name] =\
+                    PortType (
+                        datatype = port.signal_type(values),
+                        dim = () if port.no_unpacked else self.total_array_dimensions,
+                        direction = direction,
+                    )
 
     def create_underscored_path(self):
         self.owning_addrmap, self.full_path, self.path, self.path_underscored =\
-            Component.create_underscored_path_static(self.obj)
+            Component.create_underscored_path_static(self.obj, self.config.get('scope'))
 
         # By default, this is identical to path_underscored. Fields will override this
         self.path_underscored_wo_field = self.path_underscored
 
     @staticmethod
-    def create_underscored_path_static(obj):
+    def create_underscored_path_static(obj, scope: Optional[str] = None):
         owning_addrmap = obj.owning_addrmap.inst_name
         full_path = Component.__split_dimensions(obj.get_path())[0]
-        path = full_path.replace(f"{owning_addrmap}.", '', 1)
+
+        # Within the module of a regfile, paths are relative to that regfile
+        if scope and full_path.startswith(f"{scope}."):
+            path = full_path[len(scope)+1:]
+        else:
+            path = full_path.replace(f"{owning_addrmap}.", '', 1)
 
         path_underscored = path.replace('.', '__')
 
@@ -454,5 +576,16 @@ class Component():
 
         return ''
 
+    def get_address(self, obj):
+        """Return the address a node must be decoded with
+
+        Within the module of a regfile, the address is relative to the
+        BASE_ADDR parameter of that module.
+        """
+        if self.config.get('scope') is None:
+            return obj.absolute_address
+
+        return f"BASE_ADDR+{obj.absolute_address - self.config['scope_address']}"
+
     def get_regwidth(self) -> int:
         return self.regwidth
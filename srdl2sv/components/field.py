@@ -1,35 +1,73 @@
 import math
-
-import importlib.resources as pkg_resources
+import logging
+import re
 import sys
-from typing import Optional
+from typing import Callable, Optional
+from dataclasses import dataclass
 from enum import Enum
-import yaml
 
-from systemrdl.node import FieldNode, SignalNode
+from systemrdl.node import Node, FieldNode, SignalNode
 from systemrdl.component import Reg, Regfile
 from systemrdl.rdltypes import PrecedenceType, AccessType, OnReadType, OnWriteType, InterruptType
+from systemrdl.rdltypes import PropertyReference
 
 # Local modules
 from srdl2sv.components.component import Component, TypeDef
+from srdl2sv.components.compiled_template import load_templates
 from srdl2sv.components import templates
+from srdl2sv.log.log import RecordCollector
+from srdl2sv.profile import profile
 
 class StorageType(Enum):
     FLOPS = 0
     WIRE = 1
     CONST = 2
 
+@dataclass
+class FieldCacheEntry:
+    attrs: dict      # Attributes of the field, with placeholders in all paths
+    records: list    # Log records that were emitted during the rendering
+    cacheable: bool
+    # Function that returns the attributes for the values of all placeholders.
+    # Only compiled once the entry is actually reused.
+    restore: Optional[Callable[[list], dict]] = None
+
 class Field(Component):
-    # Save YAML template as class variable
-    templ_dict = yaml.load(
-        pkg_resources.read_text(templates, 'fields.yaml'),
-        Loader=yaml.FullLoader)
+    # Huge address maps consist of many fields, which thus do not get an
+    # instance dictionary (see Component)
+    __slots__ = (
+        'access_rtl', 'always_ff_header', 'clock_gate', 'itr_haltmasked',
+        'itr_masked', 'lsb', 'lsbyte', 'msb', 'msbyte', 'path_underscored_vec',
+        'path_wo_field_vec', 'readable_by', 'register_name', 'rst',
+        'storage_type', 'we_or_wel', 'writable_by',
+        '_Field__references', '_Field__cacheable',
+    )
 
+    # Save YAML template as class variable
+    templ_dict = load_templates(templates, 'fields.yaml')
+
+    # While a field is rendered for the RTL cache, the components of its
+    # path and the paths of referenced nodes are represented by '\0n\0'
+    placeholder_re = re.compile('\0([0-9]+)\0')
+
+    # Attributes that are not derived from the properties of a field and
+    # are thus never copied from the RTL cache
+    __uncached_attrs = (
+        'obj',
+        'config',
+        'full_path',
+        '_logger',
+        '_Field__references',
+        '_Field__cacheable',
+    )
+
+    @profile.timed('Field.__init__', 'Field')
     def __init__(
             self,
             obj: FieldNode,
             parents_dimensions: Optional[list],
-            config: dict):
+            config: dict,
+            rtl_cache: Optional[dict] = None):
         super().__init__(
                     obj=obj,
                     config=config,
@@ -39,6 +77,16 @@ class Field(Component):
         # Generate all variables that have anything to do with dimensions or strides
         self._init_genvars()
 
+        # Placeholders of referenced nodes. Only set while the field is
+        # rendered for the RTL cache.
+        self.__references = None
+
+        if rtl_cache is None:
+            self.__render(obj)
+        else:
+            self.__render_cached(obj, rtl_cache)
+
+    def __render(self, obj: FieldNode):
         # Save and/or process important variables
         self.__init_variables(obj)
 
@@ -83,6 +131,266 @@ class Field(Component):
 
         self.add_sw_access(obj)
 
+    def __render_cached(self, obj: FieldNode, rtl_cache: dict):
+        """Render the field, or reuse the result of a field with identical properties
+
+        Fields with the same properties only differ in the components of
+        their paths and in the paths of the nodes they reference. Thus, a
+        field is rendered once with placeholders for these paths, after which
+        every field with the same key only has to replace the placeholders.
+        """
+        path_components = self.path.split('.')
+
+        key, references = self.__get_cache_key(path_components)
+
+        # The last path component is the name of the field, which is part of
+        # the key. Thus, it does not get a placeholder.
+        placeholder_values = [*path_components[:-1], *references]
+
+        def replace(match_obj):
+            return placeholder_values[int(match_obj.group(1))]
+
+        if (entry := rtl_cache.get(key)) is None:
+            entry = self.__render_placeholders(obj, path_components, references)
+
+            if entry.cacheable:
+                rtl_cache[key] = entry
+
+            attrs = Field.__replace_placeholders(entry.attrs, replace)
+        else:
+            if entry.restore is None:
+                entry.restore = Field.__compile_restore(entry.attrs)
+
+            attrs = entry.restore(placeholder_values)
+
+        for key, value in attrs.items():
+            setattr(self, key, value)
+
+        # Log messages of the rendering are emitted again for every field
+        for record in entry.records:
+            record = logging.makeLogRecord(record.__dict__)
+            record.name = self.full_path
+            record.msg = Field.placeholder_re.sub(replace, record.msg)
+
+            self.logger.handle(record)
+
+    def __render_placeholders(
+            self,
+            obj: FieldNode,
+            path_components: list,
+            references: dict) -> FieldCacheEntry:
+        logger = self._logger
+
+        self.__cacheable = True
+        self.__references = {
+            path: len(path_components) - 1 + i for i, path in enumerate(references)}
+
+        self.path = '.'.join(
+            [*(f"\0{i}\0" for i in range(len(path_components)-1)), path_components[-1]])
+        self.path_underscored = self.path.replace('.', '__')
+
+        # Messages are collected, so that they can be emitted for every
+        # field that reuses the result
+        collector = RecordCollector()
+        self._logger = logging.Logger(self.full_path, self.log_level)
+        self._logger.addHandler(collector)
+
+        self.__render(obj)
+
+        entry = FieldCacheEntry(
+            attrs={key: getattr(self, key)
+                   for key in (*Component.__slots__, *Field.__slots__)
+                   if key not in Field.__uncached_attrs and hasattr(self, key)},
+            records=collector.records,
+            # Warnings and errors might refer to other nodes. Fields that
+            # result in such messages are always rendered from scratch.
+            cacheable=self.__cacheable and
+                all(x.levelno < logging.WARNING for x in collector.records))
+
+        self._logger = logger
+        self.__references = None
+
+        return entry
+
+    def __get_cache_key(self, path_components: list) -> tuple:
+        """Return the key of the field in the RTL cache and the (ordered)
+        dictionary with the underscored paths of all referenced nodes"""
+        references = {}
+        scope = self.config.get('scope')
+
+        # Properties that are not explicitly set get their default value from
+        # the rulebook of the compiler. That only depends on the explicitly set
+        # properties, with the exception of the resetsignal, which can be
+        # inherited from the field_reset signal of a parent.
+        key = (
+            self.obj.inst_name,
+            self.obj.inst.msb,
+            self.obj.inst.lsb,
+            self.owning_addrmap,
+            len(path_components),
+            tuple(self.total_array_dimensions),
+            self.config['external'],
+            self.config['enums'],
+            self.config['unpacked_arrays'],
+            self.config['descriptions']['Field'],
+            Field.__get_key_value(self.obj.get_property('resetsignal'), references, scope),
+            *((prop, Field.__get_key_value(self.obj.get_property(prop), references, scope))
+                for prop in self.obj.list_properties()))
+
+        return (key, references)
+
+    @staticmethod
+    def __get_key_value(value, references: dict, scope: Optional[str] = None):
+        if isinstance(value, (list, tuple)):
+            return tuple(Field.__get_key_value(x, references, scope) for x in value)
+
+        if isinstance(value, PropertyReference):
+            try:
+                has_property = bool(value.node.get_property(value.name))
+            except LookupError:
+                has_property = False
+
+            return ('ref', Field.__get_key_value(value.node, references, scope),
+                    value.name, has_property)
+
+        if isinstance(value, Node):
+            # References are replaced by placeholders. Only the order in which
+            # they occur is part of the key.
+            try:
+                path, dimensions = Component.get_signal_path(value, scope)
+            except AttributeError:
+                # E.g., signals that are defined outside of any addrmap
+                path, dimensions = value.get_path(), ''
+
+            reference = references.setdefault(path, len(references))
+
+            if isinstance(value, SignalNode):
+                # Resets are described by the properties of the signal
+                return ('signal', reference, dimensions, value.inst_name, value.width,
+                        value.get_property('async'), value.get_property('activelow'))
+
+            return ('node', reference, dimensions, type(value).__name__,
+                    getattr(value, 'width', None))
+
+        try:
+            hash(value)
+        except TypeError:
+            return repr(value)
+
+        return value
+
+    def get_signal_name(self, obj):
+        name = super().get_signal_name(obj)
+
+        if self.__references is None:
+            return name
+
+        # Replace the path of the referenced node by its placeholder, so that
+        # the result can be reused by other fields
+        scope = self.config.get('scope')
+
+        try:
+            path = Component.get_signal_path(obj.node, scope)[0]
+        except AttributeError:
+            path = Component.get_signal_path(obj, scope)[0]
+
+        if (idx := self.__references.get(path)) is None or not name.startswith(path):
+            self.__cacheable = False
+            return name
+
+        return f"\0{idx}\0{name[len(path):]}"
+
+    @staticmethod
+    def __replace_placeholders(value, replace):
+        if isinstance(value, str):
+            return Field.placeholder_re.sub(replace, value) if '\0' in value else value
+
+        if isinstance(value, list):
+            return [Field.__replace_placeholders(x, replace) for x in value]
+
+        if isinstance(value, tuple):
+            items = [Field.__replace_placeholders(x, replace) for x in value]
+
+            # Tuples without placeholders (e.g., dimensions) are shared
+            if all(x is y for x, y in zip(items, value)):
+                return value
+
+            # NamedTuples (e.g., SignalType) must be created with positional arguments
+            return type(value)(*items) if hasattr(value, '_fields') else tuple(items)
+
+        if isinstance(value, dict):
+            return {Field.__replace_placeholders(key, replace):
+                        Field.__replace_placeholders(item, replace)
+                    for key, item in value.items()}
+
+        if isinstance(value, set):
+            return {Field.__replace_placeholders(x, replace) for x in value}
+
+        return value
+
+    @staticmethod
+    def __compile_restore(attrs: dict) -> Callable[[list], dict]:
+        """Turn the attributes of a cache entry into a function that creates
+        a copy of them, with all placeholders replaced by path components
+
+        Just like the YAML templates, the function is generated as Python
+        code, so that no time is spent on walking through the attributes.
+        """
+        constants = []
+
+        def constant(value) -> bool:
+            if isinstance(value, str):
+                return '\0' not in value
+
+            if isinstance(value, tuple):
+                return all(constant(x) for x in value)
+
+            return not isinstance(value, (list, dict, set))
+
+        def expression(value) -> str:
+            if isinstance(value, str):
+                if '\0' not in value:
+                    return repr(value)
+
+                # Odd entries are the indices of the path components
+                parts = Field.placeholder_re.split(value)
+
+                return f"({' + '.join(repr(x) if i % 2 == 0 else f'c[{x}]' for i, x in enumerate(parts))})"
+
+            if isinstance(value, list):
+                return f"[{', '.join(expression(x) for x in value)}]"
+
+            if isinstance(value, tuple) and not constant(value):
+                items = ''.join(f"{expression(x)}, " for x in value)
+
+                if hasattr(value, '_fields'):
+                    constants.append(type(value))
+                    return f"k[{len(constants)-1}]({items})"
+
+                return f"({items})"
+
+            if isinstance(value, dict):
+                items = ', '.join(f"{expression(x)}: {expression(y)}" for x, y in value.items())
+
+                return f"{{{items}}}"
+
+            if isinstance(value, set):
+                return f"{{{', '.join(expression(x) for x in value)}}}" if value else 'set()'
+
+            constants.append(value)
+            return f"k[{len(constants)-1}]"
+
+        namespace = {}
+
+        exec(compile(
+                f"def restore(c, k=k):\n    return {expression(attrs)}\n",
+                "<field cache>",
+                'exec'),
+             {'k': constants},
+             namespace)
+
+        return namespace['restore']
+
     def add_sw_access(self, obj, alias = False):
 
         # Perform some basic checks
@@ -106,7 +414,7 @@ class Field(Component):
 
         if alias:
             _, _, path, alias_path_underscored = \
-                Field.create_underscored_path_static(obj)
+                Field.create_underscored_path_static(obj, self.config.get('scope'))
         else:
             path = self.path
 
@@ -127,6 +435,12 @@ class Field(Component):
             # This will need a wire to indicate that a write is taking place
             self.properties['sw_wr_wire'] = True
 
+            self.__add_clock_gate_term(
+                'sw_write',
+                'clock_gate_sw_wr',
+                {'path_wo_field': path_underscored_wo_field,
+                 'genvars': self.genvars_str})
+
             swwe = obj.get_property('swwe')
             swwel = obj.get_property('swwel')
 
@@ -222,6 +536,12 @@ class Field(Component):
             elif onread and self.storage_type is StorageType.FLOPS:
                 self.properties['sw_rd_wire'] = True
 
+                self.__add_clock_gate_term(
+                    'sw_read',
+                    'clock_gate_sw_rd',
+                    {'path_wo_field': path_underscored_wo_field,
+                     'genvars': self.genvars_str})
+
                 access_rtl['sw_read'][0].append(
                     self._process_yaml(
                         Field.templ_dict['sw_read_access_field'],
@@ -237,6 +557,7 @@ class Field(Component):
                         self._process_yaml(
                             Field.templ_dict[str(onread)],
                             {'path': self.path_underscored,
+                             'prefix': 'r_' if self.config['read_port'] else '',
                              'genvars': self.genvars_str,
                              'i': i,
                              'width': msb_bus - lsb_bus + 1,
@@ -251,6 +572,13 @@ class Field(Component):
         # Add singlepulse property
         # Property cannot be overwritten by alias
         if obj.get_property('singlepulse'):
+            # The flops only have to be cleared if they are set
+            self.__add_clock_gate_term(
+                'singlepulse',
+                'clock_gate_singlepulse',
+                {'path': self.path_underscored,
+                 'genvars': self.genvars_str})
+
             self.access_rtl['singlepulse'] = ([
                 self._process_yaml(
                     Field.templ_dict['singlepulse'],
@@ -277,7 +605,7 @@ class Field(Component):
         if self.obj.get_property('counter'):
             self.logger.debug("Detected counter property")
 
-            self.rtl_footer.append(Field.templ_dict['counter_comment']['rtl'])
+            self.rtl_footer.append(Field.templ_dict['counter_comment'].render({}))
 
             # Determine saturation values
             if isinstance(saturate := self.obj.get_property('incrsaturate'), bool):
@@ -626,7 +954,7 @@ class Field(Component):
 
             # Handle threshold values
             if incr_thr_value or decr_thr_value:
-                self.rtl_footer.append(Field.templ_dict['counter_thr_comment']['rtl'])
+                self.rtl_footer.append(Field.templ_dict['counter_thr_comment'].render({}))
 
             if incr_thr_value:
                 self.rtl_footer.append(
@@ -693,6 +1021,7 @@ class Field(Component):
                      'genvars': self.genvars_str,
                      'incr_zero_pad': incr_zero_pad,
                      'decr_zero_pad': decr_zero_pad,
+                     'field_type': self.field_type,
                     }
                 )
             )
@@ -715,6 +1044,7 @@ class Field(Component):
                          'path_wo_field': self.path_underscored_wo_field,
                          'genvars': self.genvars_str,
                          'rd_wr': 'rd',
+                         'prefix': 'r_' if self.config['read_port'] else '',
                          'msbyte': self.msbyte,
                          'lsbyte': self.lsbyte,
                          'swmod_assigns': '\n'.join(swmod_assigns)
@@ -731,6 +1061,7 @@ class Field(Component):
                          'path_wo_field': self.path_underscored_wo_field,
                          'genvars': self.genvars_str,
                          'rd_wr': 'wr',
+                         'prefix': '',
                          'msbyte': self.msbyte,
                          'lsbyte': self.lsbyte,
                          'swmod_assigns': '\n'.join(swmod_assigns)
@@ -760,8 +1091,14 @@ class Field(Component):
             self.properties['sw_wr_wire'] = True
             self.properties['sw_rd_wire'] = True
 
+            # With a read port, reads have their own byte enables
+            if self.config['read_port']:
+                swacc_templ = 'swacc_assign_read_port'
+            else:
+                swacc_templ = 'swacc_assign'
+
             swacc_props = self._process_yaml(
-                Field.templ_dict['swacc_assign'],
+                Field.templ_dict[swacc_templ],
                 {'path': self.path_underscored,
                  'path_wo_field': self.path_underscored_wo_field,
                  'genvars': self.genvars_str,
@@ -804,6 +1141,12 @@ class Field(Component):
                     )
 
         if bit_type:
+            self.__add_clock_gate_term(
+                'hw_write',
+                'clock_gate_sticky',
+                {'path': self.path_underscored,
+                 'genvars': self.genvars_str})
+
             self.access_rtl['hw_write'] = ([
                 self._process_yaml(
                     Field.templ_dict[bit_type],
@@ -893,6 +1236,9 @@ class Field(Component):
 
 
             else:
+                # The flops follow the source in every cycle
+                self.__add_clock_gate_term('hw_write', None)
+
                 self.access_rtl['hw_write'] = ([
                     self._process_yaml(
                         Field.templ_dict['nonsticky_intr'],
@@ -997,6 +1343,12 @@ class Field(Component):
         if sticky:
             self.logger.info("Found '%s' property.", sticky)
         elif self.obj.get_property('counter'):
+            self.__add_clock_gate_term(
+                'hw_write',
+                'clock_gate_counter',
+                {'path': self.path_underscored,
+                 'genvars': self.genvars_str})
+
             self.access_rtl['hw_write'] = ([
                 self._process_yaml(
                     Field.templ_dict['hw_access_counter'],
@@ -1012,6 +1364,14 @@ class Field(Component):
         elif self.obj.get_property('hw') in (AccessType.rw, AccessType.w):
             write_condition = 'hw_access_we_wel' if self.we_or_wel else 'hw_access_no_we_wel'
 
+            # Without we/wel, hardware writes the flops in every cycle
+            self.__add_clock_gate_term(
+                'hw_write',
+                'clock_gate_hw_wr' if self.we_or_wel else None,
+                {'negl': '!' if self.obj.get_property('wel') else '',
+                 'path': self.path_underscored,
+                 'genvars': self.genvars_str})
+
             # if-line of hw-access
             self.access_rtl['hw_write'] = ([
                 self._process_yaml(
@@ -1068,6 +1428,12 @@ class Field(Component):
 
         # Check if the hwset or hwclr option is set
         if self.obj.get_property('hwset'):
+            self.__add_clock_gate_term(
+                'hw_setclr',
+                'clock_gate_hwset',
+                {'path': self.path_underscored,
+                 'genvars': self.genvars_str})
+
             self.access_rtl['hw_setclr'] = ([
                 self._process_yaml(
                     Field.templ_dict['hw_access_hwset'],
@@ -1083,6 +1449,12 @@ class Field(Component):
             ],
             False)
         elif self.obj.get_property('hwclr'):
+            self.__add_clock_gate_term(
+                'hw_setclr',
+                'clock_gate_hwclr',
+                {'path': self.path_underscored,
+                 'genvars': self.genvars_str})
+
             self.access_rtl['hw_setclr'] = ([
                 self._process_yaml(
                     Field.templ_dict['hw_access_hwclr'],
@@ -1128,9 +1500,9 @@ class Field(Component):
                         width = 8
 
                     mask.append(
-                        Field.templ_dict['external_wr_mask_segment']['rtl'].format(
-                            idx = byte_idx,
-                            width = width)
+                        Field.templ_dict['external_wr_mask_segment'].render(
+                            {'idx': byte_idx,
+                             'width': width})
                         )
 
                 wr_templ = 'external_wr_assignments' if i == 0 else 'external_wr_assignments_alias'
@@ -1220,6 +1592,26 @@ class Field(Component):
         # Remove last else
         order_list_rtl.pop()
 
+        # The register provides a clock enable for all its flops that can
+        # be clock gated. Either use the enable to clock the flops with the
+        # output of a clock gating cell, or add it as outermost condition,
+        # so that synthesis can infer the clock gate.
+        if self.get_clock_gate_terms():
+            if self.config['clock_gating'] == 'icg':
+                self.rtl_header[self.rtl_header.index(self.always_ff_header)] = \
+                    self.__get_always_ff_header(
+                        Field.templ_dict['clock_gate_gclk'].render(
+                            {'path_wo_field': self.path_underscored_wo_field,
+                             'genvars': self.genvars_str}))
+            else:
+                order_list_rtl = [
+                    Field.templ_dict['clock_gate_start'].render(
+                        {'path_wo_field': self.path_underscored_wo_field,
+                         'genvars': self.genvars_str}),
+                    *order_list_rtl,
+                    Field.templ_dict['clock_gate_end'].render({})
+                ]
+
         # Chain access RTL to the rest of the RTL
         self.rtl_header = [*self.rtl_header, *order_list_rtl]
 
@@ -1231,6 +1623,71 @@ class Field(Component):
                 )
             )
 
+    def __add_clock_gate_term(
+            self,
+            branch: str,
+            templ: Optional[str],
+            values: Optional[dict] = None):
+        """Save the condition under which a branch of the always_ff block
+        updates the flops. If no template is passed, the branch updates the
+        flops in every cycle and the field cannot be clock gated."""
+        if self.clock_gate is None:
+            return
+
+        self.clock_gate.setdefault(branch, []).append(
+            Field.templ_dict[templ].render(values) if templ else None)
+
+    def get_clock_gate_terms(self) -> list:
+        """Return the conditions under which the flops of the field change
+
+        The list is empty if the field is not clock gated. That is the case
+        if clock gating is disabled, if the field does not implement flops,
+        or if the flops might change in every cycle.
+        """
+        if self.clock_gate is None \
+                or self.storage_type is not StorageType.FLOPS \
+                or self.config['external']:
+            return []
+
+        terms = []
+
+        for branch in ('sw_write', 'sw_read', 'hw_setclr', 'hw_write', 'singlepulse'):
+            access_rtl = self.access_rtl.get(branch, [])
+
+            if isinstance(access_rtl, tuple):
+                access_rtl = [access_rtl]
+
+            if not any(x[0] for x in access_rtl):
+                continue
+
+            # Branches without a known condition are never gated
+            branch_terms = self.clock_gate.get(branch, [None])
+
+            if None in branch_terms:
+                return []
+
+            terms.extend(branch_terms)
+
+        # A clock gating cell must also pass the clock while a synchronous
+        # reset is active
+        if terms and self.config['clock_gating'] == 'icg' \
+                and self.rst['name'] and not self.rst['async']:
+            terms.append(
+                Field.templ_dict['clock_gate_rst'].render(
+                    {'rst_negl': "!" if self.rst['active'] == "active_low" else "",
+                     'rst_name': self.rst['name']}))
+
+        # Aliases and different branches might share a condition
+        return list(dict.fromkeys(terms))
+
+    def get_flop_count(self) -> tuple:
+        if self.storage_type is not StorageType.FLOPS or self.config['external']:
+            return (0, 0)
+
+        flops = self.obj.width * math.prod(self.total_array_dimensions)
+
+        return (flops if self.get_clock_gate_terms() else 0, flops)
+
     def __add_combo(self):
         operations = []
         if self.obj.get_property('anded'):
@@ -1396,6 +1853,10 @@ class Field(Component):
         self.access_rtl['else'] = (["else"], False)
         self.access_rtl[''] = ([''], False)
 
+        # Conditions under which the branches of access_rtl update the
+        # flops. Only required if the flops shall be clock gated.
+        self.clock_gate = None if self.config['clock_gating'] == 'none' else {}
+
     def __init_storage_type(self):
         # It is not required to check for illegal conditions because the
         # compiler will take care of this
@@ -1420,7 +1881,8 @@ class Field(Component):
         else:
             self.storage_type = StorageType.FLOPS
 
-        self.logger.debug("Storage type of field detected as '%s'", self.storage_type)
+        if self.is_log_enabled_for(logging.DEBUG):
+            self.logger.debug("Storage type of field detected as '%s'", self.storage_type)
 
     def __summary(self):
         # Additional flags that are set
@@ -1440,32 +1902,36 @@ class Field(Component):
 
         # Add comment with summary on field's properties
         return \
-            Field.templ_dict['field_comment']['rtl'].format(
-                name = self.name,
-                hw_access = str(self.obj.get_property('hw'))[11:],
-                sw_access = str(self.obj.get_property('sw'))[11:],
-                hw_precedence = '(precedence)' if precedence == PrecedenceType.hw else '',
-                sw_precedence = '(precedence)' if precedence == PrecedenceType.sw else '',
-                rst_active = self.rst['active'],
-                rst_type = self.rst['type'],
-                misc_flags = misc_flags if misc_flags else '-',
-                external = self.config['external'],
-                lsb = self.obj.lsb,
-                msb = self.obj.msb,
-                path_wo_field = self.path_underscored_wo_field,
-                storage_type = self.storage_type,
+            Field.templ_dict['field_comment'].render(
+                {'name': self.name,
+                 'hw_access': str(self.obj.get_property('hw'))[11:],
+                 'sw_access': str(self.obj.get_property('sw'))[11:],
+                 'hw_precedence': '(precedence)' if precedence == PrecedenceType.hw else '',
+                 'sw_precedence': '(precedence)' if precedence == PrecedenceType.sw else '',
+                 'rst_active': self.rst['active'],
+                 'rst_type': self.rst['type'],
+                 'misc_flags': misc_flags if misc_flags else '-',
+                 'external': self.config['external'],
+                 'lsb': self.obj.lsb,
+                 'msb': self.obj.msb,
+                 'path_wo_field': self.path_underscored_wo_field,
+                 'storage_type': self.storage_type,
+                }
             )
 
-    def __add_always_ff(self):
-        # Handle always_ff
+    def __get_always_ff_header(self, clk: str) -> str:
         sense_list = 'sense_list_rst' if self.rst['async'] else 'sense_list_no_rst'
 
-        self.always_ff_header = \
-            self._process_yaml(
-                Field.templ_dict[sense_list],
-                {'rst_edge': self.rst['edge'],
-                 'rst_name': self.rst['name']}
-            )
+        return self._process_yaml(
+            Field.templ_dict[sense_list],
+            {'clk': clk,
+             'rst_edge': self.rst['edge'],
+             'rst_name': self.rst['name']}
+        )
+
+    def __add_always_ff(self):
+        # Handle always_ff
+        self.always_ff_header = self.__get_always_ff_header('clk')
 
         self.rtl_header.append(self.always_ff_header)
 
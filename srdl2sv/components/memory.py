@@ -1,21 +1,20 @@
-import importlib.resources as pkg_resources
 import sys
 import math
-import yaml
 
 from systemrdl import node
 from systemrdl.rdltypes import AccessType
 
 # Local packages
 from srdl2sv.components.component import Component, SWMuxEntry, SWMuxEntryDimensioned
+from srdl2sv.components.compiled_template import load_templates
 from srdl2sv.components import templates
+from srdl2sv.profile import profile
 
 class Memory(Component):
     # Save YAML template as class variable
-    templ_dict = yaml.load(
-        pkg_resources.read_text(templates, 'memory.yaml'),
-        Loader=yaml.FullLoader)
+    templ_dict = load_templates(templates, 'memory.yaml')
 
+    @profile.timed('Memory.__init__', 'Memory')
     def __init__(
             self,
             obj: node.RegfileNode,
@@ -182,15 +181,15 @@ class Memory(Component):
         signal_width = min(max([len(value[0]) for (_, value) in dict_list]), 40)
         name_width = min(max([len(key) for (key, _) in dict_list]), 40)
 
-        return [Memory.templ_dict['signal_declaration'].format(
-                   name = key,
-                   type = value[0],
-                   signal_width = signal_width,
-                   name_width = name_width,
-                   unpacked_dim = '[{}]'.format(
-                       ']['.join(
-                           [str(y) for y in value[1]]))
-                       if value[1] else '')
+        return [Memory.templ_dict['signal_declaration'].render(
+                   {'name': key,
+                    'type': value[0],
+                    'signal_width': signal_width,
+                    'name_width': name_width,
+                    'unpacked_dim': '[{}]'.format(
+                        ']['.join(
+                            [str(y) for y in value[1]]))
+                        if value[1] else ''})
                for (key, value) in dict_list]
 
     def get_regwidth(self) -> int:
@@ -1,22 +1,21 @@
-import importlib.resources as pkg_resources
 import sys
 from typing import Optional
-import yaml
 
 from systemrdl import node
 
 # Local packages
-from srdl2sv.components.component import Component
+from srdl2sv.components.component import Component, DecodeRegion
 from srdl2sv.components.register import Register
+from srdl2sv.components.compiled_template import load_templates
 from srdl2sv.components import templates
+from srdl2sv.profile import profile
 
 
 class RegFile(Component):
     # Save YAML template as class variable
-    templ_dict = yaml.load(
-        pkg_resources.read_text(templates, 'regfile.yaml'),
-        Loader=yaml.FullLoader)
+    templ_dict = load_templates(templates, 'regfile.yaml')
 
+    @profile.timed('RegFile.__init__', 'RegFile')
     def __init__(
             self,
             obj: node.RegfileNode,
@@ -48,54 +47,22 @@ class RegFile(Component):
 
         self.regwidth = 0
 
-        # Traverse through children
-        for child in obj.children():
-            if isinstance(child, node.AddrmapNode):
-                self.logger.fatal('Instantiating addrmaps within regfiles is not '\
-                                  'supported. Addrmaps shall be instantiated at the '\
-                                  'top-level of other addrmaps')
-                sys.exit(1)
-            elif isinstance(child, node.RegfileNode):
-                self.obj.current_idx = [0]
+        # Determine whether this regfile adds a level to the address decoder.
+        # All children are decoded relative to the region of this regfile.
+        parent_decode_region = glbl_settings['decode_region']
+        self.region_select = []
+        self.region_signal_instantiations = []
 
-                new_child = RegFile(
-                        obj=child,
-                        parents_dimensions=self.total_array_dimensions,
-                        parents_strides=self.total_stride,
-                        config=config,
-                        glbl_settings=glbl_settings)
-                self.regfiles[child.inst_name] = new_child
-            elif isinstance(child, node.RegNode):
-                if child.inst.is_alias:
-                    # If the node we found is an alias, we shall not create a
-                    # new register. Rather, we bury up the old register and add
-                    # additional properties
-                    self.registers[child.inst.alias_primary_inst.inst_name]\
-                        .add_alias(child)
-                else:
-                    self.obj.current_idx = [0]
-                    new_child = Register(
-                            obj=child,
-                            parents_dimensions=self.total_array_dimensions,
-                            parents_strides=self.total_stride,
-                            config=config,
-                            glbl_settings=glbl_settings)
-                    self.registers[child.inst_name] = new_child
+        if config['address_decoder'] == 'hierarchical':
+            self.decode_region = self.__create_decode_region(parent_decode_region)
+        else:
+            self.decode_region = parent_decode_region
 
-            try:
-                if (regwidth := new_child.get_regwidth()) > self.regwidth:
-                    self.regwidth = regwidth
-            except (KeyError, UnboundLocalError):
-                # Simply ignore nodes like SignalNodes
-                pass
+        glbl_settings['decode_region'] = self.decode_region
 
-        # Add registers to children. This must be done in a last step
-        # to account for all possible alias combinations
-        self.children = {**self.regfiles, **self.registers}
+        self._add_children(config, glbl_settings)
 
-        # Create RTL of all registers
-        for register in self.registers.values():
-            register.create_rtl()
+        glbl_settings['decode_region'] = parent_decode_region
 
         self.logger.info("Done generating all child-regfiles/registers")
 
@@ -142,19 +109,171 @@ class RegFile(Component):
                 )
             )
 
+        # Select wire of the address decoder. If no generate-block is active,
+        # the wire is not declared by any parent.
+        if self.region_select and not glbl_settings['generate_active']:
+            self.rtl_header = [*self.rtl_header, *self.region_signal_instantiations]
+
+        self.rtl_header = [*self.rtl_header, *self.region_select]
+
         # End generate loop
         if self.generate_initiated:
             glbl_settings['generate_active'] = False
             self.rtl_footer.append("endgenerate")
             self.rtl_footer.append("")
 
+    def _add_children(self, config: dict, glbl_settings: dict):
+        """Create the regfiles and registers in this regfile and their RTL"""
+        # Traverse through children
+        for child in self.obj.children():
+            if isinstance(child, node.AddrmapNode):
+                self.logger.fatal('Instantiating addrmaps within regfiles is not '\
+                                  'supported. Addrmaps shall be instantiated at the '\
+                                  'top-level of other addrmaps')
+                sys.exit(1)
+            elif isinstance(child, node.RegfileNode):
+                self.obj.current_idx = [0]
+
+                new_child = RegFile(
+                        obj=child,
+                        parents_dimensions=self.total_array_dimensions,
+                        parents_strides=self.total_stride,
+                        config=config,
+                        glbl_settings=glbl_settings)
+                self.regfiles[child.inst_name] = new_child
+            elif isinstance(child, node.RegNode):
+                if child.inst.is_alias:
+                    # If the node we found is an alias, we shall not create a
+                    # new register. Rather, we bury up the old register and add
+                    # additional properties
+                    self.registers[child.inst.alias_primary_inst.inst_name]\
+                        .add_alias(child)
+                else:
+                    self.obj.current_idx = [0]
+                    new_child = Register(
+                            obj=child,
+                            parents_dimensions=self.total_array_dimensions,
+                            parents_strides=self.total_stride,
+                            config=config,
+                            glbl_settings=glbl_settings)
+                    self.registers[child.inst_name] = new_child
+
+            try:
+                if (regwidth := new_child.get_regwidth()) > self.regwidth:
+                    self.regwidth = regwidth
+            except (KeyError, UnboundLocalError):
+                # Simply ignore nodes like SignalNodes
+                pass
+
+        # Add registers to children. This must be done in a last step
+        # to account for all possible alias combinations
+        self.children = {**self.regfiles, **self.registers}
+
+        # Create RTL of all registers
+        for register in self.registers.values():
+            register.create_rtl()
+
     def create_mux_string(self):
         for i in self.children.values():
             yield from i.create_mux_string()
 
+    def create_write_rsp_mux_string(self):
+        for i in self.children.values():
+            yield from i.create_write_rsp_mux_string()
+
+    def __create_decode_region(self, parent_region: Optional[DecodeRegion]) \
+            -> Optional[DecodeRegion]:
+        """Create a select wire for the address range of this regfile
+
+        A regfile only adds a level to the decoder if all its elements are
+        aligned to a power of 2 that is at least the size of one element.
+        Otherwise, the registers in this regfile are decoded relative to the
+        region of the parent.
+        """
+        addr_bits = (self.obj.size - 1).bit_length()
+
+        if parent_region:
+            parent_bits = parent_region.addr_bits
+        else:
+            parent_bits = self.config['addrwidth']
+
+        if not 0 < addr_bits < parent_bits:
+            return parent_region
+
+        if self.obj.raw_absolute_address % (1 << addr_bits) or \
+                any(stride % (1 << addr_bits) for stride in self.total_stride):
+            self.logger.info(
+                "Regfile is not aligned to its size of %i bytes. Its registers "\
+                "will be decoded by the parent's address decoder.", 1 << addr_bits)
+            return parent_region
+
+        genvars = ''.join(f"[gv_{chr(97+i)}]" for i in range(self.total_dimensions))
+
+        if self.total_dimensions:
+            genvars_sum = '+'.join(
+                f"gv_{chr(97+i)}*{stride}" for i, stride in enumerate(self.total_stride))
+            region = f"{parent_bits-addr_bits}'(({self.obj.raw_absolute_address}"\
+                     f"+({genvars_sum})) >> {addr_bits})"
+        else:
+            region = (self.obj.raw_absolute_address % (1 << parent_bits)) >> addr_bits
+
+        self.region_select.append(
+            self._process_yaml(
+                RegFile.templ_dict['region_select'],
+                {'path': self.path_underscored,
+                 'prefix': '',
+                 'genvars': genvars,
+                 'parent_sel': f"{parent_region.sel} && " if parent_region else '',
+                 'msb': parent_bits-1,
+                 'lsb': addr_bits,
+                 'region': region}
+            )
+        )
+
+        # With a read port, reads are decoded from the address of that port
+        if self.config['read_port']:
+            self.region_select.append(
+                self._process_yaml(
+                    RegFile.templ_dict['region_select'],
+                    {'path': self.path_underscored,
+                     'prefix': 'r_',
+                     'genvars': genvars,
+                     'parent_sel': f"{parent_region.r_sel} && " if parent_region else '',
+                     'msb': parent_bits-1,
+                     'lsb': addr_bits,
+                     'region': region}
+                )
+            )
+
+        # At this point, the only signal of the regfile is the select wire
+        dict_list = list(self.get_signals(True).items())
+        signal_width = max(max([len(value.datatype) for (_, value) in dict_list]), 12)
+        name_width = max([len(key) for (key, _) in dict_list])
+
+        self.region_signal_instantiations = [
+            RegFile.templ_dict['signal_declaration'].render(
+                {'name': key,
+                 'type': value.datatype,
+                 'signal_width': signal_width,
+                 'name_width': name_width,
+                 'unpacked_dim': '[{}]'.format(
+                     ']['.join(
+                         [str(y) for y in value.dim]))
+                     if value.dim else ''})
+            for (key, value) in dict_list]
+
+        return DecodeRegion(
+            sel=f"{self.path_underscored}_sel{genvars}",
+            addr_bits=addr_bits,
+            r_sel=f"{self.path_underscored}_r_sel{genvars}" if self.config['read_port'] else None)
+
     def get_signal_instantiations_list(self) -> set():
         instantiations = []
 
+        if self.region_signal_instantiations:
+            instantiations.append(f"\n// Variables of regfile '{self.name}'")
+            instantiations = [*instantiations, *self.region_signal_instantiations]
+
         for child in self.children.values():
             if isinstance(child, Register):
                 instantiations.append(f"\n// Variables of register '{child.name}'")
@@ -214,16 +333,16 @@ class RegFile(Component):
                         sys.exit(1)
 
                     variable_list.append(
-                        RegFile.templ_dict['enum_var_list_item']['rtl'].format(
-                            value = var[1],
-                            width = value.width,
-                            max_name_width = max_name_width,
-                            name = var[0]))
+                        RegFile.templ_dict['enum_var_list_item'].render(
+                            {'value': var[1],
+                             'width': value.width,
+                             'max_name_width': max_name_width,
+                             'name': var[0]}))
 
                 enum_rtl[value.scope].append(
-                    RegFile.templ_dict['enum_declaration']['rtl'].format(
-                        width=value.width-1,
-                        name = key,
-                        enum_var_list = ',\n'.join(variable_list)))
+                    RegFile.templ_dict['enum_declaration'].render(
+                        {'width': value.width-1,
+                         'name': key,
+                         'enum_var_list': ',\n'.join(variable_list)}))
 
         return enum_rtl
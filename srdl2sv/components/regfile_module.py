@@ -0,0 +1,418 @@
+import itertools
+import math
+
+from systemrdl import node
+from systemrdl.rdltypes import PropertyReference
+
+# Local packages
+from srdl2sv.components.component import Component, PortType, SWMuxEntry, SWMuxEntryDimensioned
+from srdl2sv.components.regfile import RegFile
+from srdl2sv.components.compiled_template import load_templates
+from srdl2sv.components import templates
+from srdl2sv.profile import profile
+
+
+class RegFileModule(RegFile):
+    """Regfile that is implemented as a seperate SystemVerilog module
+
+    All instances of a regfile type share the same module, which is created
+    for the first instance that is found. Within the module, paths are
+    relative to the regfile and addresses are relative to the BASE_ADDR
+    parameter of the module.
+    """
+    # Save YAML template as class variable
+    templ_dict = load_templates(templates, 'regfile_module.yaml')
+
+    @profile.timed('RegFileModule.__init__', 'RegFileModule')
+    def __init__(
+            self,
+            obj: node.RegfileNode,
+            name: str,
+            config: dict,
+            glbl_settings: dict):
+        # Set object to 0 for easy addressing
+        obj.current_idx = [0]
+
+        # The module has its own address decoder and read multiplexer. Registers
+        # within the module are always decoded by a flat decoder and every
+        # element of an array is a seperate input of the read multiplexer.
+        Component.__init__(
+            self,
+            obj=obj,
+            config={**config,
+                    'scope': Component.create_underscored_path_static(obj)[1],
+                    'scope_address': obj.absolute_address,
+                    'address_decoder': 'flat',
+                    'read_mux_arrays': 'unrolled'},
+            parents_strides=None,
+            parents_dimensions=None)
+
+        # Every element of an array of regfiles is a seperate instance of the
+        # module. The module itself is thus never an array.
+        self.sel_arr = 'single'
+        self.total_array_dimensions = ()
+        self.own_array_dimensions = ()
+        self.own_depth = '[]'
+        self.own_dimensions = 0
+        self.total_dimensions = 0
+        self.total_stride = ()
+
+        self.name = name
+        self.registers = {}
+        self.regfiles = {}
+        self.regwidth = 0
+
+        # The module opens a new scope for the generate blocks, the address
+        # decoder, and the field cache
+        glbl_settings = {
+            **glbl_settings,
+            'generate_active': False,
+            'decode_region': None,
+            'field_cache': {}}
+
+        self._add_children(self.config, glbl_settings)
+
+        self.logger.info("Done generating all child-regfiles/registers of module '%s'",
+                         self.name)
+
+        # Save the ports of the registers. These are the ports that
+        # instances of this module must connect to the ports of the addrmap.
+        collection = self.collect()
+        self.hw_ports = collection.ports
+
+        # The register interface is placed in front of the hardware interface
+        self.ports = {}
+
+        widget_rtl = self._process_yaml(
+            RegFileModule.templ_dict['widget_if'],
+            {'addr_width': self.config['addrwidth'],
+             'addr_width_m1': self.config['addrwidth'] - 1,
+             'bus_width': self.regwidth,
+             'bus_width_m1': self.regwidth - 1,
+             'bus_width_byte_m1': self.regwidth // 8 - 1}
+        )
+
+        self.ports |= {group: dict(ports) for group, ports in self.hw_ports.items()}
+
+        self.rtl_header.append(
+            self._process_yaml(
+                RegFileModule.templ_dict['module_comment'],
+                {'name': self.name,
+                 'type_name': obj.type_name}
+            )
+        )
+
+        self.rtl_header.append(
+            self._process_yaml(
+                RegFileModule.templ_dict['module_declaration'],
+                {'name': self.name,
+                 'import_package_list': '\n'.join(
+                     RegFileModule.templ_dict['import_package'].render({'name': x})
+                     for x in self.get_package_names()),
+                 'addr_w': self.config['addrwidth'] - 1,
+                 'resets': '\n'.join(
+                     RegFileModule.templ_dict['reset_port'].render({'name': x})
+                     for x in collection.resets),
+                 'ports': '\n'.join(
+                     self._get_ports_rtl(RegFileModule.templ_dict['port'], self.ports))}
+            )
+        )
+
+        # Add description, if applicable
+        if self.config['descriptions']['RegFile'] and (desc := obj.get_property('desc')):
+            self.rtl_header.append(
+                self._process_yaml(RegFile.templ_dict['description'], {'desc': desc}))
+
+        # Add wire/register instantiations
+        self.__add_signal_instantiation()
+
+        self.rtl_header.append(widget_rtl)
+
+        # Append genvars
+        if genvars := ', '.join(f"gv_{chr(97+i)}" for i in range(self.get_max_dim_depth())):
+            self.rtl_header.append(f"\ngenvar {genvars};\n")
+
+        # Create read multiplexer
+        self.__create_mux_string()
+
+        # Add endmodule keyword
+        self.rtl_footer.append('endmodule')
+
+    @staticmethod
+    def is_self_contained(obj: node.RegfileNode) -> bool:
+        """Check if a regfile can be implemented as a seperate module
+
+        This is only possible if none of its fields reference a node outside
+        of the regfile. The only signals that may be referenced are resets,
+        since these are connected to the reset ports of the module.
+        """
+        for child in obj.descendants():
+            if not isinstance(child, node.FieldNode):
+                continue
+
+            if not RegFileModule.__is_internal_reference(
+                    obj, 'resetsignal', child.get_property('resetsignal')):
+                return False
+
+            for prop in child.list_properties():
+                if not RegFileModule.__is_internal_reference(
+                        obj, prop, child.get_property(prop)):
+                    return False
+
+        return True
+
+    @staticmethod
+    def __is_internal_reference(obj: node.RegfileNode, prop: str, value) -> bool:
+        if isinstance(value, (list, tuple)):
+            return all(RegFileModule.__is_internal_reference(obj, prop, x) for x in value)
+
+        if isinstance(value, PropertyReference):
+            value = value.node
+
+        if isinstance(value, node.SignalNode):
+            return prop == 'resetsignal'
+
+        if isinstance(value, node.Node):
+            while value is not None:
+                if value.inst is obj.inst:
+                    return True
+
+                value = value.parent
+
+            return False
+
+        return True
+
+    def __add_signal_instantiation(self):
+        dict_list = list(self.get_signals(True).items())
+        signal_width = max(max([len(value.datatype) for (_, value) in dict_list]), 12)
+        name_width = max([len(key) for (key, _) in dict_list])
+
+        self.rtl_header = [
+            *self.rtl_header,
+            '',
+            '// Internal signals',
+            *[RegFileModule.templ_dict['signal_declaration'].render(
+                {'name': key,
+                 'type': value.datatype,
+                 'signal_width': signal_width,
+                 'name_width': name_width,
+                 'unpacked_dim': ''})
+                for (key, value) in dict_list],
+            ''
+            ]
+
+    def __create_mux_string(self):
+        list_of_cases = []
+
+        for mux_entry_dim in self.create_mux_string():
+            mux_entry = mux_entry_dim.mux_entry
+
+            list_of_cases.append(
+                RegFileModule.templ_dict['list_of_mux_cases'].render(
+                    {'active_wire': f"{mux_entry.active_wire}{mux_entry_dim.dim}",
+                     'widget_if_r_data': f"{mux_entry.data_wire}{mux_entry_dim.dim}",
+                     'widget_if_rdy': f"{mux_entry.rdy_wire}{mux_entry_dim.dim}",
+                     'widget_if_err': f"{mux_entry.err_wire}{mux_entry_dim.dim}"})
+                )
+
+        # Define default case
+        list_of_cases.append(RegFileModule.templ_dict['default_mux_case'].render({}))
+
+        self.rtl_footer.append(
+            self._process_yaml(
+                RegFileModule.templ_dict['read_mux'],
+                {'list_of_cases': '\n'.join(list_of_cases)}
+            )
+        )
+
+
+class RegFileInstance(Component):
+    """Instance of a RegFileModule in the module of an addrmap
+
+    The ports of the instance are the ports of the module, prefixed with
+    the path of the regfile and extended by the dimensions of the regfile.
+    Hence, the ports of the addrmap are identical to the ports that would
+    be created if the regfile was not implemented as a seperate module.
+    """
+    # Save YAML template as class variable
+    templ_dict = RegFileModule.templ_dict
+
+    @profile.timed('RegFileInstance.__init__', 'RegFileInstance')
+    def __init__(
+            self,
+            obj: node.RegfileNode,
+            config: dict,
+            module: RegFileModule):
+        super().__init__(
+                    obj=obj,
+                    config=config,
+                    parents_strides=None,
+                    parents_dimensions=None)
+
+        # Set object to 0 for easy addressing
+        self.obj.current_idx = [0]
+
+        self.module = module
+        self.regwidth = module.get_regwidth()
+        self.resets = set(module.get_resets())
+
+        self._init_genvars()
+
+        # Connections of the register interface
+        connections = [
+            ('clk', 'clk'),
+            *[(x, x) for x in sorted(self.resets)],
+            ('widget_addr', 'widget_if.addr'),
+            ('widget_w_data', f"widget_if.w_data[{self.regwidth-1}:0]"),
+            ('widget_w_vld', 'widget_if.w_vld'),
+            ('widget_r_vld', 'widget_if.r_vld'),
+            ('widget_byte_en', f"widget_if.byte_en[{self.regwidth//8-1}:0]"),
+            ('widget_r_data', f"{self.path_underscored}_data_mux_in{self.genvars_str}"),
+            ('widget_rdy', f"{self.path_underscored}_rdy_mux_in{self.genvars_str}"),
+            ('widget_err', f"{self.path_underscored}_err_mux_in{self.genvars_str}"),
+            ('active', f"{self.path_underscored}_active{self.genvars_str}"),
+        ]
+
+        # Connections of the hardware interface
+        prefix = f"{self.path_underscored}__"
+
+        for group, ports in module.hw_ports.items():
+            group_ports = self.ports.setdefault(
+                group if group == 'Signals' else f"{prefix}{group}", {})
+
+            for name, port_type in ports.items():
+                if group == 'Signals':
+                    group_ports[name] = port_type
+                    connections.append((name, name))
+                    continue
+
+                group_ports[f"{prefix}{name}"] =\
+                    PortType (
+                        datatype = port_type.datatype,
+                        dim = (*self.total_array_dimensions, *port_type.dim),
+                        direction = port_type.direction,
+                    )
+
+                connections.append((name, f"{prefix}{name}{self.genvars_str}"))
+
+        name_width = max(len(x[0]) for x in connections)
+
+        instantiation_rtl = self._process_yaml(
+            RegFileInstance.templ_dict['module_instantiation'],
+            {'module': module.name,
+             'base_addr': self.__get_base_address(),
+             'path': self.path_underscored,
+             'bus_width_m1': self.regwidth - 1,
+             'connections': ',\n      '.join(
+                 RegFileInstance.templ_dict['module_instantiation_port'].render(
+                     {'name': name,
+                      'name_width': name_width,
+                      'signal': signal})
+                 for name, signal in connections)}
+        )
+
+        self.rtl_header.append(
+            self._process_yaml(
+                RegFileInstance.templ_dict['instance_comment'],
+                {'name': obj.inst_name,
+                 'dimensions': self.own_dimensions,
+                 'depth': self.own_depth,
+                 'module': module.name}
+            )
+        )
+
+        self.__add_signal_instantiation()
+
+        if self.own_dimensions:
+            self.rtl_header.append("generate")
+
+        for i in range(self.own_dimensions):
+            self.rtl_header.append(
+                self._process_yaml(
+                    RegFileInstance.templ_dict['generate_for_start'],
+                    {'iterator': f"gv_{chr(97+i)}",
+                     'limit': self.own_array_dimensions[i]}
+                )
+            )
+
+        self.rtl_header.append(instantiation_rtl)
+
+        for i in range(self.own_dimensions-1, -1, -1):
+            self.rtl_footer.append(
+                self._process_yaml(
+                    RegFileInstance.templ_dict['generate_for_end'],
+                    {'dimension': f"gv_{chr(97+i)}"}
+                )
+            )
+
+        if self.own_dimensions:
+            self.rtl_footer.append("endgenerate")
+
+        self.rtl_footer.append("")
+
+    def __get_base_address(self) -> str:
+        if not self.total_dimensions:
+            return str(self.obj.absolute_address)
+
+        genvars_sum = '+'.join(
+            f"gv_{chr(97+i)}*{stride}" for i, stride in enumerate(self.total_stride))
+
+        return f"{self.config['addrwidth']}'({self.obj.absolute_address}+({genvars_sum}))"
+
+    def __add_signal_instantiation(self):
+        dict_list = list(self.get_signals(True).items())
+        signal_width = max(max([len(value.datatype) for (_, value) in dict_list]), 12)
+        name_width = max([len(key) for (key, _) in dict_list])
+
+        self.rtl_header = [
+            *self.rtl_header,
+            '',
+            f"// Variables of regfile '{self.name}'",
+            *[RegFileInstance.templ_dict['signal_declaration'].render(
+                {'name': key,
+                 'type': value.datatype,
+                 'signal_width': signal_width,
+                 'name_width': name_width,
+                 'unpacked_dim': '[{}]'.format(
+                     ']['.join(
+                         [str(y) for y in value.dim]))
+                     if value.dim else ''})
+                for (key, value) in dict_list],
+            ''
+            ]
+
+    def create_mux_string(self):
+        mux_entry = SWMuxEntry(
+            data_wire = f"{self.path_underscored}_data_mux_in",
+            rdy_wire = f"{self.path_underscored}_rdy_mux_in",
+            err_wire = f"{self.path_underscored}_err_mux_in",
+            active_wire = f"{self.path_underscored}_active")
+
+        if self.total_array_dimensions and self.config['read_mux_arrays'] == 'indexed':
+            # The carrying addrmap selects the active element of the array
+            yield SWMuxEntryDimensioned(
+                mux_entry = mux_entry,
+                dim = '',
+                array_dimensions = self.total_array_dimensions,
+                array_strides = self.total_stride,
+                array_address = self.obj.absolute_address)
+        else:
+            for idx in itertools.product(*[range(x) for x in self.total_array_dimensions]):
+                yield SWMuxEntryDimensioned(
+                    mux_entry = mux_entry,
+                    dim = ''.join(f"[{x}]" for x in idx))
+
+    def get_package_names(self) -> set():
+        return self.module.get_package_names()
+
+    def get_flop_count(self) -> tuple:
+        # Every element of an array of regfiles is a seperate instance
+        instances = math.prod(self.total_array_dimensions)
+        gated, total = self.module.get_flop_count()
+
+        return (gated * instances, total * instances)
+
+    def get_package_rtl(self) -> {}:
+        # The packages of the module are only created once by the addrmap
+        return {}
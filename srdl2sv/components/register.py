@@ -1,21 +1,21 @@
-import importlib.resources as pkg_resources
 import sys
+import logging
 from typing import Optional
-import yaml
 
 from systemrdl import node
 
 # Local modules
 from srdl2sv.components.component import Component, SWMuxEntry, SWMuxEntryDimensioned
 from srdl2sv.components.field import Field
+from srdl2sv.components.compiled_template import load_templates
 from srdl2sv.components import templates
+from srdl2sv.profile import profile
 
 class Register(Component):
     # Save YAML template as class variable
-    templ_dict = yaml.load(
-        pkg_resources.read_text(templates, 'register.yaml'),
-        Loader=yaml.FullLoader)
+    templ_dict = load_templates(templates, 'register.yaml')
 
+    @profile.timed('Register.__init__', 'Register')
     def __init__(
             self,
             obj: node.RegNode,
@@ -43,7 +43,8 @@ class Register(Component):
 
             self.children[field_range] = Field(field,
                                                self.total_array_dimensions,
-                                               self.config)
+                                               self.config,
+                                               glbl_settings['field_cache'])
 
             # Get properties from field that apply to whole register
             for key in self.properties:
@@ -52,6 +53,7 @@ class Register(Component):
             # Perform sanity check
             self.children[field_range].sanity_checks()
 
+    @profile.timed('Register.create_rtl', 'Register')
     def create_rtl(self):
         # Create RTL of children
         if self.config['external']:
@@ -68,13 +70,16 @@ class Register(Component):
         # Add N layers of for-loop starts
         for i in range(self.own_dimensions):
             self.rtl_header.append(
-                Register.templ_dict['generate_for_start'].format(
-                    iterator = ''.join(['gv_', chr(97+i+self.parents_depths)]),
-                    limit = self.own_array_dimensions[i]))
+                Register.templ_dict['generate_for_start'].render(
+                    {'iterator': ''.join(['gv_', chr(97+i+self.parents_depths)]),
+                     'limit': self.own_array_dimensions[i]}))
 
         # Add decoders for all registers & aliases
         self.__add_address_decoder()
 
+        # Add clock enable (and clock gate) of the fields' flops
+        self.__add_clock_gate()
+
         # Fields will be added by get_rtl()
 
         # Add interrupt logic
@@ -86,8 +91,8 @@ class Register(Component):
         # Add N layers of for-loop end
         for i in range(self.own_dimensions-1, -1, -1):
             self.rtl_footer.append(
-                Register.templ_dict['generate_for_end'].format(
-                    dimension = ''.join(['gv_', chr(97+i)])))
+                Register.templ_dict['generate_for_end'].render(
+                    {'dimension': ''.join(['gv_', chr(97+i)])}))
 
         if self.own_dimensions and not self.generate_active:
             self.rtl_footer.append("\nendgenerate\n")
@@ -106,13 +111,46 @@ class Register(Component):
 
         # Create comment and provide user information about register he/she is looking at
         self.rtl_header = [
-            Register.templ_dict['reg_comment'].format(
-                name = self.obj.inst_name,
-                dimensions = self.own_dimensions,
-                depth = self.own_depth),
+            Register.templ_dict['reg_comment'].render(
+                {'name': self.obj.inst_name,
+                 'dimensions': self.own_dimensions,
+                 'depth': self.own_depth}),
                 *self.rtl_header
             ]
 
+    def __add_clock_gate(self):
+        # All fields that can be clock gated share one enable. The enable
+        # is set if at least one of the fields might change.
+        terms = dict.fromkeys(
+            term for field in self.children.values()
+                 for term in field.get_clock_gate_terms())
+
+        if not terms:
+            return
+
+        self.rtl_header.append(
+            self._process_yaml(
+                Register.templ_dict['clock_gate_enable'],
+                {'path': self.path_underscored,
+                 'genvars': self.genvars_str,
+                 'terms': ' || '.join(terms)
+                }
+            )
+        )
+
+        if self.config['clock_gating'] == 'icg':
+            self.rtl_header.append(
+                self._process_yaml(
+                    Register.templ_dict['clock_gate_cell'],
+                    {'path': self.path_underscored,
+                     'genvars': self.genvars_str,
+                    }
+                )
+            )
+
+        if self.is_log_enabled_for(logging.DEBUG):
+            self.logger.debug("Clock gated %i out of %i flops", *self.get_flop_count())
+
     def __add_interrupts(self):
         # Semantics on the intr and halt property:
         #   a) The intr and halt register properties are outputs; they should only
@@ -122,7 +160,7 @@ class Register(Component):
         #   c) The halt property shall only be present if haltmask or haltenable is
         #      specified on at least one field in the register.
         if self.properties['intr']:
-            self.rtl_footer.append(Register.templ_dict['interrupt_comment']['rtl'])
+            self.rtl_footer.append(Register.templ_dict['interrupt_comment'].render({}))
 
             self.rtl_footer.append(
                 self._process_yaml(
@@ -150,6 +188,7 @@ class Register(Component):
 
     def __add_sw_mux_assignments(self):
         accesswidth = self.obj.get_property('accesswidth') - 1
+        read_port = self.config['read_port']
         self.rtl_footer.append("")
 
         # Save name of main register
@@ -192,25 +231,56 @@ class Register(Component):
                     f"{{{empty_bits}{{1'b{self.glbl_settings['rsvd_val']}}}}}")
 
             # Create list of mux-inputs to later be picked up by carrying addrmap
-            self.sw_mux_assignment_var_name.append(
-                SWMuxEntry(
-                    data_wire = self._process_yaml(
-                        Register.templ_dict['sw_data_assignment_var_name'],
-                        {'path': na_map[0],
-                         'accesswidth': accesswidth}
-                    ),
-                    rdy_wire = self._process_yaml(
-                        Register.templ_dict['sw_rdy_assignment_var_name'],
-                        {'path': na_map[0]}
-                    ),
-                    err_wire = self._process_yaml(
-                        Register.templ_dict['sw_err_assignment_var_name'],
-                        {'path': na_map[0]}
-                    ),
-                    active_wire = f"{na_map[0]}_active",
-                )
+            data_wire = self._process_yaml(
+                Register.templ_dict['sw_data_assignment_var_name'],
+                {'path': na_map[0],
+                 'accesswidth': accesswidth}
+            )
+            rdy_wire = self._process_yaml(
+                Register.templ_dict['sw_rdy_assignment_var_name'],
+                {'path': na_map[0]}
+            )
+            err_wire = self._process_yaml(
+                Register.templ_dict['sw_err_assignment_var_name'],
+                {'path': na_map[0]}
             )
 
+            if read_port:
+                # Reads and writes have seperate responses. The responses to
+                # writes are picked up by a seperate multiplexer.
+                self.sw_mux_assignment_var_name.append(
+                    SWMuxEntry(
+                        data_wire = data_wire,
+                        rdy_wire = self._process_yaml(
+                            Register.templ_dict['sw_r_rdy_assignment_var_name'],
+                            {'path': na_map[0]}
+                        ),
+                        err_wire = self._process_yaml(
+                            Register.templ_dict['sw_r_err_assignment_var_name'],
+                            {'path': na_map[0]}
+                        ),
+                        active_wire = f"{na_map[0]}_r_active",
+                    )
+                )
+
+                self.sw_write_rsp_mux_var_name.append(
+                    SWMuxEntry(
+                        data_wire = None,
+                        rdy_wire = rdy_wire,
+                        err_wire = err_wire,
+                        active_wire = f"{na_map[0]}_active",
+                    )
+                )
+            else:
+                self.sw_mux_assignment_var_name.append(
+                    SWMuxEntry(
+                        data_wire = data_wire,
+                        rdy_wire = rdy_wire,
+                        err_wire = err_wire,
+                        active_wire = f"{na_map[0]}_active",
+                    )
+                )
+
             # Return an error if *no* read or *no* write can be succesful.
             # If some bits cannot be read/write but others are succesful, don't return
             # an error.
@@ -219,6 +289,9 @@ class Register(Component):
             if self.config['illegal_addresses']:
                 wdgt_str = 'widget_if.byte_en'
 
+                # Reads use the byte enables of the read port, if there is one
+                rd_wdgt_str = 'widget_if.r_byte_en' if read_port else wdgt_str
+
                 bytes_read_format = []
                 bytes_read_sorted = sorted(bytes_read, reverse = True)
 
@@ -232,12 +305,12 @@ class Register(Component):
                 for i in bytes_read_sorted[0:]:
                     if prev - i > 1:
                         bytes_read_format.append(
-                            f"|{wdgt_str}[{msb}:{prev}]" if msb > prev else f"{wdgt_str}[{msb}]")
+                            f"|{rd_wdgt_str}[{msb}:{prev}]" if msb > prev else f"{rd_wdgt_str}[{msb}]")
                         msb = i
 
                     if i == bytes_read_sorted[-1]:
                         bytes_read_format.append(
-                            f"|{wdgt_str}[{msb}:{i}]" if msb > i else f"{wdgt_str}[{msb}]")
+                            f"|{rd_wdgt_str}[{msb}:{i}]" if msb > i else f"{rd_wdgt_str}[{msb}]")
 
                     prev = i
 
@@ -263,22 +336,36 @@ class Register(Component):
 
                     prev = i
 
-                # Parse mux error-input
-                sw_err_condition_vec = []
-                sw_err_condition_vec.append(self._process_yaml(
-                        Register.templ_dict['sw_err_condition'],
-                        {'rd_byte_list_ored':
-                            ' || '.join(bytes_read_format) if bytes_read else "1'b0",
-                         'wr_byte_list_ored':
-                            ' || '.join(bytes_written_format) if bytes_written else "1'b0"}
-                    )
-                )
+                rd_byte_list_ored = ' || '.join(bytes_read_format) if bytes_read else "1'b0"
+                wr_byte_list_ored = ' || '.join(bytes_written_format) if bytes_written else "1'b0"
+
+                # Parse mux error-input. Without a read port, reads and writes
+                # share a single error condition.
+                if read_port:
+                    sw_r_err_condition_vec = [self._process_yaml(
+                            Register.templ_dict['sw_r_err_condition'],
+                            {'rd_byte_list_ored': rd_byte_list_ored}
+                        )
+                    ]
+                    sw_err_condition_vec = [self._process_yaml(
+                            Register.templ_dict['sw_w_err_condition'],
+                            {'wr_byte_list_ored': wr_byte_list_ored}
+                        )
+                    ]
+                else:
+                    sw_err_condition_vec = [self._process_yaml(
+                            Register.templ_dict['sw_err_condition'],
+                            {'rd_byte_list_ored': rd_byte_list_ored,
+                             'wr_byte_list_ored': wr_byte_list_ored}
+                        )
+                    ]
+                    sw_r_err_condition_vec = sw_err_condition_vec
 
                 if self.config['external']:
                     if bytes_read:
                         for field in self.children.values():
                             if na_map[0] in field.readable_by:
-                                sw_err_condition_vec.append(self._process_yaml(
+                                sw_r_err_condition_vec.append(self._process_yaml(
                                         Register.templ_dict['external_err_condition'],
                                         {'path': '__'.join([main_reg_name, field.name]),
                                          'genvars': self.genvars_str,
@@ -297,74 +384,88 @@ class Register(Component):
                                     )
                                 )
 
+                sw_r_err_condition = ' || '.join(sw_r_err_condition_vec)
                 sw_err_condition = ' || '.join(sw_err_condition_vec)
             else:
+                sw_r_err_condition = "1'b0"
                 sw_err_condition = "1'b0"
 
             # If registers are implemented in RTL, they will be ready immediately. However,
             # if they are defined as 'external', there might be some delay
-            if self.config['external']:
-                if bytes_read:
-                    sw_rdy_condition_vec = ['(']
-
-                    for field in self.children.values():
-                        sw_rdy_condition_vec.append(self._process_yaml(
-                                Register.templ_dict['external_rdy_condition'],
-                                {'path': '__'.join([main_reg_name, field.name]),
-                                 'genvars': self.genvars_str,
-                                 'rd_or_wr': 'r'}
-                            )
-                        )
-
-                        sw_rdy_condition_vec.append(' && ')
-
-                    sw_rdy_condition_vec.pop()
-                    sw_rdy_condition_vec.append(' && widget_if.r_vld)')
+            sw_rdy_conditions = {}
 
-                if bytes_read and bytes_written:
-                    sw_rdy_condition_vec.append(' || ')
-
-                if bytes_written:
-                    sw_rdy_condition_vec.append('(')
-
-                    for field in self.children.values():
-                        sw_rdy_condition_vec.append(self._process_yaml(
-                                Register.templ_dict['external_rdy_condition'],
-                                {'path': '__'.join([main_reg_name, field.name]),
-                                 'genvars': self.genvars_str,
-                                 'rd_or_wr': 'w'}
-                            )
-                        )
-
-                        sw_rdy_condition_vec.append(' && ')
-
-                    sw_rdy_condition_vec.pop()
-                    sw_rdy_condition_vec.append(' && widget_if.w_vld)')
+            if self.config['external']:
+                for rd_or_wr, bytes_accessed in (('r', bytes_read), ('w', bytes_written)):
+                    if not bytes_accessed:
+                        continue
+
+                    acks = ' && '.join(
+                        [self._process_yaml(
+                            Register.templ_dict['external_rdy_condition'],
+                            {'path': '__'.join([main_reg_name, field.name]),
+                             'genvars': self.genvars_str,
+                             'rd_or_wr': rd_or_wr}
+                         )
+                         for field in self.children.values()])
 
-                sw_rdy_condition = ''.join(sw_rdy_condition_vec)
-            else:
-                sw_rdy_condition = "1'b1"
+                    sw_rdy_conditions[rd_or_wr] = f"({acks} && widget_if.{rd_or_wr}_vld)"
 
             # Assign all values
-            self.rtl_footer.append(
-                self._process_yaml(
-                    Register.templ_dict['sw_data_assignment'],
-                    {'sw_data_assignment_var_name': self.sw_mux_assignment_var_name[-1].data_wire,
-                     'sw_rdy_assignment_var_name': self.sw_mux_assignment_var_name[-1].rdy_wire,
-                     'sw_err_assignment_var_name': self.sw_mux_assignment_var_name[-1].err_wire,
-                     'genvars': self.genvars_str if not no_reads else '',
-                     'rdy_condition': sw_rdy_condition,
-                     'err_condition': sw_err_condition,
-                     'alias_indicator': '(alias)' if alias_idx > 0 else '',
-                     'list_of_fields': ', '.join(reversed(list_of_fields))}
+            if read_port:
+                self.rtl_footer.append(
+                    self._process_yaml(
+                        Register.templ_dict['sw_data_assignment_read_port'],
+                        {'sw_data_assignment_var_name': self.sw_mux_assignment_var_name[-1].data_wire,
+                         'sw_r_rdy_assignment_var_name': self.sw_mux_assignment_var_name[-1].rdy_wire,
+                         'sw_r_err_assignment_var_name': self.sw_mux_assignment_var_name[-1].err_wire,
+                         'sw_rdy_assignment_var_name': rdy_wire,
+                         'sw_err_assignment_var_name': err_wire,
+                         'genvars': self.genvars_str if not no_reads else '',
+                         'r_rdy_condition': sw_rdy_conditions.get('r', "1'b1"),
+                         'rdy_condition': sw_rdy_conditions.get('w', "1'b1"),
+                         'r_err_condition': sw_r_err_condition,
+                         'err_condition': sw_err_condition,
+                         'alias_indicator': '(alias)' if alias_idx > 0 else '',
+                         'list_of_fields': ', '.join(reversed(list_of_fields))}
+                    )
+                )
+            else:
+                self.rtl_footer.append(
+                    self._process_yaml(
+                        Register.templ_dict['sw_data_assignment'],
+                        {'sw_data_assignment_var_name': data_wire,
+                         'sw_rdy_assignment_var_name': rdy_wire,
+                         'sw_err_assignment_var_name': err_wire,
+                         'genvars': self.genvars_str if not no_reads else '',
+                         'rdy_condition': ' || '.join(sw_rdy_conditions.values()) or "1'b1",
+                         'err_condition': sw_err_condition,
+                         'alias_indicator': '(alias)' if alias_idx > 0 else '',
+                         'list_of_fields': ', '.join(reversed(list_of_fields))}
+                    )
                 )
-            )
 
     def create_mux_string(self):
-        for mux_entry in self.sw_mux_assignment_var_name:
+        yield from self.__create_mux_entries(self.sw_mux_assignment_var_name)
+
+    def create_write_rsp_mux_string(self):
+        yield from self.__create_mux_entries(self.sw_write_rsp_mux_var_name)
+
+    def __create_mux_entries(self, mux_entries: list):
+        for mux_entry, name_addr_map in zip(mux_entries, self.name_addr_mappings):
             # Loop through lowest dimension and add stride of higher
             # dimension once everything is processed
-            if self.total_array_dimensions:
+            if self.total_array_dimensions and self.config['read_mux_arrays'] == 'indexed':
+                # The carrying addrmap selects the active element of the array
+                yield (
+                    SWMuxEntryDimensioned(
+                        mux_entry = mux_entry,
+                        dim = '',
+                        array_dimensions = self.total_array_dimensions,
+                        array_strides = self.total_stride,
+                        array_address = name_addr_map[1]
+                    )
+                )
+            elif self.total_array_dimensions:
                 vec = [0]*len(self.total_array_dimensions)
 
                 for dimension in Register.__eval_genvars(vec, 0, self.total_array_dimensions):
@@ -395,11 +496,28 @@ class Register(Component):
         vec[depth] = 0
 
     def __add_address_decoder(self):
-        if self.total_dimensions:
+        # Within the region of a regfile, only the lower bits of the
+        # address must be compared
+        if self.decode_region:
+            region_mask = (1 << self.decode_region.addr_bits) - 1
+
+            if self.total_dimensions:
+                access_wire_assign_field = 'access_wire_assign_region_multi_dim'
+            else:
+                access_wire_assign_field = 'access_wire_assign_region_1_dim'
+        elif self.total_dimensions:
             access_wire_assign_field = 'access_wire_assign_multi_dim'
         else:
             access_wire_assign_field = 'access_wire_assign_1_dim'
 
+        # With a read port, reads are decoded from the address of that port
+        if self.config['read_port']:
+            prefixes = ('', 'r_')
+        else:
+            prefixes = ('',)
+
+        read_prefix = prefixes[-1]
+
         for i, name_addr_map in enumerate(self.name_addr_mappings):
             self.rtl_header.append(
                 self._process_yaml(
@@ -410,17 +528,34 @@ class Register(Component):
                 )
             )
 
-            self.rtl_header.append(
-                self._process_yaml(
-                    Register.templ_dict[access_wire_assign_field],
-                    {'path': name_addr_map[0],
-                     'addr': name_addr_map[1],
-                     'genvars': self.genvars_str,
-                     'genvars_sum': self.genvars_sum_str,
-                     'depth': self.own_depth,
-                    }
+            if self.decode_region and not self.total_dimensions:
+                addr = name_addr_map[1] & region_mask
+            else:
+                addr = name_addr_map[1]
+
+            for prefix in prefixes:
+                if not self.decode_region:
+                    region_sel = ''
+                elif prefix:
+                    region_sel = self.decode_region.r_sel
+                else:
+                    region_sel = self.decode_region.sel
+
+                self.rtl_header.append(
+                    self._process_yaml(
+                        Register.templ_dict[access_wire_assign_field],
+                        {'path': name_addr_map[0],
+                         'prefix': prefix,
+                         'addr': addr,
+                         'genvars': self.genvars_str,
+                         'genvars_sum': self.genvars_sum_str,
+                         'depth': self.own_depth,
+                         'region_sel': region_sel,
+                         'region_msb': self.decode_region.addr_bits-1 if self.decode_region else '',
+                         'region_bits': self.decode_region.addr_bits if self.decode_region else '',
+                        }
+                    )
                 )
-            )
 
             # A wire that indicates a read is required
             if self.properties['sw_rd_wire']:
@@ -431,6 +566,7 @@ class Register(Component):
                         self._process_yaml(
                             Register.templ_dict['read_wire_assign'],
                             {'path': name_addr_map[0],
+                             'prefix': read_prefix,
                              'addr': name_addr_map[1],
                              'genvars': self.genvars_str,
                              'genvars_sum': self.genvars_sum_str,
@@ -514,15 +650,15 @@ class Register(Component):
         signal_width = max(max([len(value.datatype) for (_, value) in dict_list]), 12)
         name_width = max([len(key) for (key, _) in dict_list])
 
-        return [Register.templ_dict['signal_declaration'].format(
-                   name = key,
-                   type = value.datatype,
-                   signal_width = signal_width,
-                   name_width = name_width,
-                   unpacked_dim = '[{}]'.format(
-                       ']['.join(
-                           [str(y) for y in value.dim]))
-                       if value.dim else '')
+        return [Register.templ_dict['signal_declaration'].render(
+                   {'name': key,
+                    'type': value.datatype,
+                    'signal_width': signal_width,
+                    'name_width': name_width,
+                    'unpacked_dim': '[{}]'.format(
+                        ']['.join(
+                            [str(y) for y in value.dim]))
+                        if value.dim else ''})
                for (key, value) in dict_list]
 
     def add_alias(self, obj: node.RegNode):
@@ -547,7 +683,8 @@ class Register(Component):
 
         # Add name to list
         self.name_addr_mappings.append(
-            (self.create_underscored_path_static(obj)[3], obj.absolute_address))
+            (self.create_underscored_path_static(obj, self.config.get('scope'))[3],
+             self.get_address(obj)))
 
     def __init_variables(self, glbl_settings: dict):
         self.obj.current_idx = [0]
@@ -555,20 +692,28 @@ class Register(Component):
         # Save global settings
         self.glbl_settings = glbl_settings
 
-        # Is this an external register?
-        self.config['external'] = self.obj.external
+        # Is this an external register? The configuration is shared with
+        # the parent, so the register gets its own copy.
+        self.config = {**self.config, 'external': self.obj.external}
 
         # Create mapping between (alias-) name and address
         self.name_addr_mappings = [
-            (self.create_underscored_path_static(self.obj)[3], self.obj.absolute_address)
+            (self.create_underscored_path_static(self.obj, self.config.get('scope'))[3],
+             self.get_address(self.obj))
             ]
 
         # Geneate already started?
         self.generate_active = glbl_settings['generate_active']
 
+        # Region of the address decoder this register belongs to
+        self.decode_region = glbl_settings['decode_region']
+
         # Empty array for mux-input signals
         self.sw_mux_assignment_var_name = []
 
+        # With a read port, the responses to writes have their own multiplexer
+        self.sw_write_rsp_mux_var_name = []
+
     def __init_genvars(self):
         super()._init_genvars()
 
@@ -583,16 +728,19 @@ class Register(Component):
 
             genvars_sum.pop()
 
-            self.logger.debug(
-                "Multidimensional with dimensions '%s' and stride '%s'",
-                self.total_array_dimensions, self.total_stride)
+            if self.is_log_enabled_for(logging.DEBUG):
+                self.logger.debug(
+                    "Multidimensional with dimensions '%s' and stride '%s'",
+                    self.total_array_dimensions, self.total_stride)
 
         except TypeError:
-            self.logger.debug(
-                "Caught expected TypeError because self.total_stride is empty")
+            if self.is_log_enabled_for(logging.DEBUG):
+                self.logger.debug(
+                    "Caught expected TypeError because self.total_stride is empty")
         except IndexError:
-            self.logger.debug(
-                "Caugt expected IndexError because genvars_sum is empty")
+            if self.is_log_enabled_for(logging.DEBUG):
+                self.logger.debug(
+                    "Caugt expected IndexError because genvars_sum is empty")
 
         self.genvars_sum_str = ''.join(genvars_sum)
 
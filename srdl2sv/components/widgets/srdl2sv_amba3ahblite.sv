@@ -307,5 +307,9 @@ module srdl2sv_amba3ahblite #(
     end
     endgenerate
 
+    // The registers do not have a read port
+    assign widget_if.r_addr    = widget_if.addr;
+    assign widget_if.r_byte_en = widget_if.byte_en;
+
 endmodule
 
@@ -0,0 +1,214 @@
+/*
+ * Copyright 2021 Dennis Potter <dennis@dennispotter.eu>
+ * 
+ * Permission is hereby granted, free of charge, to any person 
+ * obtaining a copy of this software and associated documentation
+ * files (the "Software"), to deal in the Software without 
+ * restriction, including without limitation the rights to use, 
+ * copy, modify, merge, publish, distribute, sublicense, and/or 
+ * sell copies of the Software, and to permit persons to whom the
+ * Software is furnished to do so, subject to the following 
+ * conditions:
+ * 
+ * The above copyright notice and this permission notice shall be
+ * included in all copies or substantial portions of the Software.
+ * 
+ * THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+ * EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+ * OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+ * NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+ * HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+ * WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING 
+ * FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+ * OTHER DEALINGS IN THE SOFTWARE.
+ */
+
+/*
+ * Pipelined variant of srdl2sv_amba3ahblite
+ *
+ * The address phase of a transfer is accepted in the same cycle as the
+ * data phase of the previous transfer. The access to the registers is
+ * performed in the data phase, so internal registers, which are ready
+ * in the same cycle, complete every NONSEQ or SEQ transfer without wait
+ * states. Back-to-back transfers are thus performed at one transfer per
+ * cycle.
+ */
+module srdl2sv_amba3ahblite_pipelined #(
+    parameter     BUS_BITS         = 32,
+    parameter     NO_BYTE_ENABLE   = 0
+)
+(
+    // Bus protocol
+    input                       HCLK,
+    input                       HRESETn,
+    input                       HSEL,
+    input  [31:0]               HADDR,
+    input                       HWRITE,
+    input  [ 2:0]               HSIZE,
+    input  [ 3:0]               HPROT, // Might be used in the future together with an RDL UDP
+    input  [ 1:0]               HTRANS,
+    input  [BUS_BITS-1:0]       HWDATA,
+
+    output logic                HREADYOUT,
+    output logic                HRESP,
+    output logic [BUS_BITS-1:0] HRDATA,
+
+    // Interface to internal logic
+    srdl2sv_widget_if.widget    widget_if
+);
+
+    localparam BUS_BYTES = BUS_BITS/8;
+    localparam BUS_BYTES_W = $clog2(BUS_BYTES);
+
+    /***********************
+     * Define enums 
+     ***********************/
+    typedef enum logic [1:0] {
+        IDLE   = 2'b00,
+        BUSY   = 2'b01,
+        NONSEQ = 2'b10,
+        SEQ    = 2'b11
+    } HTRANS_t;
+
+    typedef enum logic {
+        OKAY   = 1'b0,
+        ERROR  = 1'b1
+    } HRESP_t;
+
+    typedef enum logic {
+        READ   = 1'b0,
+        WRITE  = 1'b1
+    } OP_t;
+
+    /****************************
+     * Address phase
+     ****************************/
+    // IDLE and BUSY transfers are ignored and get a zero wait state OKAY
+    // response. SEQ transfers are treated like NONSEQ transfers since the
+    // address of every beat is provided on HADDR.
+    wire trans_req = HSEL && (HTRANS == NONSEQ || HTRANS == SEQ);
+    wire addr_err  = HADDR % (32'b1 << HSIZE) != 32'b0; 
+
+    logic        data_phase_q;
+    logic        addr_err_q;
+    logic [31:0] HADDR_q;
+    logic [2:0]  HSIZE_q;
+    OP_t         operation_q;
+
+    // When a transfer is extended it has the side-effect of extending
+    // the address phase of the next transfer. Thus, the address phase
+    // is only sampled if HREADYOUT is high.
+    always_ff @ (posedge HCLK or negedge HRESETn)
+        if (!HRESETn)
+            data_phase_q <= 1'b0;
+        else if (HREADYOUT)
+            data_phase_q <= trans_req;
+
+    always_ff @ (posedge HCLK)
+        if (HREADYOUT && trans_req)
+        begin
+            HADDR_q     <= HADDR;
+            HSIZE_q     <= HSIZE;
+            operation_q <= HWRITE ? WRITE : READ;
+            addr_err_q  <= addr_err;
+        end
+
+    /****************************
+     * Data phase
+     ****************************/
+    logic                err_q;
+    logic                trans_err;
+    logic                widget_if_vld;
+    logic [BUS_BITS-1:0] HRDATA_temp;
+
+    always_comb
+    begin
+        // When reading back, the data of the bit that was accessed over the bus
+        // should be at byte 0 of the HRDATA bus and bits that were not accessed
+        // should be masked with 0s.
+        HRDATA_temp = widget_if.r_data >> (8*HADDR_q[BUS_BYTES_W-1:0]);
+
+        for (int i = 0; i < BUS_BYTES; i++)
+            if (i < (1 << HSIZE_q))
+                HRDATA[8*(i+1)-1 -: 8] = HRDATA_temp[8*(i+1)-1 -: 8];
+            else
+                HRDATA[8*(i+1)-1 -: 8] = 8'b0;
+
+        // Misaligned transfers never access the registers. If the second
+        // cycle of an ERROR response is active, the access already happened.
+        widget_if_vld = data_phase_q && !addr_err_q && !err_q;
+
+        // First cycle of an ERROR response
+        trans_err = data_phase_q && !err_q
+                 && (addr_err_q || (widget_if.rdy && widget_if.err));
+
+        if (err_q)
+        begin
+            // Second cycle of an ERROR response. The address phase of the
+            // next transfer is sampled in this cycle.
+            HREADYOUT = 1'b1;
+            HRESP     = ERROR;
+        end
+        else if (trans_err)
+        begin
+            HREADYOUT = 1'b0;
+            HRESP     = ERROR;
+        end
+        else if (widget_if_vld)
+        begin
+            // Internal registers are ready in the same cycle, external
+            // registers may insert wait states.
+            HREADYOUT = widget_if.rdy;
+            HRESP     = OKAY;
+        end
+        else
+        begin
+            HREADYOUT = 1'b1;
+            HRESP     = OKAY;
+        end
+    end
+
+    always_ff @ (posedge HCLK or negedge HRESETn)
+        if (!HRESETn)
+            err_q <= 1'b0;
+        else
+            err_q <= trans_err;
+
+    /***
+     * Determine the number of active bytes
+     ***/
+    logic [BUS_BYTES-1:0] HSIZE_bitfielded;
+    logic [BUS_BYTES-1:0] widget_if_byte_en;
+
+    generate
+    if (NO_BYTE_ENABLE)
+    begin
+        assign widget_if_byte_en = {BUS_BYTES{1'b1}}; 
+    end
+    else
+    begin
+        always_comb
+        begin
+            for (int i = 0; i < BUS_BYTES; i++)
+                HSIZE_bitfielded[i] = i < (1 << HSIZE_q);
+
+            // Shift if not the full bus is accessed
+            widget_if_byte_en = HSIZE_bitfielded << (HADDR_q % BUS_BYTES);
+        end
+    end
+    endgenerate
+
+    /***
+     * Drive interface to registers
+     ***/
+    assign widget_if.w_vld   = widget_if_vld && operation_q == WRITE;
+    assign widget_if.r_vld   = widget_if_vld && operation_q == READ;
+    assign widget_if.addr    = {HADDR_q[31:BUS_BYTES_W], {BUS_BYTES_W{1'b0}}};
+    assign widget_if.w_data  = HWDATA << (8*HADDR_q[BUS_BYTES_W-1:0]);
+    assign widget_if.byte_en = widget_if_byte_en;
+
+    // The registers do not have a read port
+    assign widget_if.r_addr    = widget_if.addr;
+    assign widget_if.r_byte_en = widget_if.byte_en;
+
+endmodule
@@ -0,0 +1,420 @@
+/*
+ * Copyright 2021 Dennis Potter <dennis@dennispotter.eu>
+ * 
+ * Permission is hereby granted, free of charge, to any person 
+ * obtaining a copy of this software and associated documentation
+ * files (the "Software"), to deal in the Software without 
+ * restriction, including without limitation the rights to use, 
+ * copy, modify, merge, publish, distribute, sublicense, and/or 
+ * sell copies of the Software, and to permit persons to whom the
+ * Software is furnished to do so, subject to the following 
+ * conditions:
+ * 
+ * The above copyright notice and this permission notice shall be
+ * included in all copies or substantial portions of the Software.
+ * 
+ * THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+ * EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+ * OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+ * NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+ * HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+ * WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING 
+ * FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+ * OTHER DEALINGS IN THE SOFTWARE.
+ */
+
+/*
+ * AMBA 4 AXI4-Lite widget
+ *
+ * The read address (AR), write address (AW), and write data (W) channels
+ * are independent and can all be accepted in the same cycle. If READ_PORT
+ * is set, reads are forwarded to the read port of the widget interface and
+ * writes to its write port, so that the registers serve a read and a write
+ * in the same cycle. Otherwise, an arbiter forwards reads and writes to the
+ * registers. If a read and a write are pending at the same time, they are
+ * then served in alternating order.
+ *
+ * OUTSTANDING sets the depth of the read (R) and write response (B)
+ * buffers, i.e., the number of responses that can wait for RREADY and
+ * BREADY, respectively. With SKID_BUFFERS set, the AR, AW, and W channels
+ * are registered, so that ARREADY, AWREADY, and WREADY do not depend
+ * combinationally on the registers.
+ */
+module srdl2sv_axi4lite #(
+    parameter     ADDR_W           = 32,
+    parameter     BUS_BITS         = 32,
+    parameter     NO_BYTE_ENABLE   = 0,
+    parameter     OUTSTANDING      = 2,
+    parameter bit SKID_BUFFERS     = 1,
+    parameter bit READ_PORT        = 1
+)
+(
+    // Bus protocol
+    input                         ACLK,
+    input                         ARESETn,
+
+    input                         AWVALID,
+    output logic                  AWREADY,
+    input  [ADDR_W-1:0]           AWADDR,
+    input  [ 2:0]                 AWPROT, // Might be used in the future together with an RDL UDP
+
+    input                         WVALID,
+    output logic                  WREADY,
+    input  [BUS_BITS-1:0]         WDATA,
+    input  [BUS_BITS/8-1:0]       WSTRB,
+
+    output logic                  BVALID,
+    input                         BREADY,
+    output logic [ 1:0]           BRESP,
+
+    input                         ARVALID,
+    output logic                  ARREADY,
+    input  [ADDR_W-1:0]           ARADDR,
+    input  [ 2:0]                 ARPROT, // Might be used in the future together with an RDL UDP
+
+    output logic                  RVALID,
+    input                         RREADY,
+    output logic [BUS_BITS-1:0]   RDATA,
+    output logic [ 1:0]           RRESP,
+
+    // Interface to internal logic
+    srdl2sv_widget_if.widget      widget_if
+);
+
+    localparam BUS_BYTES = BUS_BITS/8;
+    localparam BUS_BYTES_W = $clog2(BUS_BYTES);
+
+    /***********************
+     * Define enums 
+     ***********************/
+    typedef enum logic [1:0] {
+        OKAY   = 2'b00,
+        EXOKAY = 2'b01,
+        SLVERR = 2'b10,
+        DECERR = 2'b11
+    } RESP_t;
+
+    typedef enum logic {
+        READ   = 1'b0,
+        WRITE  = 1'b1
+    } OP_t;
+
+    /****************************
+     * Request channels
+     ****************************/
+    logic                ar_vld;
+    logic                ar_rdy;
+    logic [ADDR_W-1:0]   ar_addr;
+
+    logic                aw_vld;
+    logic                aw_rdy;
+    logic [ADDR_W-1:0]   aw_addr;
+
+    logic                w_vld;
+    logic                w_rdy;
+    logic [BUS_BITS-1:0] w_data;
+    logic [BUS_BYTES-1:0] w_strb;
+
+    srdl2sv_axi4lite_skid_buffer
+        #(.WIDTH  (ADDR_W),
+          .ENABLE (SKID_BUFFERS))
+    ar_skid_buffer_inst
+        (.clk    (ACLK),
+         .rst_n  (ARESETn),
+         .s_vld  (ARVALID),
+         .s_rdy  (ARREADY),
+         .s_data (ARADDR),
+         .m_vld  (ar_vld),
+         .m_rdy  (ar_rdy),
+         .m_data (ar_addr));
+
+    srdl2sv_axi4lite_skid_buffer
+        #(.WIDTH  (ADDR_W),
+          .ENABLE (SKID_BUFFERS))
+    aw_skid_buffer_inst
+        (.clk    (ACLK),
+         .rst_n  (ARESETn),
+         .s_vld  (AWVALID),
+         .s_rdy  (AWREADY),
+         .s_data (AWADDR),
+         .m_vld  (aw_vld),
+         .m_rdy  (aw_rdy),
+         .m_data (aw_addr));
+
+    srdl2sv_axi4lite_skid_buffer
+        #(.WIDTH  (BUS_BITS + BUS_BYTES),
+          .ENABLE (SKID_BUFFERS))
+    w_skid_buffer_inst
+        (.clk    (ACLK),
+         .rst_n  (ARESETn),
+         .s_vld  (WVALID),
+         .s_rdy  (WREADY),
+         .s_data ({WDATA, WSTRB}),
+         .m_vld  (w_vld),
+         .m_rdy  (w_rdy),
+         .m_data ({w_data, w_strb}));
+
+    /****************************
+     * Response channels
+     ****************************/
+    logic r_push;
+    logic r_push_rdy;
+    logic r_push_err;
+    logic b_push;
+    logic b_push_rdy;
+    logic b_push_err;
+
+    srdl2sv_axi4lite_fifo
+        #(.WIDTH (BUS_BITS + 2),
+          .DEPTH (OUTSTANDING))
+    r_fifo_inst
+        (.clk       (ACLK),
+         .rst_n     (ARESETn),
+         .push      (r_push),
+         .push_data ({widget_if.r_data, r_push_err ? SLVERR : OKAY}),
+         .push_rdy  (r_push_rdy),
+         .pop_vld   (RVALID),
+         .pop       (RREADY),
+         .pop_data  ({RDATA, RRESP}));
+
+    srdl2sv_axi4lite_fifo
+        #(.WIDTH (2),
+          .DEPTH (OUTSTANDING))
+    b_fifo_inst
+        (.clk       (ACLK),
+         .rst_n     (ARESETn),
+         .push      (b_push),
+         .push_data (b_push_err ? SLVERR : OKAY),
+         .push_rdy  (b_push_rdy),
+         .pop_vld   (BVALID),
+         .pop       (BREADY),
+         .pop_data  (BRESP));
+
+    // A request is only forwarded if there is space for its response
+    wire rd_req = ar_vld && r_push_rdy;
+    wire wr_req = aw_vld && w_vld && b_push_rdy;
+
+    generate
+    if (READ_PORT)
+    begin
+        /****************************
+         * Seperate read port
+         ****************************/
+        assign widget_if.r_vld     = rd_req;
+        assign widget_if.r_addr    = {ar_addr[ADDR_W-1:BUS_BYTES_W], {BUS_BYTES_W{1'b0}}};
+
+        // Reads always return the complete data bus
+        assign widget_if.r_byte_en = {BUS_BYTES{1'b1}};
+
+        assign widget_if.w_vld     = wr_req;
+        assign widget_if.addr      = {aw_addr[ADDR_W-1:BUS_BYTES_W], {BUS_BYTES_W{1'b0}}};
+        assign widget_if.w_data    = w_data;
+        assign widget_if.byte_en   = NO_BYTE_ENABLE ? {BUS_BYTES{1'b1}} : w_strb;
+
+        assign r_push              = widget_if.r_vld && widget_if.r_rdy;
+        assign r_push_err          = widget_if.r_err;
+        assign b_push              = widget_if.w_vld && widget_if.rdy;
+        assign b_push_err          = widget_if.err;
+    end
+    else
+    begin
+        /****************************
+         * Arbitration
+         ****************************/
+        OP_t  grant;
+        OP_t  grant_q;
+        OP_t  last_grant_q;
+        logic busy_q;
+
+        always_comb
+        begin
+            if (busy_q)
+                // The registers did not yet complete the previous request.
+                // The request must be kept stable until it is completed.
+                grant = grant_q;
+            else if (rd_req && wr_req)
+                grant = last_grant_q == READ ? WRITE : READ;
+            else if (wr_req)
+                grant = WRITE;
+            else
+                grant = READ;
+        end
+
+        always_ff @ (posedge ACLK or negedge ARESETn)
+            if (!ARESETn)
+            begin
+                busy_q       <= 1'b0;
+                grant_q      <= READ;
+                last_grant_q <= WRITE;
+            end
+            else
+            begin
+                busy_q  <= (widget_if.r_vld || widget_if.w_vld) && !widget_if.rdy;
+                grant_q <= grant;
+
+                if ((widget_if.r_vld || widget_if.w_vld) && widget_if.rdy)
+                    last_grant_q <= grant;
+            end
+
+        /***
+         * Drive interface to registers
+         ***/
+        logic [ADDR_W-1:0] addr;
+
+        assign addr              = grant == WRITE ? aw_addr : ar_addr;
+
+        assign widget_if.r_vld   = grant == READ && rd_req;
+        assign widget_if.w_vld   = grant == WRITE && wr_req;
+        assign widget_if.addr    = {addr[ADDR_W-1:BUS_BYTES_W], {BUS_BYTES_W{1'b0}}};
+        assign widget_if.w_data  = w_data;
+
+        // Reads always return the complete data bus
+        assign widget_if.byte_en = NO_BYTE_ENABLE || grant == READ ? {BUS_BYTES{1'b1}} : w_strb;
+
+        // The registers do not have a read port
+        assign widget_if.r_addr    = widget_if.addr;
+        assign widget_if.r_byte_en = widget_if.byte_en;
+
+        assign r_push            = widget_if.r_vld && widget_if.rdy;
+        assign r_push_err        = widget_if.err;
+        assign b_push            = widget_if.w_vld && widget_if.rdy;
+        assign b_push_err        = widget_if.err;
+    end
+    endgenerate
+
+    assign ar_rdy = r_push;
+    assign aw_rdy = b_push;
+    assign w_rdy  = b_push;
+
+endmodule
+
+/*
+ * Skid buffer
+ *
+ * If ENABLE is set, the data and valid on the master side as well as the
+ * ready on the slave side are driven by flip-flops without reducing the
+ * throughput. Otherwise, the skid buffer is a feedthrough.
+ */
+module srdl2sv_axi4lite_skid_buffer #(
+    parameter     WIDTH  = 1,
+    parameter bit ENABLE = 1
+)
+(
+    input                    clk,
+    input                    rst_n,
+
+    input                    s_vld,
+    output logic             s_rdy,
+    input        [WIDTH-1:0] s_data,
+
+    output logic             m_vld,
+    input                    m_rdy,
+    output logic [WIDTH-1:0] m_data
+);
+
+    generate
+    if (ENABLE)
+    begin
+        logic             out_vld_q;
+        logic [WIDTH-1:0] out_data_q;
+        logic             skid_vld_q;
+        logic [WIDTH-1:0] skid_data_q;
+
+        assign s_rdy  = !skid_vld_q;
+        assign m_vld  = out_vld_q;
+        assign m_data = out_data_q;
+
+        always_ff @ (posedge clk or negedge rst_n)
+            if (!rst_n)
+            begin
+                out_vld_q  <= 1'b0;
+                skid_vld_q <= 1'b0;
+            end
+            else if (m_rdy || !out_vld_q)
+            begin
+                // The output register is empty or is emptied in this cycle.
+                // The skid register has priority, since it contains the
+                // older request.
+                out_vld_q  <= skid_vld_q || s_vld;
+                skid_vld_q <= 1'b0;
+            end
+            else if (s_vld && s_rdy)
+                // The output register is stalled, save the request in the
+                // skid register.
+                skid_vld_q <= 1'b1;
+
+        always_ff @ (posedge clk)
+            if (m_rdy || !out_vld_q)
+                out_data_q <= skid_vld_q ? skid_data_q : s_data;
+            else if (s_vld && s_rdy)
+                skid_data_q <= s_data;
+    end
+    else
+    begin
+        assign s_rdy  = m_rdy;
+        assign m_vld  = s_vld;
+        assign m_data = s_data;
+    end
+    endgenerate
+
+endmodule
+
+/*
+ * Response buffer
+ *
+ * A FIFO with DEPTH entries. If the FIFO is full, a new entry can be
+ * pushed in the same cycle as the oldest entry is popped.
+ */
+module srdl2sv_axi4lite_fifo #(
+    parameter WIDTH = 1,
+    parameter DEPTH = 2
+)
+(
+    input                    clk,
+    input                    rst_n,
+
+    input                    push,
+    input        [WIDTH-1:0] push_data,
+    output logic             push_rdy,
+
+    output logic             pop_vld,
+    input                    pop,
+    output logic [WIDTH-1:0] pop_data
+);
+
+    localparam PTR_W = DEPTH > 1 ? $clog2(DEPTH) : 1;
+
+    logic [WIDTH-1:0] entries_q [DEPTH];
+    logic [PTR_W-1:0] wr_ptr_q;
+    logic [PTR_W-1:0] rd_ptr_q;
+    logic [PTR_W:0]   cnt_q;
+
+    wire pop_act = pop && pop_vld;
+
+    assign pop_vld  = cnt_q != 0;
+    assign push_rdy = cnt_q != DEPTH || pop_act;
+    assign pop_data = entries_q[rd_ptr_q];
+
+    always_ff @ (posedge clk or negedge rst_n)
+        if (!rst_n)
+        begin
+            wr_ptr_q <= '0;
+            rd_ptr_q <= '0;
+            cnt_q    <= '0;
+        end
+        else
+        begin
+            if (push)
+                wr_ptr_q <= wr_ptr_q == PTR_W'(DEPTH-1) ? '0 : wr_ptr_q + 1'b1;
+
+            if (pop_act)
+                rd_ptr_q <= rd_ptr_q == PTR_W'(DEPTH-1) ? '0 : rd_ptr_q + 1'b1;
+
+            cnt_q <= cnt_q + (PTR_W+1)'(push) - (PTR_W+1)'(pop_act);
+        end
+
+    always_ff @ (posedge clk)
+        if (push)
+            entries_q[wr_ptr_q] <= push_data;
+
+endmodule
@@ -0,0 +1,54 @@
+/*
+ * Copyright 2021 Dennis Potter <dennis@dennispotter.eu>
+ * 
+ * Permission is hereby granted, free of charge, to any person 
+ * obtaining a copy of this software and associated documentation
+ * files (the "Software"), to deal in the Software without 
+ * restriction, including without limitation the rights to use, 
+ * copy, modify, merge, publish, distribute, sublicense, and/or 
+ * sell copies of the Software, and to permit persons to whom the
+ * Software is furnished to do so, subject to the following 
+ * conditions:
+ * 
+ * The above copyright notice and this permission notice shall be
+ * included in all copies or substantial portions of the Software.
+ * 
+ * THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+ * EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+ * OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+ * NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+ * HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+ * WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING 
+ * FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+ * OTHER DEALINGS IN THE SOFTWARE.
+ */
+
+/*
+ * Behavioral model of an integrated clock gating cell
+ *
+ * The enable is latched while the clock is low, so that the gated clock
+ * does not glitch if the enable changes while the clock is high. The
+ * gated clock only pulses in cycles in which the enable was set before
+ * the rising edge of the clock.
+ *
+ * For synthesis, replace the body of this module by an instance of the
+ * clock gating cell of the target library. Such cells usually have an
+ * additional test enable, which should be connected to the scan enable
+ * of the design.
+ */
+module srdl2sv_clock_gate
+(
+    input       clk,
+    input       en,
+    output      gclk
+);
+
+    logic en_latched;
+
+    always_latch
+    if (!clk)
+        en_latched <= en;
+
+    assign gclk = clk && en_latched;
+
+endmodule
@@ -15,15 +15,27 @@ interface srdl2sv_widget_if #(
     logic                   rdy;
     logic                   err;
 
+    // Seperate read port. If the registers have a read port, reads use
+    // these signals instead of addr, byte_en, rdy, and err, so that a read
+    // and a write can be served in the same cycle.
+    logic [ADDR_W-1:0]      r_addr;
+    logic [DATA_BYTES-1:0]  r_byte_en;
+    logic                   r_rdy;
+    logic                   r_err;
+
     modport widget (
         output addr,
         output w_data,
         output w_vld,
         output r_vld,
         output byte_en,
+        output r_addr,
+        output r_byte_en,
 
         input  r_data,
         input  rdy,
-        input  err
+        input  err,
+        input  r_rdy,
+        input  r_err
     );
 endinterface
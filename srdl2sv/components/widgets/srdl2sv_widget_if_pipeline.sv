@@ -0,0 +1,162 @@
+/*
+ * Copyright 2021 Dennis Potter <dennis@dennispotter.eu>
+ * 
+ * Permission is hereby granted, free of charge, to any person 
+ * obtaining a copy of this software and associated documentation
+ * files (the "Software"), to deal in the Software without 
+ * restriction, including without limitation the rights to use, 
+ * copy, modify, merge, publish, distribute, sublicense, and/or 
+ * sell copies of the Software, and to permit persons to whom the
+ * Software is furnished to do so, subject to the following 
+ * conditions:
+ * 
+ * The above copyright notice and this permission notice shall be
+ * included in all copies or substantial portions of the Software.
+ * 
+ * THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+ * EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+ * OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+ * NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+ * HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+ * WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING 
+ * FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+ * OTHER DEALINGS IN THE SOFTWARE.
+ */
+
+/*
+ * Register slices between a bus widget and the internal registers
+ *
+ * Every stage registers the request (addr, w_data, w_vld, r_vld, byte_en)
+ * on its way to the registers and the response (r_data, rdy, err) on its
+ * way back to the widget. Every stage thus adds two cycles of latency to
+ * an access.
+ *
+ * A stage forwards a request once and holds it until the registers are
+ * ready. The response is returned for one cycle, in which the widget
+ * completes the access. As with the read multiplexer pipeline, no reset
+ * is required: a stage is cleared as soon as the widget does not request
+ * an access.
+ */
+module srdl2sv_widget_if_pipeline #(
+    parameter     STAGES           = 1,
+    parameter     ADDR_W           = 32,
+    parameter     DATA_W           = 32
+)
+(
+    input                       clk,
+
+    // Interface to the bus widget
+    srdl2sv_widget_if           bus_if,
+
+    // Interface to internal logic
+    srdl2sv_widget_if.widget    widget_if
+);
+
+    // Index 0 is connected to the widget, index STAGES to the registers
+    wire [ADDR_W-1:0]   addr    [STAGES+1];
+    wire [DATA_W-1:0]   w_data  [STAGES+1];
+    wire                w_vld   [STAGES+1];
+    wire                r_vld   [STAGES+1];
+    wire [DATA_W/8-1:0] byte_en [STAGES+1];
+
+    wire [DATA_W-1:0]   r_data  [STAGES+1];
+    wire                rdy     [STAGES+1];
+    wire                err     [STAGES+1];
+
+    assign addr[0]           = bus_if.addr;
+    assign w_data[0]         = bus_if.w_data;
+    assign w_vld[0]          = bus_if.w_vld;
+    assign r_vld[0]          = bus_if.r_vld;
+    assign byte_en[0]        = bus_if.byte_en;
+
+    assign bus_if.r_data     = r_data[0];
+    assign bus_if.rdy        = rdy[0];
+    assign bus_if.err        = err[0];
+
+    assign widget_if.addr    = addr[STAGES];
+    assign widget_if.w_data  = w_data[STAGES];
+    assign widget_if.w_vld   = w_vld[STAGES];
+    assign widget_if.r_vld   = r_vld[STAGES];
+    assign widget_if.byte_en = byte_en[STAGES];
+
+    assign r_data[STAGES]    = widget_if.r_data;
+    assign rdy[STAGES]       = widget_if.rdy;
+    assign err[STAGES]       = widget_if.err;
+
+    // The registers behind the pipeline do not have a read port
+    assign bus_if.r_rdy        = bus_if.rdy;
+    assign bus_if.r_err        = bus_if.err;
+    assign widget_if.r_addr    = widget_if.addr;
+    assign widget_if.r_byte_en = widget_if.byte_en;
+
+    genvar i;
+
+    generate
+    for (i = 0; i < STAGES; i++)
+    begin : gen_stage
+        logic                fwd_q;
+        logic                w_vld_q;
+        logic                r_vld_q;
+        logic [ADDR_W-1:0]   addr_q;
+        logic [DATA_W-1:0]   w_data_q;
+        logic [DATA_W/8-1:0] byte_en_q;
+
+        logic                rdy_q;
+        logic [DATA_W-1:0]   r_data_q;
+        logic                err_q;
+
+        wire                 done = (w_vld_q || r_vld_q) && rdy[i+1];
+
+        always_ff @(posedge clk)
+            if (!(w_vld[i] || r_vld[i]) || rdy_q)
+            begin
+                // No access or the access is completed in this cycle
+                fwd_q   <= 1'b0;
+                w_vld_q <= 1'b0;
+                r_vld_q <= 1'b0;
+                rdy_q   <= 1'b0;
+            end
+            else if (!fwd_q)
+            begin
+                // Forward new access to the next stage
+                fwd_q   <= 1'b1;
+                w_vld_q <= w_vld[i];
+                r_vld_q <= r_vld[i];
+            end
+            else if (done)
+            begin
+                // Return response to the previous stage
+                w_vld_q <= 1'b0;
+                r_vld_q <= 1'b0;
+                rdy_q   <= 1'b1;
+            end
+
+        always_ff @(posedge clk)
+        begin
+            if (!fwd_q)
+            begin
+                addr_q    <= addr[i];
+                w_data_q  <= w_data[i];
+                byte_en_q <= byte_en[i];
+            end
+
+            if (done)
+            begin
+                r_data_q  <= r_data[i+1];
+                err_q     <= err[i+1];
+            end
+        end
+
+        assign addr[i+1]    = addr_q;
+        assign w_data[i+1]  = w_data_q;
+        assign w_vld[i+1]   = w_vld_q;
+        assign r_vld[i+1]   = r_vld_q;
+        assign byte_en[i+1] = byte_en_q;
+
+        assign r_data[i]    = r_data_q;
+        assign rdy[i]       = rdy_q;
+        assign err[i]       = err_q;
+    end
+    endgenerate
+
+endmodule
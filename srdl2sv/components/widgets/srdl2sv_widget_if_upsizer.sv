@@ -0,0 +1,133 @@
+/*
+ * Copyright 2021 Dennis Potter <dennis@dennispotter.eu>
+ * 
+ * Permission is hereby granted, free of charge, to any person 
+ * obtaining a copy of this software and associated documentation
+ * files (the "Software"), to deal in the Software without 
+ * restriction, including without limitation the rights to use, 
+ * copy, modify, merge, publish, distribute, sublicense, and/or 
+ * sell copies of the Software, and to permit persons to whom the
+ * Software is furnished to do so, subject to the following 
+ * conditions:
+ * 
+ * The above copyright notice and this permission notice shall be
+ * included in all copies or substantial portions of the Software.
+ * 
+ * THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+ * EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+ * OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+ * NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+ * HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+ * WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING 
+ * FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+ * OTHER DEALINGS IN THE SOFTWARE.
+ */
+
+/*
+ * Connect a bus widget that is wider than the registers
+ *
+ * The data bus of the widget consists of BUS_W/REG_W lanes. A lane
+ * corresponds to the register at the address of the beat plus the offset
+ * of the lane. An access to the widget is split into one access per lane
+ * with at least one byte enabled. The lanes are accessed in ascending
+ * order, the read data of all lanes is concatenated, and the error of all
+ * lanes is combined. An access that only enables bytes of a single lane
+ * is forwarded without additional latency.
+ */
+module srdl2sv_widget_if_upsizer #(
+    parameter     ADDR_W           = 32,
+    parameter     BUS_W            = 64,
+    parameter     REG_W            = 32
+)
+(
+    input                       clk,
+
+    // Interface to the bus widget
+    srdl2sv_widget_if           bus_if,
+
+    // Interface to internal logic
+    srdl2sv_widget_if.widget    widget_if
+);
+
+    localparam LANES      = BUS_W/REG_W;
+    localparam LANE_BYTES = REG_W/8;
+
+    /****************************
+     * Determine lanes to access
+     ****************************/
+    logic [LANES-1:0] lane_en;
+    logic [LANES-1:0] lane_done_q;
+    logic [LANES-1:0] lane_pending;
+    int               lane;
+
+    always_comb
+    begin
+        for (int i = 0; i < LANES; i++)
+            lane_en[i] = |bus_if.byte_en[i*LANE_BYTES +: LANE_BYTES];
+
+        // Without any enabled byte, the registers decide on the
+        // response of the lowest lane
+        if (!lane_en)
+            lane_en[0] = 1'b1;
+
+        lane_pending = lane_en & ~lane_done_q;
+
+        // Lowest lane that is not yet accessed
+        lane = 0;
+
+        for (int i = LANES-1; i >= 0; i--)
+            if (lane_pending[i])
+                lane = i;
+    end
+
+    wire vld  = bus_if.w_vld || bus_if.r_vld;
+    wire done = widget_if.rdy && (lane_pending & ~(LANES'(1) << lane)) == '0;
+
+    /****************************
+     * Access registers
+     ****************************/
+    assign widget_if.addr    = bus_if.addr + ADDR_W'(lane*LANE_BYTES);
+    assign widget_if.w_data  = bus_if.w_data[lane*REG_W +: REG_W];
+    assign widget_if.byte_en = bus_if.byte_en[lane*LANE_BYTES +: LANE_BYTES];
+    assign widget_if.w_vld   = bus_if.w_vld;
+    assign widget_if.r_vld   = bus_if.r_vld;
+
+    /****************************
+     * Combine responses
+     ****************************/
+    logic [BUS_W-1:0] r_data_q;
+    logic             err_q;
+
+    // As with the read multiplexer pipeline, no reset is required since
+    // the state is cleared as soon as the widget does not request an
+    // access.
+    always_ff @(posedge clk)
+        if (!vld || done)
+        begin
+            lane_done_q <= '0;
+            r_data_q    <= '0;
+            err_q       <= 1'b0;
+        end
+        else if (widget_if.rdy)
+        begin
+            lane_done_q[lane]             <= 1'b1;
+            r_data_q[lane*REG_W +: REG_W] <= widget_if.r_data;
+            err_q                         <= err_q || widget_if.err;
+        end
+
+    always_comb
+    begin
+        bus_if.r_data = r_data_q;
+        bus_if.r_data[lane*REG_W +: REG_W] = widget_if.r_data;
+    end
+
+    assign bus_if.rdy = done;
+    assign bus_if.err = err_q || widget_if.err;
+
+    // The registers behind the upsizer do not have a read port
+    assign bus_if.r_rdy        = bus_if.rdy;
+    assign bus_if.r_err        = bus_if.err;
+    assign widget_if.r_addr    = widget_if.addr;
+    assign widget_if.r_byte_en = widget_if.byte_en;
+
+endmodule
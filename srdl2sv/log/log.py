@@ -29,6 +29,57 @@ class CustomFormatter(logging.Formatter):
 
         return logging.Formatter.format(self, colored_record)
 
+class RecordCollector(logging.Handler):
+    """Handler that saves records, so that they can be emitted later on
+    (e.g., by another process)"""
+
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        # Resolve the message, so that the record can be pickled
+        record.msg = record.getMessage()
+        record.args = None
+        record.exc_info = None
+
+        self.records.append(record)
+
+# If set, loggers will send all records to this collector, rather than
+# to the shell or to a file
+_record_collector: Optional[RecordCollector] = None
+
+def capture_records(collector: Optional[RecordCollector]):
+    global _record_collector
+    _record_collector = collector
+
+# Handlers are shared by all loggers. For every combination of log levels
+# and log file, the handlers are only created once.
+_handlers = {}
+
+def get_log_level(stdout_log_level: int, file_log_level: int) -> int:
+    """Return the level of a logger, given the levels of both handlers"""
+    # If the minimum log level of one of the two loggers is 0, the maximum
+    # of both values must be taken. Otherwise, the complete logger gets
+    # deactivated.
+    min_log_level = min(stdout_log_level, file_log_level)
+
+    if min_log_level == 0:
+        return max(stdout_log_level, file_log_level)
+
+    return min_log_level
+
+def get_effective_log_level(stdout_log_level: int, file_log_level: int) -> int:
+    """Return the minimum level of messages that get past a logger
+
+    This can be used to check if a message would be logged, without
+    creating a logger first.
+    """
+    log_level = get_log_level(stdout_log_level, file_log_level)
+
+    # A logger without level inherits the level of the root logger
+    return log_level if log_level else logging.getLogger().getEffectiveLevel()
+
 def create_logger (
         mod_name,
         stdout_log_level: int = logging.WARNING,
@@ -36,16 +87,27 @@ def create_logger (
         file_name: Optional[str] = None):
 
     log = logging.getLogger(mod_name)
+    log.setLevel(get_log_level(stdout_log_level, file_log_level))
 
-    # Set log level. If the minimum log level of one of the
-    # two loggers is 0, the maximum of both values must be taken.
-    # Otherwise, the complete logger gets deactivated.
-    min_log_level = min(stdout_log_level, file_log_level)
-
-    if min_log_level == 0:
-        log.setLevel(max(stdout_log_level, file_log_level))
+    # Replace (rather than add) handlers, so that calling this function
+    # multiple times for the same name does not result in duplicate messages
+    if _record_collector:
+        log.handlers = [_record_collector]
     else:
-        log.setLevel(min_log_level)
+        log.handlers = list(_get_handlers(stdout_log_level, file_log_level, file_name))
+
+    return log
+
+def _get_handlers(
+        stdout_log_level: int,
+        file_log_level: int,
+        file_name: Optional[str]) -> tuple:
+    key = (stdout_log_level, file_log_level, file_name)
+
+    if key in _handlers:
+        return _handlers[key]
+
+    handlers = []
 
     # Create log handlers
     if file_log_level > 0 and file_name:
@@ -55,7 +117,7 @@ def create_logger (
         file_formatter = logging.Formatter(
             "%(asctime)s - %(levelname)s - %(name)s: %(message)s")
         file_handler.setFormatter(file_formatter)
-        log.addHandler(file_handler)
+        handlers.append(file_handler)
 
     if stdout_log_level > 0:
         stream_handler = logging.StreamHandler()
@@ -64,6 +126,8 @@ def create_logger (
         stream_formatter = CustomFormatter(
             "[%(levelname)s][%(name)s] %(message)s")
         stream_handler.setFormatter(stream_formatter)
-        log.addHandler(stream_handler)
+        handlers.append(stream_handler)
 
-    return log
+    _handlers[key] = tuple(handlers)
+
+    return _handlers[key]
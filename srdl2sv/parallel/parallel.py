@@ -0,0 +1,111 @@
+import multiprocessing
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, NamedTuple, Optional
+
+# Local modules
+from srdl2sv.log.log import create_logger, capture_records, RecordCollector
+
+class WorkerResult(NamedTuple):
+    value: Any
+    records: list
+    exited: bool
+    exit_code: Any
+
+# Function and items that are shared with the worker processes. Since the
+# workers are forked, these are inherited and never pickled. This is
+# important, since elaborated systemrdl nodes cannot be pickled.
+_func = None
+_items = []
+
+# Collector for log records in a worker process
+_collector = None
+
+def is_available() -> bool:
+    """Parallel elaboration relies on forking the current process"""
+    return 'fork' in multiprocessing.get_all_start_methods()
+
+def imap(func: Callable,
+         items: list,
+         config: dict,
+         logger,
+         item_configs: Optional[list] = None,
+         item_name: str = 'addrmap(s)'):
+    """Generator that applies func to all items in a pool of processes
+
+    The results are yielded in the same order as the items. Log records of
+    the workers are emitted by this process, right before the respective
+    result is yielded. Thus, the logs are grouped per item and do not
+    depend on the scheduling of the workers. If item_configs is passed,
+    the records of every item are emitted with the log levels and the log
+    file of the respective configuration.
+
+    If func exits (e.g., after a fatal error), this process exits with the
+    same exit code.
+    """
+    global _func, _items
+
+    _func = func
+    _items = items
+
+    logger.info("Elaborating %i %s with %i processes", len(items), item_name, config['jobs'])
+
+    loggers = {}
+
+    executor = ProcessPoolExecutor(
+        max_workers=config['jobs'],
+        mp_context=multiprocessing.get_context('fork'),
+        initializer=_init_worker)
+
+    with executor:
+        for idx, result in enumerate(executor.map(_run, range(len(items)))):
+            if item_configs:
+                log_config = item_configs[idx]
+                loggers = {}
+            else:
+                log_config = config
+
+            for record in result.records:
+                if record.name not in loggers:
+                    loggers[record.name] = create_logger(
+                        record.name,
+                        stdout_log_level=log_config['stdout_log_level'],
+                        file_log_level=log_config['file_log_level'],
+                        file_name=log_config['file_log_location'])
+                    loggers[record.name].propagate = False
+
+                loggers[record.name].handle(record)
+
+            if result.exited:
+                # Do not wait for the remaining items
+                executor.shutdown(wait=False, cancel_futures=True)
+                sys.exit(result.exit_code)
+
+            yield result.value
+
+def _init_worker():
+    global _collector
+
+    _collector = RecordCollector()
+    capture_records(_collector)
+
+def _run(idx: int) -> WorkerResult:
+    value = None
+    exited = False
+    exit_code = None
+
+    try:
+        value = _func(_items[idx])
+    except SystemExit as exit_exc:
+        exited = True
+        exit_code = exit_exc.code
+
+    # Hand records over to the main process and start with a clean list
+    # for the next item
+    records, _collector.records = _collector.records, []
+
+    return WorkerResult(
+        value=value,
+        records=records,
+        exited=exited,
+        exit_code=exit_code)
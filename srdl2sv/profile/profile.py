@@ -0,0 +1,194 @@
+import contextlib
+import functools
+import json
+import os
+import time
+from typing import Optional
+
+class ProfileNode():
+    """Timer in the hierarchy of timers. Every node accumulates all calls
+    with the same name and the same parent."""
+
+    def __init__(self, name: str, category: str):
+        self.name = name
+        self.category = category
+        self.calls = 0
+        self.time_ns = 0
+        self.children = {}
+
+    def to_dict(self) -> dict:
+        children_ns = sum(x.time_ns for x in self.children.values())
+
+        return {'name': self.name,
+                'category': self.category,
+                'calls': self.calls,
+                'time': self.time_ns / 1e9,
+                'self_time': (self.time_ns - children_ns) / 1e9,
+                'children': [x.to_dict() for x in self.children.values()]}
+
+class Profiler():
+    """Records hierarchical timers, call counts, and trace events
+
+    Every timer has a name and a category. The category is either a phase
+    of the compiler or the name of a component class. Besides the hierarchy
+    of timers, the profiler keeps statistics per category. The time of a
+    category only counts the outermost timer of that category, so that
+    recursion (e.g., regfiles in regfiles) is not counted twice.
+    """
+
+    def __init__(self):
+        self.start_ns = time.perf_counter_ns()
+        self.root = ProfileNode('srdl2sv', 'phase')
+        self.stack = [self.root]
+
+        # Time spent in timers that are direct children of the timers in
+        # the stack. Required to determine the self time of categories.
+        self.children_ns = [0]
+
+        self.categories = {}
+        self.active_categories = {}
+        self.trace_events = []
+
+    def push(self, name: str, category: str) -> int:
+        parent = self.stack[-1]
+
+        try:
+            node = parent.children[name]
+        except KeyError:
+            node = parent.children[name] = ProfileNode(name, category)
+
+        self.stack.append(node)
+        self.children_ns.append(0)
+        self.active_categories[category] = self.active_categories.get(category, 0) + 1
+
+        return time.perf_counter_ns()
+
+    def pop(self, start_ns: int, trace: bool = True, args: Optional[dict] = None):
+        duration_ns = time.perf_counter_ns() - start_ns
+
+        node = self.stack.pop()
+        node.calls += 1
+        node.time_ns += duration_ns
+
+        self_ns = duration_ns - self.children_ns.pop()
+        self.children_ns[-1] += duration_ns
+
+        self.active_categories[node.category] -= 1
+
+        try:
+            stats = self.categories[node.category]
+        except KeyError:
+            stats = self.categories[node.category] = {'calls': 0, 'time_ns': 0, 'self_ns': 0}
+
+        stats['calls'] += 1
+        stats['self_ns'] += self_ns
+
+        if not self.active_categories[node.category]:
+            stats['time_ns'] += duration_ns
+
+        if trace:
+            self.trace_events.append(
+                {'name': node.name,
+                 'cat': node.category,
+                 'ph': 'X',
+                 'ts': (start_ns - self.start_ns) / 1e3,
+                 'dur': duration_ns / 1e3,
+                 'pid': os.getpid(),
+                 'tid': 0,
+                 'args': args or {}})
+
+    @contextlib.contextmanager
+    def timer(self, name: str, category: str, args: Optional[dict] = None):
+        start_ns = self.push(name, category)
+
+        try:
+            yield
+        finally:
+            self.pop(start_ns, args=args)
+
+    def to_dict(self) -> dict:
+        self.root.calls = 1
+        self.root.time_ns = time.perf_counter_ns() - self.start_ns
+
+        return {'total_time': self.root.time_ns / 1e9,
+                'timers': self.root.to_dict(),
+                'categories': {
+                    key: {'calls': value['calls'],
+                          'time': value['time_ns'] / 1e9,
+                          'self_time': value['self_ns'] / 1e9}
+                    for key, value in sorted(self.categories.items())}}
+
+    def dump(self, json_file: str, trace_file: str):
+        with open(json_file, 'w', encoding='UTF-8') as file:
+            json.dump(self.to_dict(), file, indent=4)
+
+        # The Chrome trace event format can be loaded in chrome://tracing
+        # or in https://ui.perfetto.dev
+        with open(trace_file, 'w', encoding='UTF-8') as file:
+            json.dump({'traceEvents': self.trace_events, 'displayTimeUnit': 'ms'}, file)
+
+# Profiler of this process. If it is not set, profiling is disabled and
+# timers do not add any measurable overhead.
+_profiler: Optional[Profiler] = None
+
+def enable() -> Profiler:
+    global _profiler
+    _profiler = Profiler()
+
+    return _profiler
+
+def disable():
+    global _profiler
+    _profiler = None
+
+def get_profiler() -> Optional[Profiler]:
+    return _profiler
+
+def timer(name: str, category: str = 'phase', args: Optional[dict] = None):
+    """Context manager that times the enclosed block"""
+    if _profiler is None:
+        return contextlib.nullcontext()
+
+    return _profiler.timer(name, category, args)
+
+def timed(name: str, category: str):
+    """Decorator that times every call of a function"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _profiler is None:
+                return func(*args, **kwargs)
+
+            with _profiler.timer(name, category):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+def timed_iter(iterable, name: str, category: str = 'phase'):
+    """Time every step of an iterable
+
+    The steps are accumulated in the hierarchy of timers, but they do not
+    result in trace events since there is one step per line of RTL. If
+    profiling is disabled, the iterable is returned as is.
+    """
+    if _profiler is None:
+        return iterable
+
+    return _timed_iter(_profiler, iterable, name, category)
+
+def _timed_iter(profiler: Profiler, iterable, name: str, category: str):
+    iterator = iter(iterable)
+
+    while True:
+        start_ns = profiler.push(name, category)
+
+        try:
+            item = next(iterator)
+        except StopIteration:
+            return
+        finally:
+            profiler.pop(start_ns, trace=False)
+
+        yield item
@@ -1,50 +1,305 @@
 #!/usr/bin/env python3
 
 # Standard modules
+import functools
+import os
 import sys
 import time
-import importlib.resources as pkg_resources
-
-# Imported modules
-from systemrdl import RDLCompiler, RDLCompileError
 
 # Local modules
-from srdl2sv.components.addrmap import AddrMap
-from srdl2sv.components import widgets
+#
+# The compiler itself (i.e., systemrdl, the components, and the modules to
+# run and cache it) is only imported by the functions that use it. Hence,
+# the command line arguments are parsed without importing it and, e.g.,
+# 'srdl2sv --help' returns immediately.
 from srdl2sv.cli.cli import CliArguments
 from srdl2sv.log.log import create_logger
+from srdl2sv.profile import profile
 
-def main():
-    # Take start timestamp
-    start = time.time()
+# Seconds between two checks of the watched files in watch mode
+WATCH_INTERVAL = 0.5
+
+@profile.timed('generate_addrmap', 'phase')
+def generate_addrmap(addrmap_node, config: dict) -> list:
+    """Elaborate a single addrmap and write its module and packages
+
+    Returns a list with the names of the files that were written.
+    """
+    from srdl2sv.components.addrmap import AddrMap
+    from srdl2sv.cache.cache import open_if_changed
+
+    addrmap = AddrMap(addrmap_node, config, elaborate_children=False)
+
+    out_addrmap_file = f"{config['output_dir']}/{addrmap.name}.sv"
+
+    with profile.timer('write_rtl'), open_if_changed(out_addrmap_file) as file:
+        addrmap.write_rtl(
+            file,
+            tab_width=config['tab_width'],
+            real_tabs=config['real_tabs']
+        )
+
+    addrmap.logger.info("Succesfully created '%s'", out_addrmap_file)
+
+    out_files = [out_addrmap_file]
+
+    # Start grabbing packages. This returns a dictionary for the main addrmap
+    # and all it's child regfiles
+    for key, value in addrmap.get_package_rtl(
+        tab_width=config['tab_width'],
+        real_tabs=config['real_tabs']
+    ).items():
+        if value:
+            out_pkg_file = f"{config['output_dir']}/{key}_pkg.sv"
 
+            with profile.timer('write_package'), open_if_changed(out_pkg_file) as file:
+                print(value, file=file)
+
+            out_files.append(out_pkg_file)
+
+    return out_files
+
+@functools.lru_cache(maxsize=None)
+def read_widget(file_name: str) -> str:
+    """Return the content of a file in the widget directory
+
+    The result is cached, so that the files are only read once if multiple
+    entries of a batch are compiled.
+    """
+    import importlib.resources as pkg_resources
+    from srdl2sv.components import widgets
+
+    return pkg_resources.read_text(widgets, file_name)
+
+def main():
     # Construct command line arguments
     cli_arguments = CliArguments()
+
+    if (batch_config := cli_arguments.get_batch_config()) is not None:
+        sys.exit(run_batch(batch_config))
+
     config = cli_arguments.get_config()
 
-    # Create logger
+    if config['watch']:
+        sys.exit(watch(config))
+
+    run(config)
+
+def watch(config: dict) -> int:
+    """Run the compiler again every time one of the RDL files changes
+
+    Everything that does not depend on the RDL files (e.g., the templates)
+    stays loaded between runs. If no cache directory is set, a temporary
+    one is used, so that only addrmaps that changed are generated again.
+    Files in the output directory are only rewritten if they changed.
+    """
+    import tempfile
+
     logger = create_logger(
-        __name__,
+        'watch',
         stdout_log_level=config['stdout_log_level'],
         file_log_level=config['file_log_level'],
         file_name=config['file_log_location'])
+    logger.propagate = False
+
+    with tempfile.TemporaryDirectory(prefix='srdl2sv_cache_') as tmp_cache_dir:
+        if not config['cache_dir']:
+            config['cache_dir'] = tmp_cache_dir
+
+        file_names = [os.path.abspath(x) for x in config['input_file']]
+
+        try:
+            while True:
+                # Files that are read by the compiler are watched
+                # before the compiler reads them, so that a change while
+                # compiling triggers another run
+                mtimes = get_mtimes(file_names)
+
+                if run_entry(config, file_names):
+                    logger.info("Watching %i file(s) for changes. Press Ctrl+C to stop.",
+                                len(file_names))
+                else:
+                    logger.error("Failed to compile '%s'. Watching %i file(s) for changes. "\
+                                 "Press Ctrl+C to stop.",
+                                 "', '".join(config['input_file']), len(file_names))
+
+                # Included files that were not known before this run
+                mtimes = {**get_mtimes(file_names), **mtimes}
+
+                while mtimes == (new_mtimes := get_mtimes(file_names)):
+                    time.sleep(WATCH_INTERVAL)
+
+                changed = [x for x in file_names if mtimes.get(x) != new_mtimes.get(x)]
+                logger.info("'%s' changed. Compiling again.", "', '".join(changed))
+
+                # Not reproducible files get the time of the run that generated them
+                config['ts'] = time.localtime()
+        except KeyboardInterrupt:
+            logger.info("Stopped watching")
+
+    return 0
+
+def get_mtimes(file_names: list) -> dict:
+    """Return the modification times of files that exist"""
+    mtimes = {}
+
+    for file_name in file_names:
+        try:
+            stat = os.stat(file_name)
+            mtimes[file_name] = (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            pass
+
+    return mtimes
+
+def run_batch(batch_config: dict) -> int:
+    """Compile all entries of a manifest and return the exit code"""
+    from srdl2sv.parallel import parallel
+
+    # Take start timestamp
+    start = time.time()
+
+    # Every entry creates its own logger for this module. Hence, the batch
+    # uses a logger with a different name.
+    logger = create_logger(
+        'batch',
+        stdout_log_level=batch_config['stdout_log_level'],
+        file_log_level=batch_config['file_log_level'],
+        file_name=batch_config['file_log_location'])
+    logger.propagate = False
+
+    entries = batch_config['entries']
+
+    logger.info("Compiling %i entries of '%s'", len(entries), batch_config['manifest'])
+
+    if batch_config['jobs'] > 1 and not parallel.is_available():
+        logger.warning("Parallel compilation is not supported on this platform. "\
+                       "Falling back to a single process.")
+        batch_config['jobs'] = 1
+
+    if batch_config['jobs'] > 1 and any(x['profile'] for x in entries):
+        logger.warning("Profiling only covers a single process. "\
+                       "Falling back to a single process.")
+        batch_config['jobs'] = 1
+
+    if batch_config['jobs'] > 1 and len(entries) > 1:
+        # The entries themselves are already compiled in parallel
+        for entry in entries:
+            entry['jobs'] = 1
+
+        results = parallel.imap(
+            run_entry,
+            entries,
+            batch_config,
+            logger,
+            item_configs=entries,
+            item_name='batch entries')
+    else:
+        results = (run_entry(x) for x in entries)
+
+    failed = [entry for (entry, success) in zip(entries, results) if not success]
+
+    for entry in failed:
+        logger.error("Failed to compile '%s'", "', '".join(entry['input_file']))
+
+    logger.info("Compiled %i of %i entries in %f seconds",
+                len(entries) - len(failed), len(entries), time.time() - start)
+
+    return 1 if failed else 0
+
+def run_entry(config: dict, file_names: list = None) -> bool:
+    """Compile a single entry of a batch
+
+    Contrary to run(), this does not exit on errors. Instead, False is
+    returned, so that the remaining entries are still compiled. If a list
+    is passed as file_names, the RDL files that were read are added to it.
+    """
+    try:
+        for file_name in run(config):
+            if file_names is not None and file_name not in file_names:
+                file_names.append(file_name)
+    except SystemExit as exit_exc:
+        return exit_exc.code in (None, 0)
+    finally:
+        # Do not profile the next entry if it does not request it
+        profile.disable()
+
+    return True
+
+def elaborate(config: dict, logger):
+    """Compile and elaborate the RDL files
+
+    Returns the root node and the list of RDL files (including the included
+    files) it depends on. If a cache directory is set and none of these files
+    changed since a previous run, the root node of that run is restored instead.
+    """
+    from systemrdl import RDLCompiler, RDLCompileError
+    from srdl2sv.cache.cache import ElaborationCache
+
+    if config['cache_dir']:
+        elaboration_cache = ElaborationCache(config['cache_dir'], config)
+
+        with profile.timer('elaboration_cache_lookup'):
+            cached = elaboration_cache.load()
+
+        if cached is not None:
+            logger.info("RDL files did not change. Restored elaborated design from cache")
+            return cached
+    else:
+        elaboration_cache = None
 
-    # Compile and elaborate files provided from the command line
     rdlc = RDLCompiler()
+    file_names = [*config['input_file']]
 
     try:
         for input_file in config['input_file']:
-            rdlc.compile_file(
-                input_file, incl_search_paths=config['search_paths'])
+            with profile.timer('compile', args={'file': input_file}):
+                file_info = rdlc.compile_file(
+                    input_file, incl_search_paths=config['search_paths'])
+
+            file_names.extend(file_info.included_files)
 
-        root = rdlc.elaborate()
+        with profile.timer('elaborate'):
+            root = rdlc.elaborate()
     except RDLCompileError:
         sys.exit(1)
     except FileNotFoundError:
         logger.fatal("Could not find '%s'", input_file)
         sys.exit(1)
 
-    addrmaps = AddrMap(root.top, config)
+    file_names = list(dict.fromkeys(os.path.abspath(x) for x in file_names))
+
+    if elaboration_cache:
+        with profile.timer('elaboration_cache_store'):
+            if not elaboration_cache.store(root, file_names):
+                logger.info("Could not cache the elaborated design")
+
+    return (root, file_names)
+
+def run(config: dict) -> list:
+    """Compile the RDL files and write all files for a single configuration
+
+    Returns the list of RDL files (including the included files) that were read.
+    """
+    from srdl2sv.components.addrmap import AddrMap
+    from srdl2sv.parallel import parallel
+    from srdl2sv.cache.cache import OutputCache, open_if_changed
+
+    # Take start timestamp
+    start = time.time()
+
+    if config['profile']:
+        profiler = profile.enable()
+
+    # Create logger
+    logger = create_logger(
+        __name__,
+        stdout_log_level=config['stdout_log_level'],
+        file_log_level=config['file_log_level'],
+        file_name=config['file_log_location'])
+
+    # Compile and elaborate files provided from the command line
+    root, file_names = elaborate(config, logger)
 
     # Determine address width
     if config['addrwidth_bus_spec']:
@@ -53,48 +308,106 @@ def main():
     else:
         logger.info("Set address width to '%i'", config['addrwidth'])
 
-    # Save RTL to file
-    for addrmap in addrmaps.get_addrmaps():
-        out_addrmap_file = f"{config['output_dir']}/{addrmap.name}.sv"
+    # Every addrmap results in a seperate module that is elaborated on its own
+    addrmap_nodes = AddrMap.get_addrmap_nodes(root.top, logger)
 
-        with open(out_addrmap_file, 'w', encoding='UTF-8') as file:
-            print(
-                addrmap.get_rtl(
-                    tab_width=config['tab_width'],
-                    real_tabs=config['real_tabs']
-                ),
-                file=file
-            )
+    # Check which addrmaps did not change since the previous run
+    if config['cache_dir']:
+        with profile.timer('cache_lookup'):
+            output_cache = OutputCache(config['cache_dir'], config)
+            cache_keys = [output_cache.get_key(x) for x in addrmap_nodes]
+            cached = [output_cache.contains(x) for x in cache_keys]
+    else:
+        output_cache = None
+        cached = [False for _ in addrmap_nodes]
 
-            logger.info("Succesfully created '%s'", out_addrmap_file)
+    pending_nodes = [x for (x, y) in zip(addrmap_nodes, cached) if not y]
 
-        # Start grabbing packages. This returns a dictionary for the main addrmap
-        # and all it's child regfiles/addrmaps
-        for key, value in addrmap.get_package_rtl(
-            tab_width=config['tab_width'],
-            real_tabs=config['real_tabs']
-        ).items():
-            if value:
-                with open(f"{config['output_dir']}/{key}_pkg.sv", 'w', encoding="UTF-8") as file:
-                    print(value, file=file)
+    if config['jobs'] > 1 and not parallel.is_available():
+        logger.warning("Parallel elaboration is not supported on this platform. "\
+                       "Falling back to a single process.")
+        config['jobs'] = 1
+
+    if config['jobs'] > 1 and config['profile']:
+        logger.warning("Profiling only covers a single process. "\
+                       "Falling back to a single process.")
+        config['jobs'] = 1
+
+    if config['jobs'] > 1 and len(pending_nodes) > 1:
+        generated_files = parallel.imap(
+            functools.partial(generate_addrmap, config=config),
+            pending_nodes,
+            config,
+            logger)
+    else:
+        generated_files = (generate_addrmap(x, config) for x in pending_nodes)
+
+    # Save RTL to file. This is done in the same order as the addrmaps
+    # were found, which matters if multiple addrmaps have the same name.
+    for idx, addrmap_node in enumerate(addrmap_nodes):
+        if cached[idx]:
+            with profile.timer('cache_restore'):
+                out_files = output_cache.restore(cache_keys[idx], config['output_dir'])
+
+            logger.info("Addrmap '%s' did not change. Restored '%s' from cache",
+                        addrmap_node.type_name, "', '".join(out_files))
+        else:
+            out_files = next(generated_files)
+
+            if output_cache:
+                with profile.timer('cache_store'):
+                    output_cache.store(cache_keys[idx], out_files)
 
     # Copy over generic srdl2sv_interface_pkg
-    widget_if_rtl = pkg_resources.read_text(widgets, "srdl2sv_widget_if.sv")
+    widget_if_rtl = read_widget("srdl2sv_widget_if.sv")
 
     out_if_file = f"{config['output_dir']}/srdl2sv_widget_if.sv"
 
-    with open(out_if_file, 'w', encoding="UTF-8") as file:
+    with profile.timer('write_widget'), open_if_changed(out_if_file) as file:
         print(widget_if_rtl, file=file)
 
     logger.info("Copied 'srdl2sv_widget_if.sv'")
 
+    # Copy over adapter between a wide widget and the registers
+    if config['bus_width']:
+        upsizer_rtl = read_widget("srdl2sv_widget_if_upsizer.sv")
+
+        out_upsizer_file = f"{config['output_dir']}/srdl2sv_widget_if_upsizer.sv"
+
+        with profile.timer('write_widget'), open_if_changed(out_upsizer_file) as file:
+            print(upsizer_rtl, file=file)
+
+        logger.info("Copied 'srdl2sv_widget_if_upsizer.sv'")
+
+    # Copy over register slices between widget and registers
+    if config['pipeline_stages']:
+        pipeline_rtl = read_widget("srdl2sv_widget_if_pipeline.sv")
+
+        out_pipeline_file = f"{config['output_dir']}/srdl2sv_widget_if_pipeline.sv"
+
+        with profile.timer('write_widget'), open_if_changed(out_pipeline_file) as file:
+            print(pipeline_rtl, file=file)
+
+        logger.info("Copied 'srdl2sv_widget_if_pipeline.sv'")
+
+    # Copy over model of the clock gating cell
+    if config['clock_gating'] == 'icg':
+        clock_gate_rtl = read_widget("srdl2sv_clock_gate.sv")
+
+        out_clock_gate_file = f"{config['output_dir']}/srdl2sv_clock_gate.sv"
+
+        with profile.timer('write_widget'), open_if_changed(out_clock_gate_file) as file:
+            print(clock_gate_rtl, file=file)
+
+        logger.info("Copied 'srdl2sv_clock_gate.sv'")
+
     # Copy over widget RTL from widget directory
     try:
-        widget_rtl = pkg_resources.read_text(widgets, f"srdl2sv_{config['bus']}.sv")
+        widget_rtl = read_widget(f"srdl2sv_{config['bus']}.sv")
 
         out_widget_file = f"{config['output_dir']}/srdl2sv_{config['bus']}.sv"
 
-        with open(out_widget_file, 'w', encoding="UTF-8") as file:
+        with profile.timer('write_widget'), open_if_changed(out_widget_file) as file:
             print(widget_rtl, file=file)
 
         logger.info("Selected, implemented, and copied '%s' widget", config['bus'])
@@ -103,8 +416,18 @@ def main():
         logger.info("Did not find a seperate SystemVerilog file for '%s' widget", config['bus'])
 
 
+    if config['profile']:
+        profile_file = f"{config['output_dir']}/srdl2sv_profile.json"
+        trace_file = f"{config['output_dir']}/srdl2sv_profile_trace.json"
+
+        profiler.dump(profile_file, trace_file)
+
+        logger.info("Saved profile to '%s' and '%s'", profile_file, trace_file)
+
     # Print elapsed time
     logger.info("Elapsed time: %f seconds", time.time() - start)
 
+    return file_names
+
 if __name__ == "__main__":
     main()
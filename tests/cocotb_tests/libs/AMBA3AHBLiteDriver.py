@@ -9,9 +9,6 @@ class BusErrorResponse(Exception):
 class WrongErrorSequence(Exception):
     pass
 
-class WrongHREADYOUTSequence(Exception):
-    pass
-
 class HTRANS(Enum):
     IDLE = 0
     BUSY = 1
@@ -85,11 +82,8 @@ class AMBA3AHBLiteDriver:
                 # Save into dictionary
                 write_dict[previous_address] = int(self._dut.HWDATA.value)
 
-            # If HREADYOUT == 0 immediately after the first address phase
-            # this is illegal
-            elif nbytes_cnt == 0:
-                raise WrongHREADYOUTSequence
-            # If the slave is not yet ready, just wait
+            # If the slave is not yet ready, just wait. This also applies to
+            # the first data phase if the register interface is pipelined.
             else:
                 await RisingEdge(self._dut.clk)
                 continue
@@ -158,11 +152,8 @@ class AMBA3AHBLiteDriver:
 
                 # Save into dictionary
                 read_dict[previous_address] = int(self._dut.HRDATA.value)
-            # If HREADYOUT == 0 immediately after the first address phase
-            # this is illegal
-            elif nbytes_cnt == 0:
-                raise WrongHREADYOUTSequence
-            # If the slave is not yet ready, just wait
+            # If the slave is not yet ready, just wait. This also applies to
+            # the first data phase if the register interface is pipelined.
             else:
                 await RisingEdge(self._dut.clk)
                 continue
@@ -0,0 +1,145 @@
+from enum import Enum
+import cocotb
+from cocotb.triggers import Timer, RisingEdge, ReadOnly
+
+class RESP(Enum):
+    OKAY = 0
+    EXOKAY = 1
+    SLVERR = 2
+    DECERR = 3
+
+class AXI4LiteDriver:
+    """Wraps up a collection of functions to drive an AMBA 4 AXI4-Lite Bus.
+
+    Every channel is driven by a seperate coroutine, so that requests
+    and responses can be issued independently from each other. This is
+    not an extensive set of features and merely enough to test out SRDL2SV
+    registers.
+    """
+
+    def __init__(self, dut, nbytes: int):
+        self._nbytes = nbytes
+        self._dut = dut
+
+        self._dut.AWVALID <= 0
+        self._dut.AWADDR <= 0
+        self._dut.AWPROT <= 0
+        self._dut.WVALID <= 0
+        self._dut.WDATA <= 0
+        self._dut.WSTRB <= 0
+        self._dut.BREADY <= 0
+        self._dut.ARVALID <= 0
+        self._dut.ARADDR <= 0
+        self._dut.ARPROT <= 0
+        self._dut.RREADY <= 0
+
+    @cocotb.coroutine
+    async def reset(self, time: int = 10):
+        """Resets bus for a given amount of time"""
+
+        self._dut.ARESETn <= 0
+
+        await Timer(time, units='ns')
+        await RisingEdge(self._dut.clk)
+
+        self._dut.ARESETn <= 1
+
+    async def _handshake(self, valid, ready):
+        """Hold 'valid' until 'ready' was sampled high on a rising edge"""
+        valid <= 1
+
+        while True:
+            await ReadOnly()
+            done = bool(ready.value)
+
+            await RisingEdge(self._dut.clk)
+
+            if done:
+                break
+
+        valid <= 0
+
+    @cocotb.coroutine
+    async def write_address(self, address: int):
+        self._dut.AWADDR <= address
+        await self._handshake(self._dut.AWVALID, self._dut.AWREADY)
+
+    @cocotb.coroutine
+    async def write_data(self, value: int, strb = None):
+        if strb is None:
+            strb = (1 << self._nbytes) - 1
+
+        self._dut.WDATA <= value
+        self._dut.WSTRB <= strb
+        await self._handshake(self._dut.WVALID, self._dut.WREADY)
+
+    @cocotb.coroutine
+    async def write_response(self) -> RESP:
+        self._dut.BREADY <= 1
+
+        while True:
+            await ReadOnly()
+            done = bool(self._dut.BVALID.value)
+
+            if done:
+                resp = RESP(int(self._dut.BRESP.value))
+
+            await RisingEdge(self._dut.clk)
+
+            if done:
+                break
+
+        self._dut.BREADY <= 0
+
+        return resp
+
+    @cocotb.coroutine
+    async def read_address(self, address: int):
+        self._dut.ARADDR <= address
+        await self._handshake(self._dut.ARVALID, self._dut.ARREADY)
+
+    @cocotb.coroutine
+    async def read_data(self) -> (int, RESP):
+        self._dut.RREADY <= 1
+
+        while True:
+            await ReadOnly()
+            done = bool(self._dut.RVALID.value)
+
+            if done:
+                data = int(self._dut.RDATA.value)
+                resp = RESP(int(self._dut.RRESP.value))
+
+            await RisingEdge(self._dut.clk)
+
+            if done:
+                break
+
+        self._dut.RREADY <= 0
+
+        return data, resp
+
+    @cocotb.coroutine
+    async def write(self, address: int, value: int, strb = None) -> RESP:
+        """Issue the address and data of a write at the same time and
+        wait for its response"""
+        addr_phase = cocotb.fork(self.write_address(address))
+        data_phase = cocotb.fork(self.write_data(value, strb))
+
+        resp = await self.write_response()
+
+        await addr_phase
+        await data_phase
+
+        return resp
+
+    @cocotb.coroutine
+    async def read(self, address: int) -> (int, RESP):
+        """Issue a read and wait for its response"""
+        addr_phase = cocotb.fork(self.read_address(address))
+
+        data, resp = await self.read_data()
+
+        await addr_phase
+
+        return data, resp
@@ -0,0 +1,190 @@
+"""Throughput test of the pipelined AMBA 3 AHB-Lite widget
+
+The register file is compiled with '--bus amba3ahblite_pipelined'. This
+widget overlaps the address phase of a transfer with the data phase of the
+previous transfer. Since internal registers do not insert wait states, a
+sequence of back-to-back transfers must be sustained at one transfer per
+cycle. This test performs the following checks:
+    - Test a burst of writes (NONSEQ followed by SEQs) and a subsequent
+      burst of reads. The read values must match and both bursts must
+      be sustained at one transfer per cycle.
+    - Test back-to-back NONSEQ transfers that alternate between writes
+      and reads to the same register. Every read must return the value
+      that was written by the transfer before.
+    - Test that an access to an illegal address in the middle of a
+      burst results in a two-cycle error response, while the other
+      transfers of the burst complete without wait states.
+"""
+
+import random
+
+from cocotb.clock import Clock
+from cocotb.triggers import RisingEdge, ReadOnly
+import cocotb
+
+from libs import AMBA3AHBLiteDriver
+from libs.AMBA3AHBLiteDriver import HTRANS
+
+NO_REGISTERS = 8
+
+async def transfers(dut, transfer_list: list):
+    """Performs a list of back-to-back 4 byte transfers
+
+    Every transfer is a tuple (HTRANS, address, value). If value is None,
+    the transfer is a read. The address phase of the next transfer is
+    driven in the same cycle as the data phase of the current transfer.
+
+    Returns a list with the (HRESP, HRDATA) tuple of every transfer and
+    the number of cycles in which a data phase was active.
+    """
+    pending = list(transfer_list)
+    responses = []
+    cycles = 0
+
+    def drive_address_phase():
+        if not pending:
+            dut.HSEL <= 0
+            dut.HTRANS <= HTRANS.IDLE.value
+            return None
+
+        transfer = pending.pop(0)
+        htrans, address, value = transfer
+
+        dut.HSEL <= 1
+        dut.HTRANS <= htrans.value
+        dut.HADDR <= address
+        dut.HWRITE <= int(value is not None)
+        dut.HSIZE <= 2
+
+        return transfer
+
+    await RisingEdge(dut.clk)
+
+    address_phase = drive_address_phase()
+    data_phase = None
+
+    while address_phase or data_phase:
+        # Sample the response of the slave at the end of the cycle
+        await ReadOnly()
+
+        hreadyout = int(dut.HREADYOUT.value)
+        hresp = int(dut.HRESP.value)
+        hrdata = int(dut.HRDATA.value)
+
+        await RisingEdge(dut.clk)
+
+        if data_phase:
+            cycles += 1
+
+        # The slave inserted a wait state or this is the first
+        # cycle of an error response. Keep all signals stable.
+        if not hreadyout:
+            continue
+
+        # The data phase completed and the address phase was accepted
+        if data_phase:
+            responses.append((hresp, hrdata))
+
+        data_phase = address_phase
+
+        if data_phase and data_phase[2] is not None:
+            dut.HWDATA <= data_phase[2]
+
+        address_phase = drive_address_phase()
+
+    return responses, cycles
+
+def burst(addresses: list, values: list = None) -> list:
+    """Returns an incrementing burst (NONSEQ followed by SEQs)"""
+    if values is None:
+        values = [None] * len(addresses)
+
+    return [(HTRANS.SEQ if i else HTRANS.NONSEQ, address, value)
+            for i, (address, value) in enumerate(zip(addresses, values))]
+
+@cocotb.test()
+async def test_burst_throughput(dut):
+    """Test that bursts of writes and reads are sustained at
+    one transfer per cycle.
+    """
+
+    clock = Clock(dut.clk, 1, units="ns")  # Create a 10us period clock on port clk
+    cocotb.fork(clock.start())  # Start the clock
+
+    bus = AMBA3AHBLiteDriver.AMBA3AHBLiteDriver(dut=dut, nbytes=4)
+    await bus.reset()
+
+    addresses = [4*i for i in range(NO_REGISTERS)]
+    values = [random.randint(0, (1 << 32)-1) for _ in addresses]
+
+    responses, cycles = await transfers(dut, burst(addresses, values))
+
+    dut._log.info(f"Wrote {len(responses)} registers in {cycles} cycles.")
+
+    assert all(hresp == 0 for hresp, _ in responses), "Write returned an error!"
+    assert len(responses) / cycles == 1.0, \
+        f"Write burst sustained {len(responses) / cycles} transfers per cycle!"
+
+    responses, cycles = await transfers(dut, burst(addresses))
+
+    dut._log.info(f"Read {len(responses)} registers in {cycles} cycles.")
+
+    assert all(hresp == 0 for hresp, _ in responses), "Read returned an error!"
+    assert [hrdata for _, hrdata in responses] == values, "Read and write values differ!"
+    assert len(responses) / cycles == 1.0, \
+        f"Read burst sustained {len(responses) / cycles} transfers per cycle!"
+
+@cocotb.test()
+async def test_nonseq_read_after_write(dut):
+    """Test back-to-back NONSEQ transfers that alternate between
+    writes and reads. A read must return the value that was written
+    by the transfer directly before it.
+    """
+
+    clock = Clock(dut.clk, 1, units="ns")  # Create a 10us period clock on port clk
+    cocotb.fork(clock.start())  # Start the clock
+
+    bus = AMBA3AHBLiteDriver.AMBA3AHBLiteDriver(dut=dut, nbytes=4)
+    await bus.reset()
+
+    transfer_list = []
+    values = []
+
+    for _ in range(2*NO_REGISTERS):
+        address = 4*random.randint(0, NO_REGISTERS-1)
+        value = random.randint(0, (1 << 32)-1)
+
+        transfer_list.append((HTRANS.NONSEQ, address, value))
+        transfer_list.append((HTRANS.NONSEQ, address, None))
+        values.append(value)
+
+    responses, cycles = await transfers(dut, transfer_list)
+
+    dut._log.info(f"Performed {len(responses)} transfers in {cycles} cycles.")
+
+    assert all(hresp == 0 for hresp, _ in responses), "Transfer returned an error!"
+    assert [hrdata for _, hrdata in responses[1::2]] == values, \
+        "Read and write values differ!"
+    assert len(responses) / cycles == 1.0, \
+        f"Transfers sustained {len(responses) / cycles} transfers per cycle!"
+
+@cocotb.test()
+async def test_illegal_address_in_burst(dut):
+    """Test a read burst with an illegal address in the middle.
+    Only that transfer shall take two cycles and return an error.
+    """
+
+    clock = Clock(dut.clk, 1, units="ns")  # Create a 10us period clock on port clk
+    cocotb.fork(clock.start())  # Start the clock
+
+    bus = AMBA3AHBLiteDriver.AMBA3AHBLiteDriver(dut=dut, nbytes=4)
+    await bus.reset()
+
+    addresses = [0, 4, 4*NO_REGISTERS + 4*random.randint(0, 255), 8, 12]
+
+    responses, cycles = await transfers(dut, burst(addresses))
+
+    assert [hresp for hresp, _ in responses] == [0, 0, 1, 0, 0], \
+        "Illegal address did not return an error!"
+    assert cycles == len(addresses) + 1, \
+        f"Burst with one error response took {cycles} cycles!"
@@ -0,0 +1,201 @@
+"""Test of the AXI4-Lite widget
+
+The register file is compiled with '--bus axi4lite --axi-outstanding 4'
+(see Makefile). Reads are served by the read port of the registers and
+writes by the write port. This test performs the following checks:
+    - Test that a read and a write that are issued in the same cycle
+      are served by the registers in the same cycle.
+    - Test that no more than OUTSTANDING reads or writes are served while
+      RREADY or BREADY is low, and that no response is lost.
+    - Test that accesses to unmapped addresses, writes to read-only
+      registers, and writes without byte enables return SLVERR.
+"""
+
+import random
+
+from cocotb.clock import Clock
+from cocotb.triggers import RisingEdge, ReadOnly
+import cocotb
+
+from libs import AXI4LiteDriver
+from libs.AXI4LiteDriver import RESP
+
+OUTSTANDING = 4
+
+async def setup(dut) -> AXI4LiteDriver.AXI4LiteDriver:
+    """Start the clock, reset the DUT, and tie all hardware inputs"""
+    clock = Clock(dut.clk, 1, units="ns")  # Create a 10us period clock on port clk
+    cocotb.fork(clock.start())  # Start the clock
+
+    bus = AXI4LiteDriver.AXI4LiteDriver(dut=dut, nbytes=4)
+
+    dut.ro_reg__f1_in <= 0
+
+    # Reset DUT
+    dut.field_reset_n <= 0
+    await bus.reset()
+    dut.field_reset_n <= 1
+
+    await RisingEdge(dut.clk)
+
+    return bus
+
+async def count_cycles(clk, signals: list, cycles: int) -> int:
+    """Returns the number of cycles in which all signals were high"""
+    high_cycles = 0
+
+    for _ in range(cycles):
+        await RisingEdge(clk)
+        await ReadOnly()
+        high_cycles += all(int(signal.value) for signal in signals)
+
+    return high_cycles
+
+@cocotb.test()
+async def test_concurrent_access(dut):
+    """Test that a read and a write are served in the same cycle"""
+
+    bus = await setup(dut)
+
+    rd_val = random.randint(0, (1 << 8)-1)
+    wr_val = random.randint(0, (1 << 8)-1)
+
+    assert await bus.write(address=0, value=rd_val) == RESP.OKAY, \
+        "Write to 'rd_reg' failed!"
+
+    monitor = cocotb.fork(
+        count_cycles(dut.clk, [dut.rd_reg_sw_rd, dut.wr_reg_sw_wr], 20))
+
+    # Issue the read and the write in the same cycle
+    rd_access = cocotb.fork(bus.read(address=0))
+    wr_access = cocotb.fork(bus.write(address=4, value=wr_val))
+
+    data, rd_resp = await rd_access
+    wr_resp = await wr_access
+
+    concurrent_cycles = await monitor
+
+    assert rd_resp == RESP.OKAY, f"Read returned {rd_resp}!"
+    assert wr_resp == RESP.OKAY, f"Write returned {wr_resp}!"
+    assert data == rd_val, f"Read {data} from 'rd_reg' instead of {rd_val}!"
+    assert concurrent_cycles == 1, \
+        f"Read and write were served together in {concurrent_cycles} cycles!"
+
+    data, _ = await bus.read(address=4)
+
+    assert data == wr_val, f"Read {data} from 'wr_reg' instead of {wr_val}!"
+
+async def issue_writes(bus, addresses: list, values: list):
+    addr_phases = cocotb.fork(issue_write_addresses(bus, addresses))
+
+    for value in values:
+        await bus.write_data(value)
+
+    await addr_phases
+
+async def issue_write_addresses(bus, addresses: list):
+    for address in addresses:
+        await bus.write_address(address)
+
+async def issue_reads(bus, addresses: list):
+    for address in addresses:
+        await bus.read_address(address)
+
+@cocotb.test()
+async def test_back_pressure(dut):
+    """Test that responses are buffered while RREADY and BREADY are low"""
+
+    bus = await setup(dut)
+
+    accesses = 2 * OUTSTANDING
+
+    # Writes while BREADY is low
+    values = [random.randint(0, (1 << 8)-1) for _ in range(accesses)]
+
+    monitor = cocotb.fork(count_cycles(dut.clk, [dut.wr_reg_sw_wr], 30))
+    requests = cocotb.fork(issue_writes(bus, [4] * accesses, values))
+
+    wr_cycles = await monitor
+
+    assert wr_cycles == OUTSTANDING, \
+        f"Registers served {wr_cycles} writes while BREADY was low!"
+
+    monitor = cocotb.fork(count_cycles(dut.clk, [dut.wr_reg_sw_wr], 60))
+
+    for i in range(accesses):
+        resp = await bus.write_response()
+
+        assert resp == RESP.OKAY, f"Write {i} returned {resp}!"
+
+    await requests
+
+    wr_cycles = await monitor
+
+    assert wr_cycles == accesses - OUTSTANDING, \
+        f"Registers served {wr_cycles} writes after BREADY was set!"
+
+    data, _ = await bus.read(address=4)
+
+    assert data == values[-1], f"Read {data} from 'wr_reg' instead of {values[-1]}!"
+
+    # Reads while RREADY is low. Both registers are read alternately.
+    assert await bus.write(address=0, value=values[0]) == RESP.OKAY, \
+        "Write to 'rd_reg' failed!"
+
+    addresses = [0, 4] * OUTSTANDING
+
+    monitor = cocotb.fork(count_cycles(dut.clk, [dut.rd_reg_sw_rd], 30))
+    requests = cocotb.fork(issue_reads(bus, addresses))
+
+    rd_cycles = await monitor
+
+    assert rd_cycles == OUTSTANDING // 2, \
+        f"Registers served {rd_cycles} reads of 'rd_reg' while RREADY was low!"
+
+    for address in addresses:
+        data, resp = await bus.read_data()
+        expected = values[0] if address == 0 else values[-1]
+
+        assert resp == RESP.OKAY, f"Read from {address} returned {resp}!"
+        assert data == expected, f"Read {data} from {address} instead of {expected}!"
+
+    await requests
+
+@cocotb.test()
+async def test_slverr(dut):
+    """Test that illegal accesses return SLVERR"""
+
+    bus = await setup(dut)
+
+    # Unmapped address
+    _, resp = await bus.read(address=12)
+
+    assert resp == RESP.SLVERR, f"Read from unmapped address returned {resp}!"
+
+    resp = await bus.write(address=12, value=0)
+
+    assert resp == RESP.SLVERR, f"Write to unmapped address returned {resp}!"
+
+    # Read-only register
+    rand_val = random.randint(0, (1 << 8)-1)
+
+    dut.ro_reg__f1_in <= rand_val
+
+    resp = await bus.write(address=8, value=0)
+
+    assert resp == RESP.SLVERR, f"Write to read-only register returned {resp}!"
+
+    data, resp = await bus.read(address=8)
+
+    assert resp == RESP.OKAY, f"Read from read-only register returned {resp}!"
+    assert data == rand_val, f"Read {data} from 'ro_reg' instead of {rand_val}!"
+
+    # Write without byte enables
+    resp = await bus.write(address=16, value=0, strb=0)
+
+    assert resp == RESP.SLVERR, f"Write without byte enables returned {resp}!"
+
+    # A legal access after the errors must succeed
+    resp = await bus.write(address=16, value=rand_val)
+
+    assert resp == RESP.OKAY, f"Write to 'last_reg' returned {resp}!"
@@ -0,0 +1,166 @@
+"""Test of the clock gated registers
+
+The register file is compiled with '--clock-gating icg' (see Makefile).
+Every register gets a clock enable that drives an instance of the
+behavioral model of the clock gating cell. This test performs the
+following checks:
+    - Test AHB write and subsequent read-access. The flops must still be
+      updated by software.
+    - Test that the enables are low and the gated clocks are not toggled
+      while neither software nor hardware accesses the registers.
+    - Test that hardware writes with a write enable, singlepulse fields,
+      and counters still update the flops.
+    - Test that no clock gate is created for a register whose flops are
+      written by hardware in every cycle.
+"""
+
+import random
+
+from cocotb.clock import Clock
+from cocotb.triggers import RisingEdge, ReadOnly
+import cocotb
+
+from libs import AMBA3AHBLiteDriver
+
+async def setup(dut) -> AMBA3AHBLiteDriver.AMBA3AHBLiteDriver:
+    """Start the clock, reset the DUT, and tie all hardware inputs"""
+    clock = Clock(dut.clk, 1, units="ns")  # Create a 10us period clock on port clk
+    cocotb.fork(clock.start())  # Start the clock
+
+    bus = AMBA3AHBLiteDriver.AMBA3AHBLiteDriver(dut=dut, nbytes=4)
+
+    dut.hw_reg__hw_field_hw_wr <= 0
+    dut.hw_reg__hw_field_in <= 0
+    dut.cnt_reg__cnt_incr <= 0
+    dut.cnt_reg__cnt_decr <= 0
+    dut.ungated_reg__ungated_field_in <= 0
+
+    # Reset DUT
+    dut.field_reset_n <= 0
+    await bus.reset()
+    dut.field_reset_n <= 1
+
+    await RisingEdge(dut.clk)
+
+    return bus
+
+async def count_cycles(clk, signal, cycles: int) -> int:
+    """Returns the number of cycles in which a signal was high"""
+    high_cycles = 0
+
+    for _ in range(cycles):
+        await RisingEdge(clk)
+        await ReadOnly()
+        high_cycles += int(signal.value)
+
+    return high_cycles
+
+@cocotb.test()
+async def test_ahb_access(dut):
+    """Test writing via the bus and reading back"""
+
+    bus = await setup(dut)
+
+    for addr in (0, 4):
+        rand_val = random.randint(0, (1 << 8)-1)
+
+        write_dict = await bus.write(
+            address=addr,
+            value=rand_val,
+            nbytes=1,
+            step_size=1)
+
+        read_dict = await bus.read(
+            address=addr,
+            nbytes=1,
+            step_size=1)
+
+        dut._log.info(f"Wrote {write_dict} and read back {read_dict}.")
+
+        assert write_dict == read_dict, "Read and write values differ!"
+
+@cocotb.test()
+async def test_idle(dut):
+    """Test that the gated clocks are not toggled while the
+    registers are idle.
+    """
+
+    await setup(dut)
+
+    for _ in range(10):
+        await RisingEdge(dut.clk)
+        await ReadOnly()
+
+        assert dut.hw_reg_cg_en.value == 0, "Enable of 'hw_reg' is set!"
+        assert dut.cnt_reg_cg_en.value == 0, "Enable of 'cnt_reg' is set!"
+        assert dut.hw_reg_gclk.value == 0, "Gated clock of 'hw_reg' toggles!"
+        assert dut.cnt_reg_gclk.value == 0, "Gated clock of 'cnt_reg' toggles!"
+
+@cocotb.test()
+async def test_hw_access(dut):
+    """Test hardware writes, singlepulse fields, and counters"""
+
+    bus = await setup(dut)
+
+    # Hardware write with write enable
+    rand_val = random.randint(1, (1 << 8)-1)
+
+    dut.hw_reg__hw_field_in <= rand_val
+    dut.hw_reg__hw_field_hw_wr <= 1
+    await RisingEdge(dut.clk)
+    dut.hw_reg__hw_field_hw_wr <= 0
+    await RisingEdge(dut.clk)
+
+    # The flops must hold their value once the write enable is low
+    dut.hw_reg__hw_field_in <= rand_val ^ 0xff
+    await RisingEdge(dut.clk)
+    await ReadOnly()
+
+    assert dut.hw_reg__hw_field_r.value == rand_val, "Hardware write failed!"
+
+    await RisingEdge(dut.clk)
+
+    # Singlepulse field must be high for exactly one cycle
+    monitor = cocotb.fork(count_cycles(dut.clk, dut.hw_reg__pulse_field_r, 20))
+
+    await bus.write(address=1, value=1, nbytes=1, step_size=1)
+
+    pulse_cycles = await monitor
+
+    await RisingEdge(dut.clk)
+
+    assert pulse_cycles == 1, f"Singlepulse field was high for {pulse_cycles} cycles!"
+
+    # Counter
+    increments = random.randint(1, 20)
+
+    for _ in range(increments):
+        dut.cnt_reg__cnt_incr <= 1
+        await RisingEdge(dut.clk)
+        dut.cnt_reg__cnt_incr <= 0
+        await RisingEdge(dut.clk)
+
+    read_dict = await bus.read(address=4, nbytes=1, step_size=1)
+
+    assert read_dict == {4: increments}, \
+        f"Counter returned {read_dict[4]} after {increments} increments!"
+
+@cocotb.test()
+async def test_ungated_register(dut):
+    """Test that a register that is written by hardware in every
+    cycle is not clock gated.
+    """
+
+    await setup(dut)
+
+    for name in ('ungated_reg_cg_en', 'ungated_reg_gclk'):
+        assert not hasattr(dut, name), f"Found '{name}' in ungated register!"
+
+    rand_val = random.randint(1, (1 << 8)-1)
+
+    dut.ungated_reg__ungated_field_in <= rand_val
+    await RisingEdge(dut.clk)
+    await RisingEdge(dut.clk)
+    await ReadOnly()
+
+    assert dut.ungated_reg__ungated_field_r.value == rand_val, "Hardware write failed!"
@@ -0,0 +1,215 @@
+"""Test of the pipelined read multiplexer
+
+The register file is compiled with '--read-mux tree --read-mux-stages 2'
+(see Makefile). The bus widget holds every access until its response
+left the pipeline of the read multiplexer, but the registers must only
+see the access once. This test performs the following checks:
+    - Test that software reads and writes are only seen by the registers
+      in a single cycle: rclr clears once, swacc and singlepulse pulse
+      once.
+    - Test that a hardware event that arrives while a woclr write is in
+      the pipeline of the read multiplexer is not lost.
+    - Test that an external register gets exactly one request per access,
+      even if it acknowledges the request after a few cycles.
+"""
+
+import random
+
+from cocotb.clock import Clock
+from cocotb.triggers import RisingEdge, ReadOnly
+import cocotb
+
+from libs import AMBA3AHBLiteDriver
+
+async def setup(dut) -> AMBA3AHBLiteDriver.AMBA3AHBLiteDriver:
+    """Start the clock, reset the DUT, and tie all hardware inputs"""
+    clock = Clock(dut.clk, 1, units="ns")  # Create a 10us period clock on port clk
+    cocotb.fork(clock.start())  # Start the clock
+
+    bus = AMBA3AHBLiteDriver.AMBA3AHBLiteDriver(dut=dut, nbytes=4)
+
+    dut.ctrl_reg__rclr_field_hw_wr <= 0
+    dut.ctrl_reg__rclr_field_in <= 0
+    dut.intr_reg__intr_field_in <= 0
+
+    for rd_or_wr in ('r', 'w'):
+        getattr(dut, f"ext_reg__f1_ext_{rd_or_wr}_ack") <= 0
+        getattr(dut, f"ext_reg__f1_ext_{rd_or_wr}_err") <= 0
+
+    dut.ext_reg__f1_ext_r_data <= 0
+
+    # Reset DUT
+    dut.field_reset_n <= 0
+    await bus.reset()
+    dut.field_reset_n <= 1
+
+    await RisingEdge(dut.clk)
+
+    return bus
+
+async def count_cycles(clk, signal, cycles: int) -> int:
+    """Returns the number of cycles in which a signal was high"""
+    high_cycles = 0
+
+    for _ in range(cycles):
+        await RisingEdge(clk)
+        await ReadOnly()
+        high_cycles += int(signal.value)
+
+    return high_cycles
+
+async def external_register(dut, rd_or_wr: str, delay: int, r_data: int, cycles: int) -> int:
+    """Acknowledges every request to the external register after 'delay'
+    cycles and returns the number of acknowledged requests"""
+    req = getattr(dut, f"ext_reg__f1_ext_{rd_or_wr}_req")
+    ack = getattr(dut, f"ext_reg__f1_ext_{rd_or_wr}_ack")
+
+    requests = 0
+    cycle = 0
+
+    while cycle < cycles:
+        await RisingEdge(dut.clk)
+        await ReadOnly()
+        cycle += 1
+
+        if not req.value:
+            continue
+
+        requests += 1
+
+        for _ in range(delay):
+            await RisingEdge(dut.clk)
+            cycle += 1
+
+        dut.ext_reg__f1_ext_r_data <= r_data
+        ack <= 1
+        await RisingEdge(dut.clk)
+        ack <= 0
+        cycle += 1
+
+    return requests
+
+@cocotb.test()
+async def test_sw_access(dut):
+    """Test that reads and writes are only seen once by the registers"""
+
+    bus = await setup(dut)
+
+    # Read clear: the read must return the value and clear the field
+    rand_val = random.randint(1, (1 << 8)-1)
+
+    dut.ctrl_reg__rclr_field_in <= rand_val
+    dut.ctrl_reg__rclr_field_hw_wr <= 1
+    await RisingEdge(dut.clk)
+    dut.ctrl_reg__rclr_field_hw_wr <= 0
+    await RisingEdge(dut.clk)
+
+    monitor = cocotb.fork(count_cycles(dut.clk, dut.ctrl_reg_sw_rd, 20))
+
+    read_dict = await bus.read(address=0, nbytes=1, step_size=1)
+
+    assert read_dict == {0: rand_val}, \
+        f"Read {read_dict[0]} from rclr field instead of {rand_val}!"
+
+    rd_cycles = await monitor
+
+    assert rd_cycles == 1, f"Register was read in {rd_cycles} cycles!"
+
+    await RisingEdge(dut.clk)
+
+    read_dict = await bus.read(address=0, nbytes=1, step_size=1)
+
+    assert read_dict == {0: 0}, "Field was not cleared by the read!"
+
+    # swacc must be high for exactly one cycle
+    monitor = cocotb.fork(count_cycles(dut.clk, dut.ctrl_reg__swacc_field_swacc, 20))
+
+    await bus.write(address=1, value=rand_val, nbytes=1, step_size=1)
+
+    swacc_cycles = await monitor
+
+    await RisingEdge(dut.clk)
+
+    assert swacc_cycles == 1, f"swacc was high for {swacc_cycles} cycles!"
+
+    # Singlepulse field must be high for exactly one cycle
+    monitor = cocotb.fork(count_cycles(dut.clk, dut.ctrl_reg__pulse_field_r, 20))
+
+    await bus.write(address=2, value=1, nbytes=1, step_size=1)
+
+    pulse_cycles = await monitor
+
+    await RisingEdge(dut.clk)
+
+    assert pulse_cycles == 1, f"Singlepulse field was high for {pulse_cycles} cycles!"
+
+async def set_intr_after_sw_wr(dut):
+    """Set the interrupt one cycle after the register sees the write"""
+    while True:
+        await RisingEdge(dut.clk)
+        await ReadOnly()
+
+        if dut.intr_reg_sw_wr.value:
+            break
+
+    await RisingEdge(dut.clk)
+    dut.intr_reg__intr_field_in <= 1
+    await RisingEdge(dut.clk)
+    dut.intr_reg__intr_field_in <= 0
+
+@cocotb.test()
+async def test_woclr_intr(dut):
+    """Test that an interrupt that is set while a woclr write is in
+    the read multiplexer is not cleared by that write"""
+
+    bus = await setup(dut)
+
+    # Set the interrupt
+    dut.intr_reg__intr_field_in <= 1
+    await RisingEdge(dut.clk)
+    dut.intr_reg__intr_field_in <= 0
+    await RisingEdge(dut.clk)
+    await ReadOnly()
+
+    assert dut.intr_reg_intr.value == 1, "Interrupt was not set!"
+
+    await RisingEdge(dut.clk)
+
+    # Clear the interrupt while a new event arrives
+    event = cocotb.fork(set_intr_after_sw_wr(dut))
+
+    await bus.write(address=4, value=1, nbytes=1, step_size=1)
+    await event
+
+    await RisingEdge(dut.clk)
+    await ReadOnly()
+
+    assert dut.intr_reg_intr.value == 1, "Interrupt was lost during the write!"
+
+@cocotb.test()
+async def test_external_register(dut):
+    """Test that an external register gets one request per access"""
+
+    bus = await setup(dut)
+
+    for rd_or_wr in ('w', 'r'):
+        rand_val = random.randint(0, (1 << 8)-1)
+        delay = random.randint(1, 5)
+
+        responder = cocotb.fork(
+            external_register(dut, rd_or_wr, delay, rand_val, 30))
+
+        if rd_or_wr == 'w':
+            await bus.write(address=8, value=rand_val, nbytes=1, step_size=1)
+        else:
+            read_dict = await bus.read(address=8, nbytes=1, step_size=1)
+
+            assert read_dict == {8: rand_val}, \
+                f"Read {read_dict[8]} from external register instead of {rand_val}!"
+
+        requests = await responder
+
+        await RisingEdge(dut.clk)
+
+        assert requests == 1, \
+            f"External register got {requests} requests for a single access!"
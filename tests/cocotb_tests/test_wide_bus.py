@@ -0,0 +1,158 @@
+"""Test of a bus that is wider than the registers
+
+The register file with 32-bit registers is compiled with '--bus-width 64'
+(see Makefile). A single 64-bit access reads or writes two adjacent
+registers. This test performs the following checks:
+    - Test 8 byte writes and reads. Every beat covers two registers and
+      the values must be identical to the values of 4 byte accesses to
+      the individual registers.
+    - Test that an access to one register does not add latency and that
+      an access to two registers adds one wait state.
+    - Test if accessing illegal addresses results in an error response.
+"""
+
+import random
+
+from cocotb.clock import Clock
+from cocotb.triggers import RisingEdge, ReadOnly
+import cocotb
+
+from libs import AMBA3AHBLiteDriver
+from libs.AMBA3AHBLiteDriver import HTRANS
+
+NO_REGISTERS = 4
+
+@cocotb.test()
+async def test_wide_access(dut):
+    """Test writing two registers per beat and reading them back"""
+
+    clock = Clock(dut.clk, 1, units="ns")  # Create a 10us period clock on port clk
+    cocotb.fork(clock.start())  # Start the clock
+
+    bus = AMBA3AHBLiteDriver.AMBA3AHBLiteDriver(dut=dut, nbytes=8)
+    await bus.reset()
+
+    write_dict = {}
+
+    for addr in range(0, 4*NO_REGISTERS, 8):
+        write_dict.update(
+            await bus.write(
+                address=addr,
+                value=random.randint(0, (1 << 64)-1),
+                nbytes=8,
+                step_size=8))
+
+    read_dict = {}
+
+    for addr in range(0, 4*NO_REGISTERS, 8):
+        read_dict.update(
+            await bus.read(
+                address=addr,
+                nbytes=8,
+                step_size=8))
+
+    dut._log.info(f"Wrote dictionary {write_dict}")
+    dut._log.info(f"Read back dictionary {read_dict}")
+
+    assert write_dict == read_dict, "Read and write values differ!"
+
+    # Read back every register on its own
+    for addr, value in write_dict.items():
+        for lane in range(2):
+            lane_dict = await bus.read(
+                address=addr + 4*lane,
+                nbytes=4,
+                step_size=4)
+
+            assert lane_dict[addr + 4*lane] == (value >> (32*lane)) & 0xFFFFFFFF, \
+                "Read and write values differ!"
+
+async def count_wait_states(dut, address: int, size: int) -> int:
+    """Performs a single read and returns the number of wait states"""
+
+    # Address phase
+    dut.HSEL <= 1
+    dut.HWRITE <= 0
+    dut.HADDR <= address
+    dut.HTRANS <= HTRANS.NONSEQ.value
+    dut.HSIZE <= size
+
+    await RisingEdge(dut.clk)
+
+    # Data phase
+    dut.HTRANS <= HTRANS.IDLE.value
+    dut.HSEL <= 0
+
+    wait_states = 0
+
+    while True:
+        await ReadOnly()
+
+        if dut.HREADYOUT.value:
+            break
+
+        wait_states += 1
+
+        await RisingEdge(dut.clk)
+
+    await RisingEdge(dut.clk)
+
+    return wait_states
+
+@cocotb.test()
+async def test_latency(dut):
+    """Test that only the second lane of a beat adds a wait state"""
+
+    clock = Clock(dut.clk, 1, units="ns")  # Create a 10us period clock on port clk
+    cocotb.fork(clock.start())  # Start the clock
+
+    bus = AMBA3AHBLiteDriver.AMBA3AHBLiteDriver(dut=dut, nbytes=8)
+    await bus.reset()
+
+    for address, size, expected in ((0, 2, 0), (4, 2, 0), (0, 3, 1), (8, 3, 1)):
+        wait_states = await count_wait_states(dut, address, size)
+
+        dut._log.info(
+            f"Read of {1 << size} bytes at {address} took {wait_states} wait states.")
+
+        assert wait_states == expected, \
+            f"Expected {expected} wait states, got {wait_states}!"
+
+@cocotb.test()
+async def test_illegal_address(dut):
+    """Test reading and writing to an illegal address.
+    The logic should return a correct error sequence.
+    """
+
+    clock = Clock(dut.clk, 1, units="ns")  # Create a 10us period clock on port clk
+    cocotb.fork(clock.start())  # Start the clock
+
+    bus = AMBA3AHBLiteDriver.AMBA3AHBLiteDriver(dut=dut, nbytes=8)
+    await bus.reset()
+
+    rand_addr = 8*random.randint(NO_REGISTERS // 2, 1337)
+
+    write_error = False
+
+    try:
+        await bus.write(
+            address=rand_addr,
+            value=random.randint(0, (1 << 64)-1),
+            nbytes=8,
+            step_size=8)
+    except AMBA3AHBLiteDriver.BusErrorResponse:
+        write_error = True
+
+    assert write_error == True, "Write to illegal address did not return an error!"
+
+    read_error = False
+
+    try:
+        await bus.read(
+            address=rand_addr,
+            nbytes=8,
+            step_size=8)
+    except AMBA3AHBLiteDriver.BusErrorResponse:
+        read_error = True
+
+    assert read_error == True, "Read from illegal address did not return an error!"
@@ -0,0 +1,150 @@
+"""Test of the register slices between the bus widget and the registers
+
+The register file is compiled with '--pipeline-stages 2' (see Makefile).
+Every stage adds two cycles of latency to an access. This test performs
+the following checks:
+    - Test AHB write and subsequent read-access in 1, 2, and 4B steps.
+      The bus driver must handle the wait states that are inserted by
+      the pipeline.
+    - Test that a single access is extended by exactly two wait states
+      per pipeline stage.
+    - Test if accessing illegal addresses still results in an error
+      response.
+"""
+
+import random
+
+from cocotb.clock import Clock
+from cocotb.triggers import RisingEdge, ReadOnly
+import cocotb
+
+from libs import AMBA3AHBLiteDriver
+from libs.AMBA3AHBLiteDriver import HTRANS
+
+# Must match the number of stages in the Makefile
+PIPELINE_STAGES = 2
+
+@cocotb.test()
+async def test_ahb_access(dut):
+    """Test writing via the bus and reading back"""
+
+    clock = Clock(dut.clk, 1, units="ns")  # Create a 10us period clock on port clk
+    cocotb.fork(clock.start())  # Start the clock
+
+    bus = AMBA3AHBLiteDriver.AMBA3AHBLiteDriver(dut=dut, nbytes=4)
+    await bus.reset()
+
+    # Write in 1, 2, and 4 byte steps
+    for step_size in (1, 2, 4):
+        dut._log.info(f"Writing in {step_size} steps.")
+
+        write_dict = {}
+        read_dict = {}
+
+        for addr in range(0, 8, step_size):
+            rand_val = random.randint(0, (1 << (step_size * 8))-1)
+
+            dut._log.info(f"Write value {rand_val} to addres {addr}.")
+
+            write_dict.update(
+                await bus.write(
+                    address=addr,
+                    value=rand_val,
+                    nbytes=step_size,
+                    step_size=step_size))
+
+        for addr in range(0, 8, step_size):
+            read_dict.update(
+                await bus.read(
+                    address=addr,
+                    nbytes=step_size,
+                    step_size=step_size))
+
+        # Check at end of every step_size
+        dut._log.info(f"Wrote dictionary {write_dict}")
+        dut._log.info(f"Read back dictionary {read_dict}")
+
+        assert write_dict == read_dict, "Read and write values differ!"
+
+@cocotb.test()
+async def test_latency(dut):
+    """Test that a single read is extended by two wait states
+    per pipeline stage.
+    """
+
+    clock = Clock(dut.clk, 1, units="ns")  # Create a 10us period clock on port clk
+    cocotb.fork(clock.start())  # Start the clock
+
+    bus = AMBA3AHBLiteDriver.AMBA3AHBLiteDriver(dut=dut, nbytes=4)
+    await bus.reset()
+
+    # Address phase
+    dut.HSEL <= 1
+    dut.HWRITE <= 0
+    dut.HADDR <= 4
+    dut.HTRANS <= HTRANS.NONSEQ.value
+    dut.HSIZE <= 2
+
+    await RisingEdge(dut.clk)
+
+    # Data phase
+    dut.HTRANS <= HTRANS.IDLE.value
+    dut.HSEL <= 0
+
+    wait_states = 0
+
+    while True:
+        await ReadOnly()
+
+        if dut.HREADYOUT.value:
+            break
+
+        wait_states += 1
+
+        await RisingEdge(dut.clk)
+
+    await RisingEdge(dut.clk)
+
+    dut._log.info(f"Read was extended by {wait_states} wait states.")
+
+    assert wait_states == 2 * PIPELINE_STAGES, \
+        f"Expected {2 * PIPELINE_STAGES} wait states, got {wait_states}!"
+
+@cocotb.test()
+async def test_illegal_address(dut):
+    """Test reading and writing to an illegal address.
+    The logic should return a correct error sequence.
+    """
+
+    clock = Clock(dut.clk, 1, units="ns")  # Create a 10us period clock on port clk
+    cocotb.fork(clock.start())  # Start the clock
+
+    bus = AMBA3AHBLiteDriver.AMBA3AHBLiteDriver(dut=dut, nbytes=4)
+    await bus.reset()
+
+    rand_addr = random.randint(8, 1337)
+
+    write_error = False
+
+    try:
+        await bus.write(
+            address=rand_addr,
+            value=random.randint(0, (1 << 8)-1),
+            nbytes=1,
+            step_size=1)
+    except AMBA3AHBLiteDriver.BusErrorResponse:
+        write_error = True
+
+    assert write_error == True, "Write to illegal address did not return an error!"
+
+    read_error = False
+
+    try:
+        await bus.read(
+            address=rand_addr,
+            nbytes=1,
+            step_size=1)
+    except AMBA3AHBLiteDriver.BusErrorResponse:
+        read_error = True
+
+    assert read_error == True, "Read from illegal address did not return an error!"